@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+렌더 단계 벤치마크 (CPU + ffmpeg만 있으면 동작).
+
+합성 샷(ffmpeg testsrc2로 만든 키프레임 N장 + 길이가 제각각인 scene.txt)을 만들고
+build_base / rife_interpolate(stub 모델) / finalize / make_pingpong_from_video 를
+repeat번 실행해 단계별 중앙값을 JSON으로 저장한다.
+시작 시간도 같이 잰다: cli.py --help, 그리고 이미 최신인 샷에 대한 cli.py all(캐시된 no-op 렌더).
+--baseline 을 주면 그 결과와 비교해 느려진 단계를 표시하고 exit 1.
+
+  python scripts/benchmark.py --keyframes 12 --width 640 --height 360 --out bench.json
+  python scripts/benchmark.py --baseline bench.json      # 변경 후 비교
+"""
+import argparse, json, os, platform, random, shutil, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+from typing import Dict, List
+
+from pipeline import build_base, rife_interpolate, finalize, compute_exp, run
+from make_pingpong import make_pingpong_from_video
+from rife_engine import STUB_NAME
+from intermediate import FORMATS, DEFAULT_FORMAT
+import profiling
+
+STAGES = ["build_base", "rife_interpolate", "finalize", "pingpong"]
+CLI = Path(__file__).resolve().parent / "cli.py"
+
+def make_synthetic_shot(shot_dir: Path, keyframes: int, width: int, height: int, seed: int = 0):
+    """testsrc2 프레임을 키프레임으로 쓰고, seed로 고정한 제각각의 duration으로 scene.txt 작성."""
+    key_dir = shot_dir / "keyframes"
+    key_dir.mkdir(parents=True, exist_ok=True)
+    (shot_dir / "timing").mkdir(exist_ok=True)
+    (shot_dir / "work").mkdir(exist_ok=True)
+    (shot_dir / "out").mkdir(exist_ok=True)
+    run(["ffmpeg", "-y", "-v", "error", "-f", "lavfi",
+         "-i", f"testsrc2=size={width}x{height}:rate=1",
+         "-frames:v", str(keyframes), str(key_dir / "%04d.png")], check=True)
+    rng = random.Random(seed)
+    lines = []
+    for i in range(1, keyframes + 1):
+        lines.append(f"file '../keyframes/{i:04d}.png'")
+        lines.append(f"duration {rng.choice([0.25, 0.4, 0.5, 0.75, 1.0]):.2f}")
+    lines.append(f"file '../keyframes/{keyframes:04d}.png'")   # concat demuxer: 마지막 항목 반복
+    (shot_dir / "timing" / "scene.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def run_once(shot_dir: Path, args) -> Dict[str, dict]:
+    """네 단계를 한 번씩 실행하고 단계별 프로파일 기록을 반환."""
+    exp = compute_exp(args.base_fps, args.target_fps)
+    prof = profiling.start()
+    try:
+        with profiling.stage("build_base"):
+            base = build_base(shot_dir, args.base_fps, args.width, args.height, fit="auto",
+                              intermediate=args.intermediate)
+        with profiling.stage("rife_interpolate"):
+            rife_interpolate(shot_dir, exp, Path(STUB_NAME), base_video=base,
+                             threads=args.threads, batch=args.batch, intermediate=args.intermediate)
+        with profiling.stage("finalize"):
+            final = finalize(shot_dir, args.target_fps, speed=args.speed)
+        with profiling.stage("pingpong"):
+            make_pingpong_from_video(final, shot_dir / "out" / "pingpong.mp4", fps=args.target_fps,
+                                     duration_sec=args.pingpong_duration)
+    finally:
+        profiling.stop()
+    return {s.name: s.to_dict() for s in prof.stages}
+
+def _time_cmd(cmd: List[str], cwd: Path, repeat: int) -> dict:
+    """별도 프로세스로 repeat번 실행한 wall/CPU(자식) 시간."""
+    walls, cpus = [], []
+    for _ in range(repeat):
+        c0, t0 = os.times(), time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        walls.append(time.perf_counter() - t0)
+        c1 = os.times()
+        cpus.append(c1.children_user - c0.children_user + c1.children_system - c0.children_system)
+    return {"wall_s": round(statistics.median(walls), 4), "wall_min_s": round(min(walls), 4),
+            "cpu_s": round(statistics.median(cpus), 4), "peak_rss_mb": 0.0, "frames": 0}
+
+def measure_startup(ws: Path, shot: str, args) -> Dict[str, dict]:
+    """cli.py --help 와, 한 번 렌더해 둔 샷에 대한 cli.py all (최신이라 아무것도 안 함)."""
+    render = [sys.executable, str(CLI), "all", "--shot", shot, "--rife-dir", STUB_NAME,
+              "--base-fps", str(args.base_fps), "--target-fps", str(args.target_fps), "--speed", str(args.speed),
+              "--width", str(args.width), "--height", str(args.height), "--intermediate", args.intermediate,
+              "--threads", str(args.threads), "--batch", str(args.batch)]
+    subprocess.run(render, cwd=ws, check=True, stdout=subprocess.DEVNULL)
+    return {"startup_help": _time_cmd([sys.executable, str(CLI), "--help"], ws, args.repeat),
+            "startup_noop": _time_cmd(render, ws, args.repeat)}
+
+def summarize(runs: List[Dict[str, dict]]) -> Dict[str, dict]:
+    out = {}
+    for stage in STAGES:
+        walls = [r[stage]["wall_s"] for r in runs]
+        cpus = [r[stage]["cpu_s"] for r in runs]
+        out[stage] = {
+            "wall_s": round(statistics.median(walls), 4),
+            "wall_min_s": round(min(walls), 4),
+            "cpu_s": round(statistics.median(cpus), 4),
+            "peak_rss_mb": max(r[stage]["peak_rss_mb"] for r in runs),
+            "frames": runs[-1][stage]["frames"],
+        }
+    return out
+
+def compare(result: dict, baseline: dict, tolerance: float, min_delta: float) -> List[str]:
+    """중앙값 wall 시간이 baseline × (1 + tolerance) 보다, 그리고 min_delta초 이상 느려진 단계."""
+    if result["config"] != baseline.get("config"):
+        print("⚠️ baseline과 설정이 다릅니다. 비교는 참고용입니다.")
+    regressions = []
+    for stage, cur in result["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old:
+            continue
+        ratio = cur["wall_s"] / old["wall_s"] if old["wall_s"] > 0 else 1.0
+        slower = cur["wall_s"] > old["wall_s"] * (1 + tolerance) and cur["wall_s"] - old["wall_s"] >= min_delta
+        mark = "✖ 느려짐" if slower else ("✔ 빨라짐" if ratio < 1 - tolerance else "")
+        print(f"   {stage:<18}{old['wall_s']:>9.3f}s → {cur['wall_s']:>9.3f}s  ({ratio:5.2f}x) {mark}")
+        if slower:
+            regressions.append(stage)
+    return regressions
+
+def main():
+    p = argparse.ArgumentParser(description="합성 샷으로 렌더 단계 벤치마크 (stub 보간 모델)")
+    p.add_argument("--keyframes", type=int, default=12)
+    p.add_argument("--width", type=int, default=640)
+    p.add_argument("--height", type=int, default=360)
+    p.add_argument("--base-fps", type=int, default=8)
+    p.add_argument("--target-fps", type=int, default=24)
+    p.add_argument("--speed", type=float, default=1.0)
+    p.add_argument("--pingpong-duration", type=float, default=4.0)
+    p.add_argument("--threads", type=int, default=0)
+    p.add_argument("--batch", type=int, default=4)
+    p.add_argument("--intermediate", choices=list(FORMATS), default=DEFAULT_FORMAT,
+                   help="work/ 중간 파일 포맷")
+    p.add_argument("--repeat", type=int, default=3, help="반복 횟수 (단계별 중앙값 사용)")
+    p.add_argument("--seed", type=int, default=0, help="scene.txt duration 난수 시드")
+    p.add_argument("--workdir", default="", help="합성 샷 위치 (기본: 임시 폴더, 끝나면 삭제)")
+    p.add_argument("--out", default="bench_results.json", help="결과 JSON 경로")
+    p.add_argument("--baseline", default="", help="비교할 이전 결과 JSON")
+    p.add_argument("--tolerance", type=float, default=0.15, help="허용 느려짐 비율 (0.15 = 15%%)")
+    p.add_argument("--min-delta", type=float, default=0.05, help="이보다 작은 차이(초)는 무시")
+    args = p.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        print("ERROR: ffmpeg가 필요합니다.", file=sys.stderr)
+        sys.exit(1)
+
+    config = {k: getattr(args, k) for k in
+              ("keyframes", "width", "height", "base_fps", "target_fps", "speed",
+               "pingpong_duration", "threads", "batch", "intermediate", "seed")}
+    tmp = None if args.workdir else tempfile.mkdtemp(prefix="rife_bench_")
+    ws = Path(args.workdir or tmp)
+    shot_dir = ws / "project" / "shot_bench"
+    try:
+        make_synthetic_shot(shot_dir, args.keyframes, args.width, args.height, seed=args.seed)
+        runs = []
+        for i in range(args.repeat):
+            print(f"== 벤치마크 {i + 1}/{args.repeat} ==")
+            runs.append(run_once(shot_dir, args))
+        print("== 시작 시간 (cli.py --help / 캐시된 no-op 렌더) ==")
+        startup = measure_startup(ws, shot_dir.name, args)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(),
+                 "cpus": os.cpu_count()},
+        "config": config,
+        "repeat": args.repeat,
+        "stages": {**summarize(runs), **startup},
+    }
+    Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print("\n단계별 중앙값:")
+    for stage, st in result["stages"].items():
+        print(f"   {stage:<18}{st['wall_s']:>9.3f}s  CPU {st['cpu_s']:.3f}s  {st['frames']} 프레임")
+    print(f"결과 → {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        print(f"\nbaseline 비교 ({args.baseline}, 허용 {args.tolerance:.0%}):")
+        regressions = compare(result, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"✖ 성능 저하: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✔ 성능 저하 없음")
+
+if __name__ == "__main__":
+    main()
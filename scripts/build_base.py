@@ -2,6 +2,7 @@
 import argparse, sys
 from pathlib import Path
 from pipeline import build_base, ensure_dirs, check_ffmpeg
+from intermediate import FORMATS, DEFAULT_FORMAT
 
 def main():
     p = argparse.ArgumentParser()
@@ -18,6 +19,9 @@ def main():
    )
 
 
+    p.add_argument("--intermediate", choices=list(FORMATS), default=DEFAULT_FORMAT,
+                   help="베이스 파일 포맷 (h264 / ffv1 / utvideo / mjpeg / raw)")
+
     # ✅ 추가: 무음 플래그(기본 True)
     g = p.add_mutually_exclusive_group()
     g.add_argument("--mute",    dest="mute", action="store_true",  default=True,  help="오디오 제거(기본값)")
@@ -30,7 +34,8 @@ def main():
     ensure_dirs(shot_dir)
 
     # ✅ 변경: mute 전달
-    out = build_base(shot_dir, args.base_fps, args.width, args.height, mute=args.mute)
+    out = build_base(shot_dir, args.base_fps, args.width, args.height, mute=args.mute, fit=args.fit,
+                     intermediate=args.intermediate)
     print(f"베이스 비디오 생성 완료: {out}")
 
 if __name__ == "__main__":
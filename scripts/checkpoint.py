@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+청크 단위 체크포인트로 RIFE 보간을 중단한 곳부터 이어서 실행 (--checkpoint N).
+
+입력(베이스)을 N프레임 구간으로 나눠 (끝 프레임 1장 겹침) 순서대로 보간하고,
+구간 결과는 work/ckpt/<산출물 이름>/chunk_*.<ext> 로 임시 파일에 쓴 뒤 rename으로 커밋한다.
+manifest.json 에는 입력 해시와 보간 옵션으로 만든 키, 커밋된 청크(구간, 프레임 수, 통계)를 남긴다.
+
+- 다시 실행하면 키가 같을 때만 커밋된 청크를 건너뛰고 다음 청크부터 보간한다. 키가 다르면 처음부터.
+- 미완성 청크(.tmp)는 절대 커밋되지 않고, 다음 실행에서 지운다.
+- 모든 청크가 끝나야 concat(-c copy)으로 임시 이름에 잇고 rename → 그때서야 rife_*fps 가 생긴다.
+"""
+import json, os, shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from intermediate import get_format, DEFAULT_FORMAT
+from pipeline import run
+from stage_cache import file_digest, model_digest, stage_key
+
+MANIFEST = "manifest.json"
+
+
+def fsync_file(path: Path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+def fsync_dir(path: Path):
+    """rename 자체를 디스크에 남긴다. 디렉터리를 열 수 없는 OS(Windows)에서는 건너뜀."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def chunk_bounds(n_frames: int, every: int) -> List[Tuple[int, int]]:
+    """[(시작, 끝(포함)), ...] — every 프레임 간격, 인접 청크는 경계 프레임 1장을 공유."""
+    if n_frames < 2:
+        return [(0, max(0, n_frames - 1))]
+    bounds = list(range(0, n_frames - 1, max(1, every))) + [n_frames - 1]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+class Checkpoint:
+    """work/ckpt/<이름>/ 의 커밋된 청크와 manifest.json."""
+
+    def __init__(self, root: Path, key: str, ext: str):
+        self.root, self.key, self.ext = Path(root), key, ext
+        self.chunks: List[dict] = []
+
+    @property
+    def manifest(self) -> Path:
+        return self.root / MANIFEST
+
+    def chunk_path(self, index: int) -> Path:
+        return self.root / f"chunk_{index:05d}.{self.ext}"
+
+    def load(self) -> int:
+        """이어서 쓸 수 있는 커밋된 청크 수. 키가 다르거나 manifest가 깨졌으면 비우고 0."""
+        try:
+            data = json.loads(self.manifest.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if data.get("key") != self.key:
+            shutil.rmtree(self.root, ignore_errors=True)
+            data = {}
+        self.root.mkdir(parents=True, exist_ok=True)
+        for tmp in self.root.glob(".*.tmp.*"):
+            tmp.unlink(missing_ok=True)   # 중단된 청크
+        self.chunks = []
+        for c in data.get("chunks", []):
+            p = self.chunk_path(c["index"])
+            if c["index"] != len(self.chunks) or not p.exists() or p.stat().st_size != c["size"]:
+                break
+            self.chunks.append(c)
+        return len(self.chunks)
+
+    def tmp_path(self, index: int) -> Path:
+        return self.root / f".chunk_{index:05d}.tmp.{self.ext}"
+
+    def commit(self, index: int, s0: int, s1: int, result: dict):
+        """임시 청크 파일을 rename으로 확정하고 manifest 갱신 (둘 다 원자적).
+        rename 전에 내용을 fsync해야 전원이 나가도 manifest가 비어 있는 청크를 가리키지 않는다."""
+        path, chunk_tmp = self.chunk_path(index), self.tmp_path(index)
+        fsync_file(chunk_tmp)
+        os.replace(chunk_tmp, path)
+        self.chunks.append({"index": index, "start": s0, "end": s1, "size": path.stat().st_size,
+                            "result": result})
+        tmp = self.manifest.with_name(f".{MANIFEST}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"key": self.key, "chunks": self.chunks}, ensure_ascii=False, indent=2))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest)
+        fsync_dir(self.root)
+
+    def assemble(self, out_path: Path) -> Path:
+        """커밋된 청크를 stream copy로 이어 임시 이름에 쓴 뒤 out_path로 rename."""
+        concat_txt = self.root / "concat.txt"
+        concat_txt.write_text("".join(f"file '{self.chunk_path(c['index']).name}'\n" for c in self.chunks),
+                              encoding="utf-8")
+        tmp = out_path.with_name(f".{out_path.stem}.tmp{out_path.suffix}")
+        run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", str(concat_txt),
+             "-c", "copy", "-an", str(tmp)], check=True)
+        os.replace(tmp, out_path)
+        return out_path
+
+
+def rife_interpolate_checkpointed(base_video: Path, exp: int, rife_dir: Path, every: int,
+                                  uhd: bool = False, scale: float = 1.0, threads: int = 0, batch: int = 4,
+                                  hold_threshold: Optional[float] = None, fb_avg: bool = False,
+                                  tag: str = "", intermediate: str = DEFAULT_FORMAT,
+                                  exact_fps: Optional[int] = None, speed: float = 1.0,
+                                  mem_budget: Optional[int] = None, fade_threshold: Optional[float] = None):
+    """rife_interpolate_one과 같은 산출물(rife{tag}_*fps.<ext>)을 청크 단위로 커밋하며 만든다."""
+    from frame_store import open_store
+    from parallel_rife import interp_segment, report_segments
+    from rife_engine import exact_step
+
+    work = base_video.parent
+    store = open_store(base_video)
+    fmt = get_format(intermediate)
+    step = None
+    if exact_fps:
+        out_fps, step = exact_fps, exact_step(store.fps or 1, exact_fps, speed)
+        out_path = fmt.path(work, f"rife{tag}_exact_{out_fps}fps")
+    else:
+        out_fps = round((store.fps or 1) * (2 ** exp))
+        out_path = fmt.path(work, f"rife{tag}_{out_fps}fps")
+
+    key = stage_key("rife_ckpt", file_digest(base_video), exp, model_digest(rife_dir), uhd, scale, fb_avg,
+                    hold_threshold, intermediate, exact_fps, speed, mem_budget, batch, fade_threshold, every)
+    segs = chunk_bounds(len(store), every)
+    ckpt = Checkpoint(work / "ckpt" / out_path.stem, key, fmt.ext)
+    done = ckpt.load()
+    if done:
+        print(f"   체크포인트에서 재개: 청크 {done}/{len(segs)} 완료 (입력 프레임 {segs[min(done, len(segs) - 1)][0]}부터)")
+    else:
+        print(f"   체크포인트: {len(segs)}개 청크 (입력 {every}프레임씩) → {ckpt.root}")
+
+    for i in range(done, len(segs)):
+        s0, s1 = segs[i]
+        result = interp_segment(str(store.root), s0, s1, i == len(segs) - 1, exp, str(ckpt.tmp_path(i)),
+                                str(rife_dir), uhd, scale, threads, batch, hold_threshold, fb_avg, out_fps,
+                                intermediate, step, mem_budget, fade_threshold)
+        ckpt.commit(i, s0, s1, result)
+        print(f"   청크 {i + 1}/{len(segs)} 커밋 (입력 {s0}-{s1}, {result['frames']} 프레임)")
+
+    ckpt.assemble(out_path)
+    report_segments([c["result"] for c in ckpt.chunks], work, hold_threshold, fade_threshold)
+    shutil.rmtree(ckpt.root, ignore_errors=True)
+    return out_path, out_fps
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+하나의 진입점으로 모든 단계를 같은 프로세스에서 실행 (서브프로세스 재진입 없음).
+
+  python scripts/cli.py all --shot shot_001                 # 베이스→보간→최종 (최신이면 생략)
+  python scripts/cli.py base|interpolate|finalize --shot shot_001
+  python scripts/cli.py pingpong --shot shot_001 --duration 6
+  python scripts/cli.py watch --shot shot_001
+  python scripts/cli.py generate --engine kling --shots "shot_*"
+
+- 고른 서브커맨드의 모듈만 import한다. `--help`는 argparse만, generate만 requests를,
+  watch만 watchdog을, 실제 보간 단계만 numpy/torch를 불러온다.
+- interpolate/finalize는 stages.json에 기록된 앞 단계 산출물의 키가 지금 옵션과 같으면 그대로 쓰고,
+  아니면 앞 단계부터 (스테이지 캐시를 거쳐) 만든다.
+- ffmpeg 확인은 프로세스당 한 번.
+"""
+import argparse, sys
+from pathlib import Path
+
+COMMANDS = {
+    "base": "베이스 비디오 (keyframes + scene.txt → work/base_*)",
+    "interpolate": "RIFE 보간 (베이스가 최신이 아니면 먼저 만듦)",
+    "finalize": "최종 *fps 렌더 (앞 단계가 최신이 아니면 먼저 만듦)",
+    "pingpong": "최종본 → 핑퐁 (최종본이 최신이 아니면 먼저 렌더)",
+    "generate": "Kling/WAN 생성 작업 (gen_jobs.py)",
+    "watch": "키프레임/scene.txt 변경 감시 → 바뀐 구간만 다시 렌더",
+    "all": "베이스→보간→최종 (이미 최신이면 아무것도 하지 않음)",
+}
+SUBMITTABLE = ("pingpong", "all")
+
+
+def add_command_args(cmd: str, p: argparse.ArgumentParser):
+    if cmd == "generate":
+        from gen_jobs import add_gen_args
+        add_gen_args(p)
+        return
+    from pipeline import add_pipeline_args, add_profile_args
+    p.add_argument("--shot", required=True, help="샷 폴더 이름 (예: shot_001)")
+    if cmd == "pingpong":
+        from make_pingpong import add_pingpong_args
+        add_pingpong_args(p)
+    elif cmd == "watch":
+        p.add_argument("--full-rebuild", action="store_true",
+                       help="바뀐 구간만이 아니라 매번 전체 파이프라인 실행")
+    elif cmd == "all":
+        p.add_argument("--pingpong", type=float, default=0.0, metavar="SEC",
+                       help="최종본 다음에 SEC초 핑퐁도 만듦 (0=안 만듦)")
+    add_pipeline_args(p)
+    add_profile_args(p)
+    if cmd in SUBMITTABLE:
+        from render_daemon import add_submit_args
+        add_submit_args(p)
+
+
+# ---------------- 단계 (앞 단계가 최신이면 다시 만들지 않음) ----------------
+def _recorded(shot_dir: Path, stage: str, key: str):
+    from stage_cache import last_artifact
+    rec = last_artifact(shot_dir / "work", stage)
+    if rec is not None and rec[1].get("key") == key:
+        print(f"   ({stage} 최신) {rec[0].name}")
+        return rec[0].resolve()
+    return None
+
+def stage_base(shot_dir: Path, cache, kw: dict):
+    import profiling
+    from pipeline import base_stage, base_stage_key
+    key = base_stage_key(shot_dir, kw["base_fps"], kw["width"], kw["height"], kw["fit"], kw["intermediate"])
+    path = _recorded(shot_dir, "base", key)
+    if path is None:
+        with profiling.stage("base"):
+            path, key = base_stage(shot_dir, cache, kw["base_fps"], kw["width"], kw["height"], fit=kw["fit"],
+                                   intermediate=kw["intermediate"])
+    return path, key
+
+def stage_rife(shot_dir: Path, cache, kw: dict):
+    import profiling
+    from pipeline import compute_exp, rife_stage, rife_stage_key
+    base, base_key = stage_base(shot_dir, cache, kw)
+    exp = compute_exp(kw["base_fps"], kw["target_fps"]) if kw["exp"] is None else kw["exp"]
+    exact_fps = kw["target_fps"] if kw["exact"] else None
+    key = rife_stage_key(base_key, exp, kw["rife_dir"], kw["uhd"], kw["scale"], kw["fb_avg"], kw["hold_threshold"],
+                         kw["intermediate"], exact_fps, kw["speed"], kw["mem_budget"], kw["batch"],
+                         kw["fade_threshold"])
+    path = _recorded(shot_dir, "rife", key)
+    if path is None:
+        with profiling.stage("rife_fbavg" if kw["fb_avg"] else "rife"):
+            path, _, key = rife_stage(
+                shot_dir, cache, base_key, base, exp, kw["rife_dir"], uhd=kw["uhd"], scale=kw["scale"],
+                fb_avg=kw["fb_avg"], threads=kw["threads"], batch=kw["batch"],
+                hold_threshold=kw["hold_threshold"], workers=kw["workers"], intermediate=kw["intermediate"],
+                exact_fps=exact_fps, speed=kw["speed"], mem_budget=kw["mem_budget"],
+                fade_threshold=kw["fade_threshold"], checkpoint=kw["checkpoint"])
+    return path, key
+
+def stage_final(shot_dir: Path, cache, kw: dict):
+    import profiling
+    from pipeline import final_stage, final_stage_key
+    rife, rife_key = stage_rife(shot_dir, cache, kw)
+    key = final_stage_key(rife_key, kw["target_fps"], kw["speed"], kw["exact"])
+    path = _recorded(shot_dir, "final", key)
+    if path is None:
+        with profiling.stage("finalize"):
+            path, key = final_stage(shot_dir, cache, rife_key, rife, kw["target_fps"], speed=kw["speed"],
+                                    exact=kw["exact"])
+    return path, key
+
+
+def run(args) -> int:
+    ws = Path.cwd()
+    if args.cmd == "generate":
+        from gen_jobs import run_gen
+        return run_gen(ws, args)
+
+    from pipeline import check_ffmpeg, ensure_dirs, open_cache, pipeline_kwargs
+    if args.cmd in SUBMITTABLE and args.submit:
+        from render_daemon import submit_from_args
+        if args.cmd == "pingpong":
+            from make_pingpong import pingpong_params
+            submit_from_args(args, ws, "pingpong", args.shot, pingpong_params(args, ws))
+        else:
+            if args.pingpong:
+                print("⚠️ --submit: --pingpong은 무시합니다 (pingpong 서브커맨드로 따로 제출하세요)")
+            submit_from_args(args, ws, "pipeline", args.shot, dict(kwargs=pipeline_kwargs(args, ws)))
+        return 0
+
+    shot_dir = ws / "project" / args.shot
+    check_ffmpeg()
+    ensure_dirs(shot_dir)
+    kw = pipeline_kwargs(args, ws)
+    if args.cmd == "watch":
+        from pipeline import watch_and_build
+        watch_and_build(ws, args.shot, incremental=not args.full_rebuild, **kw)
+        return 0
+
+    import profiling
+    prof = profiling.start(live=args.profile_live) if args.profile or args.profile_live else None
+    cache = open_cache(ws, kw["use_cache"], kw["cache_dir"], kw["cache_max_bytes"])
+    if args.cmd == "base":
+        out, _ = stage_base(shot_dir, cache, kw)
+    elif args.cmd == "interpolate":
+        out, _ = stage_rife(shot_dir, cache, kw)
+    elif args.cmd == "finalize":
+        out, _ = stage_final(shot_dir, cache, kw)
+    elif args.cmd == "pingpong":
+        from make_pingpong import build_pingpong, pingpong_params
+        out = build_pingpong(ws, args.shot, **pingpong_params(args, ws))
+    else:
+        from make_pingpong import run_pipeline
+        out = run_pipeline(args.shot, ws, kw)
+        if args.pingpong:
+            from make_pingpong import make_pingpong_from_video
+            dst = shot_dir / "out" / f"{args.shot}_pingpong_{int(args.pingpong)}s.mp4"
+            with profiling.stage("pingpong"):
+                make_pingpong_from_video(out, dst, fps=kw["target_fps"], duration_sec=args.pingpong)
+            out = dst
+    if prof is not None:
+        profiling.stop().write(out)
+    print(f"✅ {args.cmd}: {out}")
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    ap = argparse.ArgumentParser(prog="cli.py", description="RIFE 파이프라인 통합 CLI (단계별 서브커맨드)")
+    sub = ap.add_subparsers(dest="cmd", required=True, metavar="COMMAND")
+    parsers = {name: sub.add_parser(name, help=help_, description=help_) for name, help_ in COMMANDS.items()}
+    # 실제로 고른 서브커맨드의 옵션만 만든다 → 다른 서브커맨드의 모듈은 import하지 않음
+    cmd = next((a for a in argv if not a.startswith("-")), None)
+    if cmd in parsers:
+        add_command_args(cmd, parsers[cmd])
+    args = ap.parse_args(argv)
+    if args.cmd != "generate":
+        from pipeline import check_progressive_args
+        check_progressive_args(parsers[args.cmd], args, watch=args.cmd == "watch")
+    sys.exit(run(args))
+
+if __name__ == "__main__":
+    main()
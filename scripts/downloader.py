@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+생성 클립 공용 다운로더 (kling_runner / wan_runner / gen_jobs).
+
+- requests.Session 하나를 공유해 연결을 재사용(풀링)
+- 서버가 Range를 지원하고 파일이 크면 여러 구간을 병렬로 받음
+- 받는 중인 파일은 <out>.part, 진행 상황은 <out>.part.json 에 남김
+  → 연결이 끊기거나 중단돼도 다시 실행하면 받은 구간은 건너뛰고 이어 받음
+- 끝나면 크기와 ETag(처음 응답과 같은지)를 확인한 뒤에야 out 으로 rename
+"""
+import json, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MiB = 1024 * 1024
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+class Downloader:
+    def __init__(self, parallel: int = 4, chunk_size: int = 8 * MiB, min_parallel_size: int = 16 * MiB,
+                 retries: int = 5, timeout: float = 60.0, backoff: float = 1.0):
+        self.parallel = max(1, parallel)
+        self.chunk_size = chunk_size
+        self.min_parallel_size = min_parallel_size
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(8, self.parallel * 2))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # ---------------- 공개 API ----------------
+    def fetch(self, url: str, out_path: Path) -> Path:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        part = out_path.with_name(out_path.name + ".part")
+        meta_path = part.with_name(part.name + ".json")
+
+        size, etag, ranges = self._probe(url)
+        meta = self._load_meta(meta_path)
+        if meta.get("size") != size or meta.get("etag") != etag or not part.exists():
+            # 원격 파일이 바뀌었거나 처음 받는 경우 → 처음부터
+            part.unlink(missing_ok=True)
+            meta = {"size": size, "etag": etag, "done": []}
+
+        if ranges and size is not None and size >= self.min_parallel_size:
+            self._fetch_chunks(url, part, meta, meta_path)
+        else:
+            self._fetch_stream(url, part, meta, meta_path, ranges)
+
+        got = part.stat().st_size
+        if size is not None and got != size:
+            raise DownloadError(f"크기 불일치: {got} != {size} ({out_path.name})")
+        os.replace(part, out_path)
+        meta_path.unlink(missing_ok=True)
+        return out_path
+
+    # ---------------- 내부 ----------------
+    def _probe(self, url: str):
+        """(크기, ETag, Range 지원 여부). HEAD가 안 되면 bytes=0-0 GET으로 확인."""
+        size = etag = None
+        ranges = False
+        try:
+            r = self._retry(lambda: self.session.head(url, allow_redirects=True, timeout=self.timeout))
+            if r.ok:
+                size = int(r.headers["Content-Length"]) if "Content-Length" in r.headers else None
+                etag = r.headers.get("ETag")
+                ranges = r.headers.get("Accept-Ranges", "").lower() == "bytes"
+        except requests.RequestException:
+            pass
+        if size is None or not ranges:
+            r = self._retry(lambda: self.session.get(url, headers={"Range": "bytes=0-0"}, stream=True,
+                                                     timeout=self.timeout))
+            with r:
+                r.raise_for_status()
+                if r.status_code == 206 and "/" in r.headers.get("Content-Range", ""):
+                    total = r.headers["Content-Range"].rsplit("/", 1)[1]
+                    size = int(total) if total.isdigit() else size
+                    ranges = True
+                elif "Content-Length" in r.headers:
+                    size = int(r.headers["Content-Length"])
+                etag = etag or r.headers.get("ETag")
+        return size, etag, ranges
+
+    def _fetch_chunks(self, url: str, part: Path, meta: dict, meta_path: Path):
+        size = meta["size"]
+        if not part.exists() or part.stat().st_size != size:
+            with open(part, "ab") as f:
+                f.truncate(size)   # 미리 전체 크기로 잡아 두고 구간별로 제자리 기록
+        chunks = [(s, min(size, s + self.chunk_size) - 1) for s in range(0, size, self.chunk_size)]
+        done = set(meta["done"])
+        todo = [c for c in chunks if c[0] not in done]
+        if done:
+            print(f"   이어 받기: {len(done)}/{len(chunks)} 구간 완료됨")
+        lock = threading.Lock()
+
+        def get_chunk(c):
+            start, end = c
+            def once():
+                r = self.session.get(url, headers={"Range": f"bytes={start}-{end}"}, timeout=self.timeout)
+                r.raise_for_status()
+                self._check_etag(r, meta)
+                if r.status_code != 206 or len(r.content) != end - start + 1:
+                    raise DownloadError(f"구간 응답 이상: {start}-{end} ({r.status_code})")
+                return r.content
+            data = self._retry(once)
+            with lock:
+                with open(part, "r+b") as f:
+                    f.seek(start)
+                    f.write(data)
+                meta["done"].append(start)
+                self._save_meta(meta_path, meta)
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            list(pool.map(get_chunk, todo))
+
+    def _fetch_stream(self, url: str, part: Path, meta: dict, meta_path: Path, ranges: bool):
+        self._save_meta(meta_path, meta)
+        def once():
+            have = part.stat().st_size if part.exists() and ranges else 0
+            if meta["size"] is not None and have == meta["size"]:
+                return
+            headers = {"Range": f"bytes={have}-"} if have else {}
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+                r.raise_for_status()
+                self._check_etag(r, meta)
+                mode = "ab" if have and r.status_code == 206 else "wb"
+                with open(part, mode) as fo:
+                    for chunk in r.iter_content(chunk_size=MiB):
+                        if chunk:
+                            fo.write(chunk)
+            if meta["size"] is not None and part.stat().st_size < meta["size"]:
+                raise requests.ConnectionError("응답이 중간에 끊김")
+        self._retry(once)
+
+    def _check_etag(self, r: requests.Response, meta: dict):
+        etag = r.headers.get("ETag")
+        if meta.get("etag") and etag and etag != meta["etag"]:
+            raise DownloadError(f"받는 중 원격 파일이 바뀜 (ETag {meta['etag']} → {etag})")
+
+    def _retry(self, fn):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return fn()
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                if attempt == self.retries:
+                    raise
+            except requests.HTTPError as e:
+                code = e.response.status_code if e.response is not None else 0
+                if code != 429 and code < 500 or attempt == self.retries:
+                    raise
+            time.sleep(delay)
+            delay = min(30.0, delay * 2)
+
+    @staticmethod
+    def _load_meta(path: Path) -> dict:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_meta(path: Path, meta: dict):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+_shared: Optional[Downloader] = None
+_shared_lock = threading.Lock()
+
+def get_downloader() -> Downloader:
+    """프로세스 공용 다운로더 (세션/연결 풀 공유)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Downloader()
+        return _shared
+
+def download(url: str, out_path: Path) -> Path:
+    return get_downloader().fetch(url, out_path)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+디코드한 프레임을 디스크의 memmap 배열로 한 번만 만들어 두고 여러 단계가 나눠 읽는 저장소.
+
+  work/frames/<원본 이름>-<내용 해시 12자>/
+      frames.rgb    (N, H, W, 3) uint8 연속 배열
+      index.json    {count, height, width, fps, pts, source}
+
+- 같은 파일(내용 해시 기준)은 프로세스/단계가 달라도 다시 디코드하지 않는다.
+- frames()/slice()는 memmap 뷰를 돌려주므로 복사가 없고, 상주 메모리는 OS 페이지 캐시가
+  알아서 관리한다 → 클립 길이와 무관하게 RSS가 일정.
+- 역방향 읽기(reverse=True)도 추가 디코드 없이 인덱스만 거꾸로 돈다.
+"""
+import json, os, shutil, subprocess
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from stage_cache import file_digest
+
+STORE_DIR = "frames"
+DATA_NAME = "frames.rgb"
+INDEX_NAME = "index.json"
+
+
+def _packet_pts(src: Path) -> List[float]:
+    """디먹스만으로(디코드 없이) 비디오 패킷 pts를 표시 순서로."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time",
+         "-of", "csv=p=0", str(src)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    pts = []
+    for line in out.splitlines():
+        try:
+            pts.append(float(line.strip().rstrip(",")))
+        except ValueError:
+            pass
+    return sorted(pts)
+
+
+class FrameStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        index = json.loads((self.root / INDEX_NAME).read_text(encoding="utf-8"))
+        self.count: int = index["count"]
+        self.height: int = index["height"]
+        self.width: int = index["width"]
+        self.fps: float = index["fps"]
+        self.pts: List[float] = index["pts"]
+        self.source: dict = index["source"]
+        shape = (self.count, self.height, self.width, 3)
+        self.array = (np.memmap(self.root / DATA_NAME, dtype=np.uint8, mode="r", shape=shape)
+                      if self.count else np.zeros(shape, np.uint8))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def slice(self, start: int = 0, stop: Optional[int] = None, reverse: bool = False) -> np.ndarray:
+        """[start, stop) 프레임 뷰 (복사 없음). reverse면 뒤에서부터."""
+        view = self.array[start:stop]
+        return view[::-1] if reverse else view
+
+    def frames(self, start: int = 0, stop: Optional[int] = None, reverse: bool = False) -> Iterator[np.ndarray]:
+        """프레임을 하나씩 (H, W, 3) 뷰로. FrameReader 대신 엔진/FrameWriter에 바로 넘길 수 있다."""
+        stop = self.count if stop is None else min(stop, self.count)
+        idx = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+        for i in idx:
+            yield self.array[i]
+
+    # ---------------- 생성 ----------------
+    @classmethod
+    def build(cls, src: Path, root: Path) -> "FrameStore":
+        """src를 한 번 디코드해 root에 저장. 중간에 실패하면 아무것도 남기지 않는다."""
+        from frameio import FrameReader, passthrough_args, probe_video
+
+        src, root = Path(src), Path(root)
+        info = probe_video(src)
+        tmp = root.with_name(root.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        count = 0
+        try:
+            reader = FrameReader(["-i", str(src)], info.width, info.height,
+                                 out_args=passthrough_args())
+            with reader, open(tmp / DATA_NAME, "wb") as f:
+                for frame in reader:
+                    f.write(frame.tobytes())
+                    count += 1
+            pts = _packet_pts(src)
+            if len(pts) != count:   # 패킷과 디코드 프레임 수가 다르면 고정 fps로 가정
+                pts = [i / (info.fps or 1) for i in range(count)]
+            st = src.stat()
+            index = {"count": count, "height": info.height, "width": info.width, "fps": info.fps,
+                     "pts": [round(p, 6) for p in pts],
+                     "source": {"path": str(src), "size": st.st_size, "digest": file_digest(src)}}
+            (tmp / INDEX_NAME).write_text(json.dumps(index), encoding="utf-8")
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        shutil.rmtree(root, ignore_errors=True)
+        os.replace(tmp, root)
+        print(f"   프레임 저장소: {count} 프레임 {info.width}x{info.height} → {root}")
+        return cls(root)
+
+
+def store_path(src: Path, store_root: Optional[Path] = None) -> Path:
+    src = Path(src).resolve()
+    if store_root is None:
+        # out/의 최종본은 샷의 work/frames에 (out/에는 결과물만 둔다)
+        work = src.parent.parent / "work"
+        store_root = work / STORE_DIR if src.parent.name == "out" and work.is_dir() else src.parent / STORE_DIR
+    base = Path(store_root)
+    return base / f"{src.stem}-{file_digest(src)[:12]}"
+
+def open_store(src: Path, store_root: Optional[Path] = None) -> FrameStore:
+    """
+    src의 프레임 저장소를 연다. 없으면 한 번 디코드해 만든다.
+    같은 이름의 예전 저장소(내용이 바뀐 이전 버전)는 지운다.
+    """
+    src = Path(src)
+    root = store_path(src, store_root)
+    if (root / INDEX_NAME).exists():
+        return FrameStore(root)
+    for old in root.parent.glob(f"{src.stem}-*"):
+        if old.is_dir() and old != root:
+            shutil.rmtree(old, ignore_errors=True)
+    return FrameStore.build(src, root)
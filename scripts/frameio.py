@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ffmpeg 파이프 기반 raw 프레임 입출력.
+
+FrameReader: ffmpeg 디코드 → rawvideo(rgb24) stdout → numpy (H, W, 3) uint8
+FrameWriter: numpy 프레임 → rawvideo stdin → ffmpeg 인코드
+중간 파일 없이 스테이지끼리 프레임을 넘길 때 사용한다.
+"""
+import functools, json, re, subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+import profiling
+
+
+@dataclass
+class VideoInfo:
+    width: int
+    height: int
+    fps: float
+    nb_frames: Optional[int]
+
+
+def _ratio(text: str) -> float:
+    num, _, den = (text or "0/1").partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+@functools.lru_cache(maxsize=None)
+def passthrough_args() -> tuple:
+    """
+    디코드 프레임을 복제/버림 없이 그대로 내보내는 출력 옵션.
+    -fps_mode는 FFmpeg 5.1+ 에만 있어서 그 전 버전(Ubuntu 22.04의 4.4 등)은 -vsync를 쓴다.
+    버전은 프로세스당 한 번만 확인하고, 알 수 없는 빌드(git 스냅샷 등)는 최신으로 본다.
+    """
+    try:
+        out = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout
+    except OSError:
+        out = ""
+    m = re.search(r"ffmpeg version n?(\d+)\.(\d+)", out)
+    if m and (int(m.group(1)), int(m.group(2))) < (5, 1):
+        return ("-vsync", "passthrough")
+    return ("-fps_mode", "passthrough")
+
+def probe_video(path: Path) -> VideoInfo:
+    """ffprobe로 첫 비디오 스트림의 크기/fps/프레임 수 조회 (이미지도 가능)."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height,r_frame_rate,avg_frame_rate,nb_frames",
+         "-of", "json", str(path)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    st = json.loads(out)["streams"][0]
+    fps = _ratio(st.get("avg_frame_rate")) or _ratio(st.get("r_frame_rate"))
+    nb = st.get("nb_frames")
+    return VideoInfo(int(st["width"]), int(st["height"]), fps,
+                     int(nb) if nb and str(nb).isdigit() else None)
+
+
+class FrameReader:
+    """
+    input_args 예: ["-i", "clip.mp4"] 또는 ["-f", "concat", "-safe", "0", "-i", "scene.txt"]
+    vf/rate는 디코드 쪽 필터/출력 fps. width/height는 필터 적용 후 크기여야 한다.
+    """
+
+    def __init__(self, input_args: Sequence[str], width: int, height: int,
+                 vf: Optional[str] = None, rate: Optional[float] = None,
+                 max_frames: Optional[int] = None, out_args: Optional[Sequence[str]] = None):
+        self.width, self.height = int(width), int(height)
+        self.frame_bytes = self.width * self.height * 3
+        cmd: List[str] = ["ffmpeg", "-v", "error", "-nostdin", *map(str, input_args)]
+        if vf:
+            cmd += ["-vf", vf]
+        if rate:
+            cmd += ["-r", str(rate)]
+        if max_frames is not None:
+            cmd += ["-frames:v", str(int(max_frames))]
+        cmd += [*(out_args or []), "-an", "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+        self.cmd = cmd
+        self.proc: Optional[subprocess.Popen] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        print(f"[cmd] {' '.join(self.cmd)}")
+        self.proc = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, bufsize=self.frame_bytes)
+        try:
+            while True:
+                buf = self.proc.stdout.read(self.frame_bytes)
+                if len(buf) < self.frame_bytes:
+                    break
+                yield np.frombuffer(buf, np.uint8).reshape(self.height, self.width, 3)
+            rc = self.proc.wait()
+            if rc != 0:
+                raise subprocess.CalledProcessError(rc, self.cmd)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self.proc.stdout.close()
+            self.proc.wait()
+            self.proc = None
+
+
+class FrameWriter:
+    """rgb24 프레임을 stdin으로 받아 out_path로 인코드. 기본은 libx264/yuv420p, 무음."""
+
+    def __init__(self, out_path: Path, width: int, height: int, fps: float,
+                 vf: Optional[str] = None, codec_args: Optional[Sequence[str]] = None,
+                 out_args: Optional[Sequence[str]] = None, track: bool = True):
+        self.out_path = Path(out_path)
+        self.track = track   # False: 같은 프레임을 한 번 더 쓰는 보조 출력 → 프로파일 프레임 수에 안 셈
+        self.width, self.height = int(width), int(height)
+        if codec_args is None:
+            codec_args = ["-c:v", "libx264", "-crf", "17", "-preset", "slow", "-pix_fmt", "yuv420p"]
+        cmd: List[str] = [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{self.width}x{self.height}", "-r", str(fps),
+            "-i", "pipe:0",
+        ]
+        if vf:
+            cmd += ["-vf", vf]
+        cmd += [*codec_args, *(out_args or []), "-an", str(self.out_path)]
+        self.cmd = cmd
+        self.count = 0
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"[cmd] {' '.join(self.cmd)}")
+        self.proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def write(self, frame: np.ndarray):
+        self.proc.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        self.count += 1
+        if self.track:
+            profiling.add_frames(1)
+
+    def close(self) -> Path:
+        self.proc.stdin.close()
+        rc = self.proc.wait()
+        if rc != 0:
+            raise subprocess.CalledProcessError(rc, self.cmd)
+        return self.out_path
+
+    def abort(self):
+        """실패 시: 인코더를 죽이고 미완성 파일 삭제."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.kill()
+        self.proc.wait()
+        self.out_path.unlink(missing_ok=True)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kling / WAN 이미지→비디오 생성을 여러 샷에 대해 동시에 돌리는 작업 관리자 (asyncio).
+
+- Replicate HTTP API로 예측(prediction)을 최대 --concurrency 개까지 동시에 제출
+- 각 예측을 지수 백오프로 폴링하고, 끝나는 대로 바로 다운로드
+- 작업 상태를 JSON(기본 project/gen_jobs.json)에 저장 → 중단 후 다시 실행하면
+  이미 끝난 예측은 다시 제출하지 않고, 진행 중이던 예측은 이어서 폴링
+- --api-base(또는 REPLICATE_API_BASE)로 로컬 대역 서버를 가리킬 수 있음 (테스트용)
+
+  python scripts/gen_jobs.py --engine kling --shots "shot_*" --prompt "..." --concurrency 8
+"""
+import argparse, asyncio, base64, json, mimetypes, os, random, sys, time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from stage_cache import stage_key, file_digest
+
+DEFAULT_API_BASE = "https://api.replicate.com/v1"
+DONE = {"succeeded", "failed", "canceled"}
+IMAGE_FIELDS = {"kling": "start_image", "wan": "image"}   # 예측 input에서 이미지가 들어가는 자리
+EXPIRED = {403, 404, 410}   # 결과 URL이 만료됨 → 다시 생성해야 함
+
+
+class CreditError(RuntimeError):
+    pass
+
+
+@dataclass
+class GenJob:
+    key: str
+    shot: str
+    engine: str
+    model: str
+    image: str
+    input: dict                    # 이미지를 뺀 예측 input (data URI는 제출 직전에 만든다)
+    out: str
+    status: str = "pending"        # pending → submitted → succeeded → downloaded / failed
+                                   # (succeeded + error: 생성은 끝났고 다운로드만 실패 → 다시 받기만)
+    prediction_id: Optional[str] = None
+    output_url: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    updated: float = field(default_factory=time.time)
+
+
+class JobStore:
+    """작업 상태 JSON. 상태가 바뀔 때마다 통째로 원자적으로 다시 쓴다."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.jobs: Dict[str, GenJob] = {}
+        if self.path.exists():
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            self.jobs = {k: GenJob(**v) for k, v in raw.get("jobs", {}).items()}
+            for job in self.jobs.values():   # 예전 상태 파일: input에 base64 이미지가 들어 있음
+                job.input.pop(IMAGE_FIELDS.get(job.engine, ""), None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        data = {"jobs": {k: asdict(j) for k, j in self.jobs.items()}}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def update(self, job: GenJob, **changes):
+        for k, v in changes.items():
+            setattr(job, k, v)
+        job.updated = time.time()
+        self.save()
+
+    def merge(self, jobs: List[GenJob]) -> List[GenJob]:
+        """새 작업 목록과 저장된 상태를 합침. 키(입력 해시)가 같으면 저장된 진행 상태 유지."""
+        merged = []
+        for job in jobs:
+            merged.append(self.jobs.setdefault(job.key, job))
+        self.save()
+        return merged
+
+
+class ReplicateAPI:
+    """Replicate predictions API의 최소 부분 (동기 requests, 세션 재사용)."""
+
+    def __init__(self, base_url: str = DEFAULT_API_BASE, token: Optional[str] = None, timeout: float = 60.0):
+        self.base = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        token = token or os.environ.get("REPLICATE_API_TOKEN")
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.session.headers["Content-Type"] = "application/json"
+
+    def create(self, model: str, inp: dict) -> dict:
+        if ":" in model:   # owner/name:version
+            url, body = f"{self.base}/predictions", {"version": model.split(":", 1)[1], "input": inp}
+        else:
+            url, body = f"{self.base}/models/{model}/predictions", {"input": inp}
+        return self._request("POST", url, json=body)
+
+    def get(self, prediction_id: str) -> dict:
+        return self._request("GET", f"{self.base}/predictions/{prediction_id}")
+
+    def _request(self, method: str, url: str, **kwargs) -> dict:
+        r = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        if r.status_code == 402:
+            raise CreditError("Replicate 크레딧 부족 (402)")
+        r.raise_for_status()
+        return r.json()
+
+
+def image_data_uri(path: Path) -> str:
+    mime = mimetypes.guess_type(str(path))[0] or "image/png"
+    return f"data:{mime};base64," + base64.b64encode(Path(path).read_bytes()).decode("ascii")
+
+def prediction_output(pred: dict) -> Optional[str]:
+    out = pred.get("output")
+    if isinstance(out, list):
+        out = out[0] if out else None
+    return out
+
+
+def not_sent(e: Exception) -> bool:
+    """요청이 서버에 전달되기 전에 실패했는가 (연결 타임아웃/연결 거부)."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class JobManager:
+    def __init__(self, api: ReplicateAPI, store: JobStore, concurrency: int = 4, download_slots: int = 4,
+                 poll_initial: float = 2.0, poll_max: float = 20.0, max_retries: int = 5):
+        self.api = api
+        self.store = store
+        self.sem = asyncio.Semaphore(max(1, concurrency))
+        self.dl_sem = asyncio.Semaphore(max(1, download_slots))
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.max_retries = max_retries
+
+    async def run(self, jobs: List[GenJob]) -> List[GenJob]:
+        await asyncio.gather(*(self._run_job(j) for j in jobs))
+        return jobs
+
+    async def _run_job(self, job: GenJob):
+        try:
+            if job.status == "downloaded" and Path(job.out).exists():
+                print(f"   ✔ {job.shot}: 이미 완료 ({Path(job.out).name})")
+                return
+            if job.status not in ("succeeded", "downloaded") or not job.output_url:
+                async with self.sem:
+                    await self._predict(job)
+            elif job.error:
+                print(f"   ↻ {job.shot}: 생성은 완료됨 → 다운로드만 다시 시도")
+            async with self.dl_sem:
+                try:
+                    await self._download(job)
+                except Exception as e:
+                    code = getattr(getattr(e, "response", None), "status_code", 0)
+                    if isinstance(e, requests.HTTPError) and code in EXPIRED:
+                        # 결과 URL 만료: 다음 실행에서 다시 생성
+                        self.store.update(job, status="failed", output_url=None, error=f"결과 URL 만료 ({code})")
+                    else:
+                        # 생성은 끝났으므로 succeeded 유지 → 다음 실행은 (유료) 재생성 없이 다운로드만
+                        self.store.update(job, error=f"다운로드 실패: {type(e).__name__}: {e}")
+                    print(f"   ✖ {job.shot}: {job.error}", file=sys.stderr)
+        except CreditError as e:
+            self.store.update(job, status="failed", error=str(e))
+            print(f"   ✖ {job.shot}: {e}", file=sys.stderr)
+        except Exception as e:   # 한 샷의 실패가 다른 샷을 멈추지 않도록
+            self.store.update(job, status="failed", error=f"{type(e).__name__}: {e}")
+            print(f"   ✖ {job.shot}: {job.error}", file=sys.stderr)
+
+    async def _call(self, fn, *args, idempotent: bool = True):
+        """일시적 오류(연결 끊김, 429, 5xx)는 백오프 후 재시도.
+        idempotent=False(예측 생성)면 요청이 서버에 닿지 않은 게 확실한 경우(429, 연결 실패)만 재시도한다.
+        응답 타임아웃/5xx 뒤에 다시 보내면 유료 예측이 중복으로 만들어질 수 있다."""
+        delay = self.poll_initial
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(fn, *args)
+            except requests.HTTPError as e:
+                code = e.response.status_code if e.response is not None else 0
+                if (code != 429 and (code < 500 or not idempotent)) or attempt == self.max_retries:
+                    raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if (not idempotent and not not_sent(e)) or attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(self.poll_max, delay * 2)
+
+    async def _predict(self, job: GenJob):
+        if job.prediction_id is None or job.status == "failed":
+            inp = {**job.input, IMAGE_FIELDS[job.engine]: image_data_uri(Path(job.image))}
+            try:
+                pred = await self._call(self.api.create, job.model, inp, idempotent=False)
+            except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as e:
+                code = getattr(getattr(e, "response", None), "status_code", 0)
+                if code == 429 or not_sent(e) or 0 < code < 500:
+                    raise
+                # 제출은 됐을 수도 있음 → 자동으로 다시 만들지 않고 실패로 남긴다
+                raise RuntimeError(f"제출 응답을 받지 못함 ({type(e).__name__}: {e}). 예측이 만들어졌는지 "
+                                   f"Replicate 대시보드에서 확인한 뒤 다시 실행하세요") from e
+            self.store.update(job, status="submitted", prediction_id=pred["id"], output_url=None, error=None,
+                              attempts=job.attempts + 1)
+            print(f"   ▶ {job.shot}: 제출 {pred['id']}")
+        else:
+            print(f"   ↻ {job.shot}: 진행 중인 예측 {job.prediction_id} 이어서 폴링")
+            pred = {"status": "starting"}
+
+        delay = self.poll_initial
+        while pred.get("status") not in DONE:
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(self.poll_max, delay * 1.5)
+            pred = await self._call(self.api.get, job.prediction_id)
+
+        if pred["status"] != "succeeded":
+            raise RuntimeError(f"예측 {pred['status']}: {pred.get('error')}")
+        url = prediction_output(pred)
+        if not url:
+            raise RuntimeError("예측 결과에 output URL이 없습니다")
+        self.store.update(job, status="succeeded", output_url=url)
+        print(f"   ✔ {job.shot}: 생성 완료")
+
+    async def _download(self, job: GenJob):
+        from downloader import get_downloader
+        out = Path(job.out)
+        # .part 이어 받기/재시도/크기·ETag 확인은 공용 다운로더가 처리
+        await asyncio.to_thread(get_downloader().fetch, job.output_url, out)
+        self.store.update(job, status="downloaded", error=None)
+        print(f"   ⬇ {job.shot}: {out}")
+
+
+def first_keyframe(shot_dir: Path) -> Optional[Path]:
+    key_dir = shot_dir / "keyframes"
+    cands = sorted(p for ext in ("png", "jpg", "jpeg") for p in key_dir.glob(f"*.{ext}"))
+    return cands[0] if cands else None
+
+def build_jobs(ws: Path, shots: List[str], engine: str, args) -> List[GenJob]:
+    """샷마다 첫 키프레임 + 프롬프트(timing/prompt.txt 우선, 없으면 --prompt)로 작업 생성."""
+    from kling_runner import kling_input, kling_model
+    from wan_runner import wan_input, MODEL_REF
+
+    jobs = []
+    for shot in shots:
+        shot_dir = ws / "project" / shot
+        image = first_keyframe(shot_dir)
+        if image is None:
+            print(f"⚠️ {shot}: keyframes/에 이미지가 없어 건너뜀")
+            continue
+        prompt_txt = shot_dir / "timing" / "prompt.txt"
+        prompt = prompt_txt.read_text(encoding="utf-8").strip() if prompt_txt.exists() else args.prompt
+        if engine == "kling":
+            model = kling_model()
+            inp = kling_input(None, prompt, duration=args.duration, aspect_ratio=args.aspect,
+                              negative_prompt=args.negative)
+            out = shot_dir / "work" / f"kling_{int(args.duration)}s.mp4"
+        else:
+            model = MODEL_REF
+            inp = wan_input(None, prompt, num_frames=args.num_frames, resolution=args.resolution)
+            out = shot_dir / "work" / "wan_out.mp4"
+        # 상태 파일에는 이미지 경로만 남기고 input에서는 뺀다 (data URI는 _predict에서 만든다)
+        params = {k: v for k, v in inp.items() if k != IMAGE_FIELDS[engine]}
+        key = stage_key("gen", shot, engine, model, file_digest(image), params)[:20]
+        jobs.append(GenJob(key=key, shot=shot, engine=engine, model=model, image=str(image),
+                           input=params, out=str(out)))
+    return jobs
+
+def add_gen_args(p: argparse.ArgumentParser):
+    p.add_argument("--engine", choices=["kling", "wan"], default="kling")
+    p.add_argument("--shots", default="shot_*", help="샷 폴더 glob 패턴")
+    p.add_argument("--prompt", default="", help="샷에 timing/prompt.txt가 없을 때 쓸 프롬프트")
+    p.add_argument("--negative", default="")
+    p.add_argument("--duration", type=int, default=5, help="Kling 길이(초)")
+    p.add_argument("--aspect", default="16:9")
+    p.add_argument("--num-frames", type=int, default=121, help="WAN 프레임 수")
+    p.add_argument("--resolution", default="720p", choices=["480p", "720p"])
+    p.add_argument("--concurrency", type=int, default=4, help="동시에 진행할 예측 수")
+    p.add_argument("--download-slots", type=int, default=4, help="동시 다운로드 수")
+    p.add_argument("--poll-initial", type=float, default=2.0, help="첫 폴링 간격(초)")
+    p.add_argument("--poll-max", type=float, default=20.0, help="최대 폴링 간격(초)")
+    p.add_argument("--state", default="project/gen_jobs.json", help="작업 상태 파일")
+    p.add_argument("--api-base", default=os.environ.get("REPLICATE_API_BASE", DEFAULT_API_BASE))
+
+def run_gen(ws: Path, args) -> int:
+    """add_gen_args로 파싱한 값으로 생성 작업을 실행. 실패한 작업이 있으면 1."""
+    shots = sorted(d.name for d in (ws / "project").glob(args.shots) if d.is_dir())
+    store = JobStore(ws / args.state)
+    jobs = store.merge(build_jobs(ws, shots, args.engine, args))
+    if not jobs:
+        print("ERROR: 생성할 샷이 없습니다.", file=sys.stderr)
+        return 2
+
+    pending = sum(j.status != "downloaded" for j in jobs)
+    print(f"== {args.engine} 생성: 샷 {len(jobs)}개 (남은 작업 {pending}), 동시 {args.concurrency} ==")
+    t0 = time.time()
+    manager = JobManager(ReplicateAPI(args.api_base), store, concurrency=args.concurrency,
+                         download_slots=args.download_slots,
+                         poll_initial=args.poll_initial, poll_max=args.poll_max)
+    asyncio.run(manager.run(jobs))
+
+    failed = [j for j in jobs if j.status != "downloaded"]
+    print(f"\n{time.time() - t0:.1f}s, 완료 {len(jobs) - len(failed)} / 실패 {len(failed)}")
+    for j in failed:
+        print(f"   {j.shot}: {j.error}")
+    return 1 if failed else 0
+
+def main():
+    p = argparse.ArgumentParser(description="Kling/WAN 생성 작업을 여러 샷에 대해 동시 실행")
+    add_gen_args(p)
+    sys.exit(run_gen(Path.cwd(), p.parse_args()))
+
+if __name__ == "__main__":
+    main()
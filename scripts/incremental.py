@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+키프레임 구간 단위 증분 렌더 (watch 모드용).
+
+베이스 프레임을 키프레임 구간(segment)으로 나누고, 구간마다
+  (이 키프레임 해시, 다음 키프레임 해시, 시작 프레임, 길이, 렌더 옵션)
+으로 키를 만든다. 키가 같은 구간은 이전에 인코드해 둔 work/segments/seg_<key>.mp4를
+그대로 쓰고, 바뀐 구간만 다시 보간·인코드한 뒤 concat(-c copy)으로 이어 붙인다.
+키프레임 하나를 고치면 그 키프레임으로 들어가고 나오는 두 구간만 다시 렌더된다.
+
+구간 k 는 베이스 프레임 [start_k, start_{k+1}] (끝 프레임 1장 겹침)을 보간하고,
+마지막 구간이 아니면 겹친 끝 프레임은 버린다. RIFE는 인접 프레임 쌍만 보므로
+이어 붙인 결과는 전체를 한 번에 보간한 것과 같다.
+
+증분은 RIFE 보간·구간 인코드만이다. 베이스는 수정할 때마다 (스테이지 캐시에 없으면) 전체를
+다시 인코드하고, 구간 경계를 찾으려고 전체를 한 번 디코드한다.
+구간 키에는 베이스 픽셀을 바꾸는 --intermediate 포맷도 들어간다.
+(--exact-fps는 전체 렌더로 대신하므로 구간 키와 무관)
+"""
+from fractions import Fraction
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from pipeline import (run, ensure_dirs, compute_exp, open_cache, base_stage, build_pipeline, final_key,
+                      tiling_key, adaptive_key, DEFAULT_MAX_BYTES)
+from intermediate import DEFAULT_FORMAT
+from stage_cache import stage_key, file_digest, model_digest, record_artifact
+from timeline import parse_scene
+
+SEG_DIR = "segments"
+
+def keyframe_runs(entries) -> List[Tuple[Path, str]]:
+    """scene.txt 항목 → (키프레임 경로, 내용 해시) 목록. 연속으로 같은 이미지는 하나로 합침."""
+    runs: List[Tuple[Path, str]] = []
+    for e in entries:
+        digest = file_digest(e.path) if e.path.exists() else "missing"
+        if runs and runs[-1][1] == digest:
+            continue
+        runs.append((e.path, digest))
+    return runs
+
+def detect_frame_runs(frames, threshold: float) -> Tuple[List[int], int]:
+    """베이스 프레임에서 내용이 바뀌는 지점(구간 시작 인덱스)과 전체 프레임 수."""
+    from rife_engine import is_hold
+    starts, prev, n = [], None, 0
+    for i, frame in enumerate(frames):
+        if prev is None or not is_hold(prev, frame, threshold):
+            starts.append(i)
+        prev, n = frame, i + 1
+    return starts, n
+
+def output_range(g0: int, g1: int, ratio: Fraction, total: int) -> range:
+    """
+    보간 프레임 [g0, g1) 에 대응하는 최종 출력 프레임 번호.
+    출력 j 는 보간 프레임 round(j * ratio) 를 쓴다 (ffmpeg fps 필터의 가장 가까운 프레임 선택).
+    """
+    def first_j(g):   # round(j*ratio) >= g 인 최소 j
+        x = (Fraction(g) - Fraction(1, 2)) / ratio
+        return max(0, -((-x.numerator) // x.denominator))
+    return range(first_j(g0), min(first_j(g1), first_j(total)))
+
+def incremental_build(
+    root: Path,
+    shot: str,
+    base_fps: int,
+    target_fps: int,
+    width: int,
+    height: int,
+    rife_dir: Path,
+    exp: Optional[int] = None,
+    uhd: bool = False,
+    scale: float = 1.0,
+    speed: float = 1.0,
+    fit: str = "auto",
+    fb_avg: bool = False,
+    threads: int = 0,
+    batch: int = 4,
+    hold_threshold: Optional[float] = None,
+    intermediate: str = DEFAULT_FORMAT,
+    exact: bool = False,
+    mem_budget: Optional[int] = None,
+    fade_threshold: Optional[float] = None,
+    use_cache: bool = True,
+    cache_dir: Optional[Path] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    crf: int = 17,
+    preset: str = "slow",
+    **kwargs
+) -> Path:
+    """바뀐 키프레임 구간만 다시 렌더해 out/final_*fps.mp4 를 갱신."""
+    from frameio import FrameReader, probe_video
+    from rife_engine import get_engine, write_decisions
+
+    shot_dir = root / "project" / shot
+    ensure_dirs(shot_dir)
+    work = shot_dir / "work"
+    seg_dir = work / SEG_DIR
+    seg_dir.mkdir(parents=True, exist_ok=True)
+    full_kwargs = dict(base_fps=base_fps, target_fps=target_fps, width=width, height=height,
+                       rife_dir=rife_dir, exp=exp, uhd=uhd, scale=scale, speed=speed, fit=fit,
+                       fb_avg=fb_avg, threads=threads, batch=batch, hold_threshold=hold_threshold,
+                       intermediate=intermediate, exact=exact, mem_budget=mem_budget,
+                       fade_threshold=fade_threshold,
+                       use_cache=use_cache, cache_dir=cache_dir,
+                       cache_max_bytes=cache_max_bytes)
+    if exact:
+        # 구간 출력 프레임 배치가 2^exp 격자를 전제로 하므로 --exact-fps는 전체 렌더로
+        print("   (--exact-fps: 증분 렌더 대신 전체 파이프라인)")
+        return build_pipeline(root, shot, **full_kwargs)
+
+    cache = open_cache(root, use_cache, cache_dir, cache_max_bytes)
+    exp_val = compute_exp(base_fps, target_fps) if exp is None else int(exp)
+    m = 2 ** exp_val
+
+    print("== 증분 1) 베이스 비디오 ==")
+    base_video, _ = base_stage(shot_dir, cache, base_fps, width, height, fit=fit,
+                               intermediate=intermediate)
+    info = probe_video(base_video)
+
+    # 베이스 프레임의 내용 변화 지점 ↔ scene.txt 키프레임 순서를 맞춘다
+    runs = keyframe_runs(parse_scene(shot_dir / "timing" / "scene.txt"))
+    with FrameReader(["-i", str(base_video)], info.width, info.height) as reader:
+        starts, n_base = detect_frame_runs(reader, hold_threshold if hold_threshold is not None else 1.0)
+    if len(starts) != len(runs) or n_base < 2:
+        print(f"⚠️ 구간 매칭 실패(키프레임 {len(runs)}개, 감지 구간 {len(starts)}개) → 전체 렌더")
+        return build_pipeline(root, shot, **full_kwargs)
+
+    out_fps = base_fps * m
+    ratio = Fraction(out_fps) / (Fraction(target_fps) * Fraction(speed).limit_denominator(1000))
+    n_interp = (n_base - 1) * m + 1
+    params = (base_fps, width, height, fit, intermediate, exp_val, uhd, scale, fb_avg, hold_threshold,
+              model_digest(rife_dir), target_fps, speed, crf, preset, *tiling_key(mem_budget, batch),
+              *adaptive_key(fade_threshold))
+
+    segs = []   # (시작 베이스 프레임, 끝 베이스 프레임(포함), 파일)
+    for k, s0 in enumerate(starts):
+        last = k == len(starts) - 1
+        s1 = n_base - 1 if last else starts[k + 1]
+        key = stage_key("segment", runs[k][1], None if last else runs[k + 1][1], s0, s1, last, params)
+        segs.append((s0, s1, last, seg_dir / f"seg_{key[:20]}.mp4"))
+    dirty = [s for s in segs if not s[3].exists()]
+    print(f"== 증분 2) 다시 렌더할 구간 {len(dirty)}/{len(segs)} ==")
+
+    if dirty:
+        engine = get_engine(rife_dir, uhd=uhd, scale=scale, threads=threads, batch=batch,
+                            hold_threshold=hold_threshold, mem_budget=mem_budget,
+                            fade_threshold=fade_threshold)
+        frames_of = engine.stream_fb_avg if fb_avg else engine.stream
+        codec = ["-c:v", "libx264", "-crf", str(crf), "-preset", preset, "-pix_fmt", "yuv420p"]
+        bufs = {path: [] for _, _, _, path in dirty}
+        end = max(s1 for _, s1, _, _ in dirty)
+        with FrameReader(["-i", str(base_video)], info.width, info.height) as reader:
+            for i, frame in enumerate(reader):
+                for s0, s1, last, path in dirty:
+                    if s0 <= i <= s1:
+                        bufs[path].append(frame)
+                    if i == s1:
+                        engine.gap_offset = s0
+                        _render_segment(frames_of(bufs.pop(path), exp_val), s0 * m, (s1 - s0) * m + last,
+                                        ratio, n_interp, path, info.width, info.height, target_fps, codec)
+                        print(f"   구간 {s0}-{s1} → {path.name}")
+                if i >= end:
+                    break
+        if fade_threshold is not None:
+            # 다시 렌더한 구간의 간격만 기록된다
+            write_decisions(work / "logs" / "adaptive_gaps.json", engine.decisions, fade_threshold,
+                            hold_threshold)
+
+    print("== 증분 3) 구간 이어 붙이기 (stream copy) ==")
+    out_path = shot_dir / "out" / f"final_{target_fps}fps.mp4"
+    concat_txt = seg_dir / "concat.txt"
+    live = [s[3] for s in segs if s[3].exists() and s[3].stat().st_size > 0]
+    concat_txt.write_text("".join(f"file '{p.name}'\n" for p in live), encoding="utf-8")
+    run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", str(concat_txt),
+         "-c", "copy", "-an", str(out_path)], check=True)
+    # 더 이상 쓰지 않는 구간 파일 정리
+    keep = {s[3].name for s in segs}
+    for old in seg_dir.glob("seg_*.mp4"):
+        if old.name not in keep:
+            old.unlink(missing_ok=True)
+    # build_pipeline과 같은 키로 남겨야 up_to_date_final(핑퐁 등)이 이 최종본을 재사용한다
+    record_artifact(work, "final", out_path, fps=target_fps, key=final_key(shot_dir, **full_kwargs))
+    print(f"   -> {out_path}")
+    print("✅ 완료!")
+    return out_path
+
+def _render_segment(frames, g_start: int, n_mids: int, ratio: Fraction, n_interp: int,
+                    path: Path, width: int, height: int, fps: int, codec):
+    """
+    구간 보간 결과를 받는 대로 최종 fps로 골라 인코드 (보간 프레임을 모아 두지 않는다).
+    n_mids 는 이 구간 몫의 보간 프레임 수 — 마지막 구간이 아니면 다음 구간과 겹치는 끝 프레임은 뺀 수.
+    출력 프레임이 하나도 없으면 빈 파일 대신 0바이트 표식만 남긴다.
+    """
+    from frameio import FrameWriter
+    picks = iter(output_range(g_start, g_start + n_mids, ratio, n_interp))
+    j = next(picks, None)
+    if j is None:
+        path.write_bytes(b"")
+        return
+    tmp = path.with_name(f".{path.name}.tmp.mp4")
+    prev = None
+    with FrameWriter(tmp, width, height, fps, codec_args=codec) as writer:
+        for g, frame in enumerate(frames, g_start):
+            if g >= g_start + n_mids:
+                continue   # 다음 구간의 첫 프레임과 겹침
+            while j is not None and int((Fraction(j) * ratio + Fraction(1, 2)) // 1) <= g:
+                writer.write(frame)
+                j = next(picks, None)
+            prev = frame
+        while j is not None and prev is not None:   # 보간 결과가 모자라면 마지막 프레임으로 채움
+            writer.write(prev)
+            j = next(picks, None)
+    tmp.replace(path)
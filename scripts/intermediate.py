@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+work/ 중간 산출물(base / rife / reverse) 포맷.
+
+  h264     기본. libx264 crf16 veryfast, yuv420p, 긴 GOP (작지만 손실·역방향/임의 접근 디코드가 느림)
+  ffv1     무손실, 모든 프레임 키프레임(-g 1), RGB. 디스크는 커지지만 세대 손실 없음
+  utvideo  무손실 인트라, 디코드가 가장 가벼운 코덱 쪽 (파일은 ffv1보다 큼)
+  mjpeg    준무손실(q=2) 인트라, yuv444. 크기/속도 절충
+  raw      rawvideo rgb24 (.nut). 디코드 비용 0, 파일이 가장 큼
+
+인트라 전용 포맷은 어느 프레임에서든 바로 디코드할 수 있어 reverse·구간 분할 읽기가 싸다.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+@dataclass(frozen=True)
+class IntermediateFormat:
+    name: str
+    ext: str
+    pix_fmt: str             # 인코더 입력 픽셀 포맷 (base 필터의 format= 에도 사용)
+    codec: Tuple[str, ...]
+    lossless: bool
+    intra: bool
+
+    def codec_args(self) -> List[str]:
+        return [*self.codec, "-pix_fmt", self.pix_fmt]
+
+    def path(self, work: Path, stem: str) -> Path:
+        return Path(work) / f"{stem}.{self.ext}"
+
+FORMATS = {
+    "h264": IntermediateFormat("h264", "mp4", "yuv420p",
+                               ("-c:v", "libx264", "-crf", "16", "-preset", "veryfast"), False, False),
+    "ffv1": IntermediateFormat("ffv1", "mkv", "bgr0",
+                               ("-c:v", "ffv1", "-level", "3", "-g", "1", "-slices", "4", "-slicecrc", "1"),
+                               True, True),
+    "utvideo": IntermediateFormat("utvideo", "mkv", "gbrp", ("-c:v", "utvideo"), True, True),
+    "mjpeg": IntermediateFormat("mjpeg", "mkv", "yuvj444p", ("-c:v", "mjpeg", "-q:v", "2"), False, True),
+    "raw": IntermediateFormat("raw", "nut", "rgb24", ("-c:v", "rawvideo"), True, True),
+}
+DEFAULT_FORMAT = "h264"
+
+def get_format(name: str = DEFAULT_FORMAT) -> IntermediateFormat:
+    try:
+        return FORMATS[name or DEFAULT_FORMAT]
+    except KeyError:
+        raise ValueError(f"알 수 없는 중간 포맷: {name} (가능: {', '.join(FORMATS)})") from None
@@ -6,7 +6,23 @@ Kling (via Replicate) image->video runner.
 Requires: REPLICATE_API_TOKEN in environment.
 """
 from pathlib import Path
-import os, sys, requests
+import os, sys
+
+DEFAULT_MODEL = "kwaivgi/kling-v1.6-pro"
+
+def kling_model() -> str:
+    return os.environ.get("KLING_MODEL", DEFAULT_MODEL)
+
+def kling_input(start_image, prompt: str, duration: int = 5, aspect_ratio: str = "16:9",
+                negative_prompt: str = "") -> dict:
+    """Kling 예측 input. start_image는 파일 객체 또는 data URI/URL."""
+    return {
+        "prompt": prompt,
+        "negative_prompt": negative_prompt,
+        "start_image": start_image,
+        "duration": int(duration),
+        "aspect_ratio": aspect_ratio,
+    }
 
 def generate_kling_video(start_image: Path, prompt: str, duration: int = 5, aspect_ratio: str = "16:9",
                          negative_prompt: str = "", model: str = None) -> str:
@@ -16,28 +32,18 @@ def generate_kling_video(start_image: Path, prompt: str, duration: int = 5, aspe
         print("ERROR: `replicate` 패키지가 필요합니다. `pip install replicate requests`", file=sys.stderr)
         raise
 
-    model = model or os.environ.get("KLING_MODEL", "kwaivgi/kling-v1.6-pro")
+    model = model or kling_model()
     client = replicate.Client()  # uses REPLICATE_API_TOKEN
 
     with open(start_image, "rb") as f:
         output_url = client.run(
             model,
-            input={
-                "prompt": prompt,
-                "negative_prompt": negative_prompt,
-                "start_image": f,
-                "duration": int(duration),
-                "aspect_ratio": aspect_ratio,
-            },
+            input=kling_input(f, prompt, duration=duration, aspect_ratio=aspect_ratio,
+                              negative_prompt=negative_prompt),
         )
     return output_url
 
 def download(url: str, out_path: Path):
-    r = requests.get(url, stream=True)
-    r.raise_for_status()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, "wb") as fo:
-        for chunk in r.iter_content(chunk_size=1024*1024):
-            if chunk:
-                fo.write(chunk)
-    return out_path
+    """공용 다운로더(연결 재사용, 병렬 Range, .part 이어 받기)로 저장."""
+    from downloader import download as fetch
+    return fetch(url, Path(out_path))
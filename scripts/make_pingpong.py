@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import argparse, subprocess, sys
+import argparse, math, sys
 from pathlib import Path
+from typing import List
 
-def sh(cmd):
-    print("[cmd]", " ".join(map(str, cmd)), flush=True)
-    subprocess.run(cmd, check=True)
+import profiling
+from pipeline import add_pipeline_args, add_profile_args, check_progressive_args, pipeline_kwargs
 
-def run_pipeline(shot: str):
-    # 파이프라인 실행 (베이스→RIFE→최종)
-    sh([sys.executable, "scripts/pipeline.py", "--shot", shot])
+def run_pipeline(shot: str, ws: Path, kwargs: dict) -> Path:
+    """
+    최종본이 이미 최신(입력·옵션의 스테이지 키가 같음)이면 그대로 쓰고,
+    아니면 같은 프로세스에서 파이프라인(베이스→RIFE→최종)을 실행한다.
+    """
+    from pipeline import build_pipeline, up_to_date_final
+    final = up_to_date_final(ws, shot, **kwargs)
+    if final is not None:
+        print(f"  최종본이 최신입니다 → 재렌더 생략 ({final.name})")
+        return final
+    return build_pipeline(ws, shot, **kwargs)
 
 def latest_final(out_dir: Path, target_fps: int):
     # 우선 final_<fps>fps.mp4를 찾고, 없으면 out 디렉토리의 최신 final_*.mp4 사용
@@ -20,51 +28,127 @@ def latest_final(out_dir: Path, target_fps: int):
     finals = sorted(out_dir.glob("final_*fps.mp4"), key=lambda p: p.stat().st_mtime)
     return finals[-1] if finals else None
 
+def pingpong_plan(n: int, src_fps: float, fps: float, duration_sec: float) -> List[int]:
+    """
+    출력 프레임 j마다 쓸 원본 프레임 번호.
+    핑퐁 순서는 0..n-1 → n-2..0 (꺾이는 프레임은 한 번만), 출력 j는 시각 j/fps에 가장 가까운 프레임.
+    핑퐁 한 바퀴보다 duration이 길면 한 바퀴에서 끝난다.
+    """
+    if n <= 0:
+        return []
+    period = 2 * n - 1
+    total = min(math.ceil(duration_sec * fps - 1e-6), math.ceil(period * fps / src_fps - 1e-6))
+    plan = []
+    for j in range(total):
+        k = min(period - 1, int(math.floor(j * src_fps / fps + 0.5)))
+        plan.append(k if k < n else period - 1 - k)
+    return plan
+
 def make_pingpong_from_video(src: Path, dst: Path, fps: int, duration_sec: float, crf=17, preset="slow", tune="animation"):
-    # 앞(정방향) + 뒤(역재생, 첫 프레임 1장 제거) → concat → 정확히 duration으로 트림
-    fc = (
-        "[0:v]split[fwd][revsrc];"
-        "[revsrc]reverse,setpts=PTS-STARTPTS,trim=start_frame=1[rev];"
-        "[fwd][rev]concat=n=2:v=1:a=0,"
-        "scale=iw:ih:flags=lanczos,setsar=1,format=yuv420p,"
-        f"trim=duration={duration_sec}"
-    )
-    sh([
-        "ffmpeg","-y","-i", str(src),
-        "-filter_complex", fc,
-        "-r", str(fps), "-c:v","libx264","-preset", preset,"-crf", str(crf), "-tune", tune,
-        str(dst)
-    ])
+    """
+    앞(정방향) + 뒤(역재생, 꺾이는 프레임 1장 제거)를 duration에 필요한 프레임만 골라 한 번에 인코드.
+    역방향까지 가면 프레임 저장소(memmap)에서 읽고, 정방향만으로 끝나면 필요한 만큼만 디코드한다.
+    어느 쪽이든 클립 전체를 메모리에 올리지 않는다.
+    """
+    from frameio import FrameReader, FrameWriter, passthrough_args, probe_video
+    src, dst = Path(src), Path(dst)
+    codec = ["-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-tune", tune, "-pix_fmt", "yuv420p"]
+    with profiling.stage("pingpong"):
+        info = probe_video(src)
+        src_fps = info.fps or fps
+        n = info.nb_frames
+        if n is None or math.ceil(duration_sec * src_fps - 1e-6) > n:
+            from frame_store import open_store
+            store = open_store(src)
+            plan = pingpong_plan(len(store), store.fps or src_fps, fps, duration_sec)
+            frames = (store.array[k] for k in plan)
+            reader = None
+        else:
+            # 정방향 구간만 필요 → 저장소 없이 앞쪽만 디코드
+            plan = pingpong_plan(n, src_fps, fps, duration_sec)
+            reader = FrameReader(["-i", str(src)], info.width, info.height,
+                                 max_frames=max(plan) + 1, out_args=passthrough_args())
+            frames = _pick(reader, plan)
+        print(f"  핑퐁: {len(plan)} 프레임 @ {fps}fps (원본 {n if n is not None else '?'} 프레임 @ {src_fps:g}fps)")
+        with FrameWriter(dst, info.width, info.height, fps, vf="setsar=1", codec_args=codec) as writer:
+            try:
+                for frame in frames:
+                    writer.write(frame)
+            finally:
+                if reader is not None:
+                    reader.close()
+    return dst
 
-def main():
-    ap = argparse.ArgumentParser(description="final_*fps.mp4 → 6초 핑퐁(1→2→1)")
-    ap.add_argument("--shot", required=True)
-    ap.add_argument("--fps", type=int, default=24)
-    ap.add_argument("--duration", type=float, default=6.0)
-    ap.add_argument("--crf", type=int, default=17)
-    ap.add_argument("--preset", default="slow")
-    ap.add_argument("--tune", default="animation")
-    ap.add_argument("--skip-pipeline", action="store_true")
-    args = ap.parse_args()
+def _pick(frames, plan: List[int]):
+    """단조 증가하는 plan 순서대로 프레임을 고름 (같은 번호가 반복되면 같은 프레임을 다시 냄)."""
+    it = iter(plan)
+    want = next(it, None)
+    for i, frame in enumerate(frames):
+        while want == i:
+            yield frame
+            want = next(it, None)
+        if want is None:
+            return
 
-    project = Path("project") / args.shot
-    out_dir = project / "out"
+def build_pingpong(ws: Path, shot: str, kwargs: dict, fps: int = 24, duration: float = 6.0, crf: int = 17,
+                   preset: str = "slow", tune: str = "animation", skip_pipeline: bool = False) -> Path:
+    """(필요하면) 파이프라인 → out/의 최종본 → <shot>_pingpong_<n>s.mp4. 렌더 데몬도 이걸 부른다."""
+    out_dir = ws / "project" / shot / "out"
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_mp4 = out_dir / f"{args.shot}_pingpong_{int(args.duration)}s.mp4"
+    out_mp4 = out_dir / f"{shot}_pingpong_{int(duration)}s.mp4"
 
-    if not args.skip_pipeline:
-        print("[1/3] Run pipeline")
-        run_pipeline(args.shot)
+    src = None
+    if not skip_pipeline:
+        print("[1/3] Run pipeline (최신이면 생략)")
+        src = run_pipeline(shot, ws, kwargs)
 
     print("[2/3] Find final video")
-    src = latest_final(out_dir, args.fps)
+    src = src or latest_final(out_dir, fps)
     if not src:
         print("ERROR: final_*fps.mp4 를 찾을 수 없습니다. pipeline을 먼저 돌려 주세요.", file=sys.stderr)
         sys.exit(2)
     print(f"  -> {src}")
 
     print("[3/3] Build ping-pong")
-    make_pingpong_from_video(src, out_mp4, fps=args.fps, duration_sec=args.duration, crf=args.crf, preset=args.preset, tune=args.tune)
+    make_pingpong_from_video(src, out_mp4, fps=fps, duration_sec=duration, crf=crf, preset=preset, tune=tune)
+    return out_mp4
+
+def add_pingpong_args(ap: argparse.ArgumentParser):
+    ap.add_argument("--fps", type=int, default=24)
+    ap.add_argument("--duration", type=float, default=6.0)
+    ap.add_argument("--crf", type=int, default=17)
+    ap.add_argument("--preset", default="slow")
+    ap.add_argument("--tune", default="animation")
+    ap.add_argument("--skip-pipeline", action="store_true",
+                    help="최신 여부와 상관없이 out/의 최종본을 그대로 사용")
+
+def pingpong_params(args, ws: Path) -> dict:
+    """add_pingpong_args + add_pipeline_args로 파싱한 값 → build_pingpong 키워드 인자."""
+    return dict(kwargs=pipeline_kwargs(args, ws), fps=args.fps, duration=args.duration, crf=args.crf,
+                preset=args.preset, tune=args.tune, skip_pipeline=args.skip_pipeline)
+
+def main():
+    from render_daemon import add_submit_args, submit_from_args
+
+    ap = argparse.ArgumentParser(description="final_*fps.mp4 → 6초 핑퐁(1→2→1)")
+    ap.add_argument("--shot", required=True)
+    add_pingpong_args(ap)
+    add_pipeline_args(ap)
+    add_profile_args(ap)
+    add_submit_args(ap)
+    args = ap.parse_args()
+    check_progressive_args(ap, args)
+
+    ws = Path.cwd()
+    params = pingpong_params(args, ws)
+    if args.submit:
+        submit_from_args(args, ws, "pingpong", args.shot, params)
+        return
+
+    prof = profiling.start(live=args.profile_live) if args.profile or args.profile_live else None
+    out_mp4 = build_pingpong(ws, args.shot, **params)
+    if prof is not None:
+        profiling.stop().write(out_mp4)
     print(f"Done ✅  → {out_mp4}")
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+키프레임 간격(베이스 프레임 쌍)마다 움직임을 싸게 추정해 보간 방식을 고른다 (--adaptive).
+
+  hold   거의 같은 프레임 → 앞 프레임 복사
+  fade   밝기/색만 조금 바뀌고 전역 이동이 거의 없음 → 선형 크로스페이드
+  model  그 외(포즈 변화·큰 이동) → RIFE 추론
+
+추정은 1/8로 샘플링한 회색조 프레임에서 한다:
+  mad    평균 절대 차이 (0~255)
+  shift  위상 상관(phase correlation)으로 구한 전역 이동량 (원본 픽셀 단위)
+"""
+from typing import Tuple
+
+import numpy as np
+
+HOLD, FADE, MODEL = "hold", "fade", "model"
+SAMPLE = 8               # 샘플링 간격 (px)
+MAX_FADE_SHIFT = 2.0     # 이보다 크게 움직이면 크로스페이드 대신 모델 (원본 px)
+
+
+def _gray(frame: np.ndarray) -> np.ndarray:
+    small = frame[::SAMPLE, ::SAMPLE].astype(np.float32)
+    return small @ np.array([0.299, 0.587, 0.114], np.float32)
+
+def global_shift(a: np.ndarray, b: np.ndarray) -> float:
+    """회색조 샘플 a→b의 전역 이동량 (원본 픽셀). 위상 상관 최댓값 위치."""
+    fa = np.fft.rfft2(a - a.mean())
+    fb = np.fft.rfft2(b - b.mean())
+    cross = fa * np.conj(fb)
+    cross /= np.abs(cross) + 1e-6
+    corr = np.fft.irfft2(cross, s=a.shape)
+    dy, dx = np.unravel_index(int(np.argmax(corr)), corr.shape)
+    h, w = a.shape
+    dy = dy - h if dy > h // 2 else dy
+    dx = dx - w if dx > w // 2 else dx
+    return float(np.hypot(dy, dx)) * SAMPLE
+
+def classify(f0: np.ndarray, f1: np.ndarray, hold_threshold: float,
+             fade_threshold: float) -> Tuple[str, float, float]:
+    """(방식, mad, shift). 전역 이동은 hold/model이 mad만으로 정해지지 않을 때만 계산한다."""
+    if f0 is f1:
+        return HOLD, 0.0, 0.0
+    if f0.shape != f1.shape:
+        return MODEL, 255.0, 0.0
+    a, b = _gray(f0), _gray(f1)
+    mad = float(np.abs(a - b).mean())
+    if mad <= hold_threshold:
+        return HOLD, mad, 0.0
+    if mad > fade_threshold:
+        return MODEL, mad, 0.0
+    shift = global_shift(a, b)
+    return (FADE if shift <= MAX_FADE_SHIFT else MODEL), mad, shift
+
+def crossfade(f0: np.ndarray, f1: np.ndarray, t: float) -> np.ndarray:
+    """f0*(1-t) + f1*t (반올림)."""
+    out = f0.astype(np.float32) * (1.0 - t) + f1.astype(np.float32) * t
+    return np.clip(out + 0.5, 0, 255).astype(np.uint8)
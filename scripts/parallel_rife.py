@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+구간 병렬 RIFE 보간.
+
+베이스 비디오를 키프레임 경계(내용이 바뀌는 프레임)에서 구간으로 나누고
+(끝 프레임 1장 겹침) 워커 프로세스마다 구간 하나씩 보간한다.
+각 워커는 모델을 한 번만 로드하고 torch 스레드를 cpu/workers 로 제한한다.
+구간 결과는 같은 인코더 설정으로 만든 뒤 concat(-c copy)으로 순서대로 잇는다.
+베이스는 프레임 저장소(frame_store.py)에 한 번만 디코드하고, 워커는 자기 구간을 memmap으로 바로 읽는다.
+"""
+import math, os
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from pipeline import run
+from intermediate import get_format, DEFAULT_FORMAT
+
+def plan_segments(starts: List[int], n_frames: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    키프레임 경계(starts) 중에서 골라 프레임 수가 고르게 parts개 정도로 나눔.
+    반환: [(시작, 끝(포함)), ...] — 인접 구간은 경계 프레임 1장을 공유.
+    """
+    cuts = [s for s in starts if 0 < s < n_frames - 1]
+    chosen, target = [], n_frames / max(1, parts)
+    for c in cuts:
+        if c >= (len(chosen) + 1) * target and (not chosen or c > chosen[-1]):
+            chosen.append(c)
+    bounds = [0] + chosen + [n_frames - 1]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+def interp_segment(store_dir: str, s0: int, s1: int, last: bool, exp: int,
+                    out_path: str, rife_dir: str, uhd: bool, scale: float, threads: int, batch: int,
+                    hold_threshold: Optional[float], fb_avg: bool, out_fps: float,
+                    intermediate: str = DEFAULT_FORMAT, step: Optional[Fraction] = None,
+                    mem_budget: Optional[int] = None, fade_threshold: Optional[float] = None) -> dict:
+    """
+    워커 프로세스(또는 checkpoint.py의 청크): 베이스 프레임 [s0, s1] 보간 → out_path.
+    겹친 끝 프레임은 마지막 구간만 유지.
+    step이 있으면(--exact-fps) 위치 j*step이 [s0, s1) 안에 드는 출력 프레임만 합성.
+    """
+    from frameio import FrameWriter
+    from frame_store import FrameStore
+    from rife_engine import get_engine
+
+    engine = get_engine(Path(rife_dir), uhd=uhd, scale=scale, threads=threads, batch=batch,
+                        hold_threshold=hold_threshold, mem_budget=mem_budget, fade_threshold=fade_threshold)
+    engine.gap_offset = s0
+    store = FrameStore(Path(store_dir))
+    frames_of = engine.stream_fb_avg if fb_avg else engine.stream
+    n_mid = 2 ** exp
+    codec = get_format(intermediate).codec_args()
+    with FrameWriter(Path(out_path), store.width, store.height, out_fps, codec_args=codec) as writer:
+        if step is not None:
+            first, stop = math.ceil(s0 / step), None if last else math.ceil(s1 / step)
+            for frame in engine.stream_exact(store.frames(s0, s1 + 1), step, first=first, offset=s0,
+                                             stop=stop, fb_avg=fb_avg):
+                writer.write(frame)
+            return {"frames": writer.count, "inferred": engine.inferred, "decisions": engine.decisions,
+            **engine.stats}
+        for i, frame in enumerate(frames_of(store.frames(s0, s1 + 1), exp)):
+            if not last and i >= (s1 - s0) * n_mid:
+                break   # 다음 구간의 첫 프레임
+            writer.write(frame)
+    return {"frames": writer.count, "inferred": engine.inferred, "decisions": engine.decisions,
+            **engine.stats}
+
+def rife_interpolate_parallel(base_video: Path, exp: int, rife_dir: Path, workers: int,
+                              uhd: bool = False, scale: float = 1.0, threads: int = 0, batch: int = 4,
+                              hold_threshold: Optional[float] = None, fb_avg: bool = False,
+                              tag: str = "", intermediate: str = DEFAULT_FORMAT,
+                              exact_fps: Optional[int] = None, speed: float = 1.0,
+                              mem_budget: Optional[int] = None, fade_threshold: Optional[float] = None):
+    """rife_interpolate_one과 같은 산출물(rife{tag}_*fps.<ext>)을 구간 병렬로 만든다."""
+    from frame_store import open_store
+    from incremental import detect_frame_runs
+    from rife_engine import exact_step
+
+    work = base_video.parent
+    store = open_store(base_video)
+    fmt = get_format(intermediate)
+    step = None
+    if exact_fps:
+        out_fps, step = exact_fps, exact_step(store.fps or 1, exact_fps, speed)
+        out_path = fmt.path(work, f"rife{tag}_exact_{out_fps}fps")
+    else:
+        out_fps = round((store.fps or 1) * (2 ** exp))
+        out_path = fmt.path(work, f"rife{tag}_{out_fps}fps")
+
+    starts, n = detect_frame_runs(store.frames(), hold_threshold if hold_threshold is not None else 1.0)
+    segs = plan_segments(starts, n, workers * 2) if n >= 2 else [(0, max(0, n - 1))]
+    workers = max(1, min(workers, len(segs)))
+    threads = max(1, (threads or os.cpu_count() or 1) // workers)   # --threads는 전체 예산, 워커끼리 나눔
+    print(f"   구간 병렬: {len(segs)}개 구간 / 워커 {workers}개 × 스레드 {threads}")
+
+    seg_dir = work / "rife_segments"
+    seg_dir.mkdir(exist_ok=True)
+    for old in seg_dir.glob("part_*.*"):
+        old.unlink()
+    parts = [fmt.path(seg_dir, f"part_{i:04d}") for i in range(len(segs))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futs = [pool.submit(interp_segment, str(store.root), s0, s1,
+                            i == len(segs) - 1, exp, str(parts[i]), str(rife_dir), uhd, scale,
+                            threads, batch, hold_threshold, fb_avg, out_fps, intermediate, step,
+                            mem_budget, fade_threshold)
+                for i, (s0, s1) in enumerate(segs)]
+        results = [f.result() for f in futs]
+
+    concat_txt = seg_dir / "concat.txt"
+    concat_txt.write_text("".join(f"file '{p.name}'\n" for p in parts), encoding="utf-8")
+    run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", str(concat_txt),
+         "-c", "copy", "-an", str(out_path)], check=True)
+    for p in parts:
+        p.unlink(missing_ok=True)
+
+    report_segments(results, work, hold_threshold, fade_threshold)
+    return out_path, out_fps
+
+def report_segments(results: List[dict], work: Path, hold_threshold: Optional[float],
+                    fade_threshold: Optional[float]) -> None:
+    """구간별 interp_segment 결과를 합쳐 홀드/크로스페이드 통계 출력, --adaptive면 결정 기록."""
+    if hold_threshold is not None or fade_threshold is not None:
+        pairs = sum(r["pairs"] for r in results)
+        held = sum(r["held_pairs"] for r in results)
+        faded = sum(r["faded_pairs"] for r in results)
+        skipped = sum(r["skipped_frames"] for r in results)
+        inferred = sum(r["inferred"] for r in results)
+        fade = f", 크로스페이드 {faded} 쌍" if fade_threshold is not None else ""
+        print(f"   홀드 건너뜀: {held}/{pairs} 쌍{fade}, 추론 생략 {skipped} 프레임 / 실제 추론 {inferred} 프레임")
+    if fade_threshold is not None:
+        from rife_engine import write_decisions
+        write_decisions(work / "logs" / "adaptive_gaps.json", [d for r in results for d in r["decisions"]],
+                        fade_threshold, hold_threshold)
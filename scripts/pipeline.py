@@ -5,13 +5,19 @@ import argparse, math, os, subprocess, sys, shutil, time
 from pathlib import Path
 from typing import Optional
 
+import profiling
+from timeline import parse_scene, compile_scene
+from intermediate import get_format, DEFAULT_FORMAT, FORMATS
+from stage_cache import (StageCache, DEFAULT_MAX_BYTES, stage_key, scene_inputs_digest,
+                         model_digest, record_artifact, last_artifact)
+
 # ----------------------------
 # 공통 유틸
 # ----------------------------
 def run(cmd, cwd=None, check=True):
     """명령 실행. check=False면 실패해도 예외를 던지지 않고 CompletedProcess 반환."""
     print(f"[cmd] {' '.join(map(str, cmd))}")
-    return subprocess.run(cmd, cwd=cwd, check=check)
+    return profiling.run_cmd(cmd, cwd=cwd, check=check)
 
 def which(name: str) -> Optional[str]:
     return shutil.which(name)
@@ -28,37 +34,74 @@ def ensure_dirs(shot_dir: Path):
 # ----------------------------
 # 1) 베이스 생성
 # ----------------------------
-def build_base(shot_dir: Path, base_fps: int, width: int, height: int,
-               mute: bool = True, fit: str = "auto") -> Path:
-    scene_txt = shot_dir / "timing" / "scene.txt"
-    out_path  = shot_dir / "work" / f"base_{base_fps}fps.mp4"
-
+def base_filter(width: int, height: int, fit: str = "auto") -> str:
     if fit == "canvas":
         # 지정 캔버스(예: 1920x1080)에 맞춰 레터박스
-        vf = (
+        return (
             f"scale={width}:-2:force_original_aspect_ratio=decrease,"
             f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
             "setsar=1,format=yuv420p"
         )
-    else:
-        # ✅ 자동: 입력 해상도 그대로, 단 짝수 픽셀로만 정규화
-        vf = "scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1,format=yuv420p"
-
-    cmd = [
-        "ffmpeg", "-y",
-        "-f", "concat", "-safe", "0",
-        "-i", str(scene_txt),
-        "-vf", vf,
-        "-r", str(base_fps),
-        "-pix_fmt", "yuv420p",
-    ]
-    if mute:
-        cmd += ["-an"]
-    cmd += [str(out_path)]
+    # ✅ 자동: 입력 해상도 그대로, 단 짝수 픽셀로만 정규화
+    return "scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1,format=yuv420p"
 
-    run(cmd, check=True)
+def build_base(shot_dir: Path, base_fps: int, width: int, height: int,
+               mute: bool = True, fit: str = "auto", intermediate: str = DEFAULT_FORMAT) -> Path:
+    """
+    scene.txt를 프레임 단위 계획(timeline.compile_scene)으로 컴파일하고,
+    키프레임마다 한 번만 디코드·리사이즈한 버퍼를 계획 순서대로 인코드한다.
+    (베이스는 원래 무음이므로 mute는 호환용)
+    """
+    from frameio import FrameWriter
+    fmt = get_format(intermediate)
+    out_path  = fmt.path(shot_dir / "work", f"base_{base_fps}fps")
+    seq = base_sequence(shot_dir, base_fps, width, height, fit)
+    print(f"   타임라인: {len(seq)} 프레임 / 키프레임 {len(seq.plan.keyframes)}장 @ {base_fps}fps")
+    with FrameWriter(out_path, seq.width, seq.height, base_fps, codec_args=fmt.codec_args()) as writer:
+        for frame in seq:
+            writer.write(frame)
+    record_artifact(shot_dir / "work", "base", out_path, fps=base_fps)
     return out_path
 
+def base_frame_size(shot_dir: Path, width: int, height: int, fit: str = "auto"):
+    """base_filter 적용 후 프레임 크기. auto면 첫 키프레임 크기를 짝수로 내림."""
+    if fit == "canvas":
+        return width, height
+    from frameio import probe_video
+    entries = parse_scene(shot_dir / "timing" / "scene.txt")
+    if not entries:
+        print("ERROR: scene.txt에 키프레임이 없습니다.", file=sys.stderr)
+        sys.exit(1)
+    info = probe_video(entries[0].path)
+    return info.width // 2 * 2, info.height // 2 * 2
+
+def base_sequence(shot_dir: Path, base_fps: int, width: int, height: int, fit: str = "auto",
+                  proxy: int = 1):
+    """
+    베이스 프레임 소스 (KeyframeSequence). 키프레임은 스레드 풀로 한 번씩만 디코드하고
+    같은 키프레임이 이어지는 프레임은 같은 버퍼를 가리킨다.
+    auto는 모든 키프레임을 첫 키프레임 크기(짝수)로 맞춘다.
+    proxy > 1 이면 가로세로를 1/proxy로 줄인 프록시 프레임 (--preview).
+    """
+    from timeline import KeyframeSequence, decode_keyframes
+    plan = compile_scene(shot_dir / "timing" / "scene.txt", base_fps)
+    if not plan.holds:
+        print("ERROR: scene.txt에 키프레임이 없습니다.", file=sys.stderr)
+        sys.exit(1)
+    w, h = base_frame_size(shot_dir, width, height, fit)
+    vf = (base_filter(width, height, fit).replace(",format=yuv420p", "") if fit == "canvas"
+          else f"scale={w}:{h},setsar=1")
+    if proxy > 1:
+        w, h = max(2, w // proxy // 2 * 2), max(2, h // proxy // 2 * 2)
+        vf += f",scale={w}:{h}:flags=fast_bilinear"
+    buffers = decode_keyframes(plan.keyframes, w, h, vf=vf)
+    return KeyframeSequence(plan, buffers, w, h)
+
+def read_base_frames(shot_dir: Path, base_fps: int, width: int, height: int, fit: str = "auto",
+                     proxy: int = 1):
+    """build_base와 같은 베이스 프레임 (파일로 인코드하지 않음). base_sequence 참고."""
+    return base_sequence(shot_dir, base_fps, width, height, fit, proxy=proxy)
+
 # ----------------------------
 # 2) 보간 파라미터
 # ----------------------------
@@ -71,65 +114,72 @@ def compute_exp(base_fps: int, target_fps: int) -> int:
 # 3) RIFE 보간
 # ----------------------------
 
-def reverse_video(src: Path, dst: Path):
-    # 입력/출력 모두 무음 처리
-    run(["ffmpeg","-y","-i",str(src),"-vf","reverse","-an",str(dst)], check=True)
+def require_exact_support(engine, exact_fps) -> None:
+    if exact_fps and not engine.model.arbitrary_timestep:
+        print("ERROR: 이 RIFE 모델은 임의 timestep을 지원하지 않아 --exact-fps를 쓸 수 없습니다 (4.x 필요).",
+              file=sys.stderr)
+        sys.exit(1)
 
 def rife_interpolate_one(input_video: Path, exp: int, rife_dir: Path,
-                         uhd: bool=False, scale: float=1.0, tag: str=""):
+                         uhd: bool=False, scale: float=1.0, tag: str="",
+                         threads: int=0, batch: int=4, fb_avg: bool=False,
+                         hold_threshold: Optional[float]=None,
+                         intermediate: str=DEFAULT_FORMAT,
+                         exact_fps: Optional[int]=None, speed: float=1.0,
+                         mem_budget: Optional[int]=None, fade_threshold: Optional[float]=None):
+    """
+    프로세스 내 RIFE 엔진(warm)으로 보간. 모델은 프로세스당 한 번만 로드.
+    hold_threshold를 주면 같은 키프레임이 반복되는 쌍은 추론 없이 복사.
+    mem_budget(바이트)을 주면 그 안에 들어가는 타일로 나눠 추론.
+    fade_threshold를 주면(--adaptive) 간격마다 RIFE/크로스페이드/홀드를 골라 work/logs/adaptive_gaps.json에 기록.
+    exact_fps를 주면 2^exp배 대신 최종 fps(speed 반영) 시각의 프레임만 합성 → rife{tag}_exact_*fps.
+    """
+    from frameio import probe_video
+    from rife_engine import get_engine, interpolate_file, write_decisions
+
     work = input_video.parent
-    # base_XXfps.mp4 → XX 추출
+    input_fps = probe_video(input_video).fps or 1
+    fmt = get_format(intermediate)
+    if exact_fps:
+        out_fps = exact_fps
+        out_path = fmt.path(work, f"rife{tag}_exact_{out_fps}fps")
+    else:
+        out_fps = round(input_fps * (2 ** exp))
+        out_path = fmt.path(work, f"rife{tag}_{out_fps}fps")
+
+    engine = get_engine(rife_dir, uhd=uhd, scale=scale, threads=threads, batch=batch,
+                        hold_threshold=hold_threshold, mem_budget=mem_budget, fade_threshold=fade_threshold)
+    require_exact_support(engine, exact_fps)
+    # 임시 이름에 쓰고 끝까지 성공했을 때만 rename → 중단돼도 미완성 파일이 rife_*fps로 남지 않음
+    tmp = out_path.with_name(f".{out_path.stem}.tmp{out_path.suffix}")
     try:
-        input_fps = int(Path(input_video).stem.split("_")[1].replace("fps",""))
-    except Exception:
-        input_fps = 1
-    out_fps  = input_fps * (2 ** exp)
-    out_path = work / f"rife{tag}_{out_fps}fps.mp4"
-    noa_path = work / f"rife{tag}_{out_fps}fps_noaudio.mp4"
-
-    inf_py = Path(rife_dir) / "inference_video.py"
-    model_dir = Path(rife_dir) / "train_log"
-    cmd = [sys.executable, str(inf_py),
-           "--video", str(input_video),
-           "--exp", str(exp),
-           "--model", str(model_dir),
-           "--output", str(out_path)]
-    # Practical-RIFE가 --tta 미지원이므로 넣지 않음
-    if uhd: cmd += ["--UHD"]
-    if scale != 1.0: cmd += ["--scale", str(scale)]
-
-    run(cmd, check=False)
-
-    if noa_path.exists():
-        try: noa_path.replace(out_path)
-        except Exception: shutil.move(str(noa_path), str(out_path))
-    if not out_path.exists():
+        interpolate_file(engine, input_video, tmp, exp, codec_args=fmt.codec_args(), fb_avg=fb_avg,
+                         exact_fps=exact_fps, speed=speed)
+    except subprocess.CalledProcessError:
         print("ERROR: RIFE 산출물 없음", file=sys.stderr); sys.exit(1)
+    os.replace(tmp, out_path)
+    if hold_threshold is not None or fade_threshold is not None:
+        print(f"   {engine.hold_report()}")
+    if fade_threshold is not None:
+        write_decisions(work / "logs" / "adaptive_gaps.json", engine.decisions, fade_threshold,
+                        engine.hold_threshold)
     return out_path, out_fps
 
 def rife_interpolate_fb_avg(base_video: Path, exp: int, rife_dir: Path,
-                            uhd: bool=False, scale: float=1.0):
-    work = base_video.parent
-    # 1) 정방향 보간
-    fwd_mp4, out_fps = rife_interpolate_one(base_video, exp, rife_dir,
-                                            uhd=uhd, scale=scale, tag="_fwd")
-    # 2) 입력 뒤집기 → 역방향 보간 → 다시 되돌리기
-    rev_in  = work / "base_rev.mp4"
-    rev_out = work / f"rife_rev_{out_fps}fps.mp4"
-    reverse_video(base_video, rev_in)
-    bwd_interp, _ = rife_interpolate_one(rev_in, exp, rife_dir,
-                                         uhd=uhd, scale=scale, tag="_bwd")
-    reverse_video(bwd_interp, rev_out)
-
-    # 3) 정/역 결과 평균 → 최종 rife_*fps.mp4로 저장
-    avg_mp4 = work / f"rife_fbavg_{out_fps}fps.mp4"
-    run([
-        "ffmpeg","-y",
-        "-i", str(fwd_mp4), "-i", str(rev_out),
-        "-filter_complex","[0:v][1:v]blend=all_mode=darken,format=yuv420p",
-        "-r", str(out_fps), "-an", str(avg_mp4)
-    ], check=True)
-    return avg_mp4, out_fps
+                            uhd: bool=False, scale: float=1.0,
+                            threads: int=0, batch: int=4,
+                            hold_threshold: Optional[float]=None,
+                            intermediate: str=DEFAULT_FORMAT,
+                            exact_fps: Optional[int]=None, speed: float=1.0,
+                            mem_budget: Optional[int]=None, fade_threshold: Optional[float]=None):
+    """
+    정/역방향 보간을 동시에 돌려 numpy로 픽셀 평균 → rife_fbavg_*fps 한 번만 인코드.
+    역방향은 프레임 쌍의 입력 순서만 뒤집어 추론하므로 reverse 필터(클립 전체 버퍼링)가 필요 없다.
+    """
+    return rife_interpolate_one(base_video, exp, rife_dir, uhd=uhd, scale=scale, tag="_fbavg",
+                                threads=threads, batch=batch, fb_avg=True,
+                                hold_threshold=hold_threshold, intermediate=intermediate,
+                                exact_fps=exact_fps, speed=speed, mem_budget=mem_budget, fade_threshold=fade_threshold)
 
 
 
@@ -140,62 +190,113 @@ def rife_interpolate(
     tta: bool = False,   # 받아만 두고 내부에서는 사용 안 함(Practical-RIFE 미지원)
     uhd: bool = False,
     scale: float = 1.0,
-    fb_avg: bool = False
+    fb_avg: bool = False,
+    base_video: Optional[Path] = None,
+    threads: int = 0,
+    batch: int = 4,
+    hold_threshold: Optional[float] = None,
+    workers: int = 0,
+    intermediate: str = DEFAULT_FORMAT,
+    exact_fps: Optional[int] = None,
+    speed: float = 1.0,
+    mem_budget: Optional[int] = None,
+    fade_threshold: Optional[float] = None,
+    checkpoint: int = 0
 ):
+    """
+    base_video를 주지 않으면 work/stages.json에 기록된 마지막 베이스를 사용.
+    workers > 1 이면 키프레임 경계로 나눈 구간을 워커 프로세스에서 병렬 보간(parallel_rife.py).
+    checkpoint > 0 이면 입력 그 프레임 수마다 청크를 커밋해 중단 후 이어서 보간(checkpoint.py).
+    exact_fps를 주면 exp는 무시하고 그 fps(speed 반영)의 출력 시각 프레임만 합성한다.
+    """
     work = shot_dir / "work"
-    base_candidates = sorted(work.glob("base_*fps.mp4"), key=os.path.getmtime)
-    base_video = base_candidates[-1] if base_candidates else None
     if base_video is None:
-        print("ERROR: work/에 base_*fps.mp4 가 없습니다. 먼저 베이스를 생성하세요.", file=sys.stderr)
+        rec = last_artifact(work, "base")
+        base_video = rec[0] if rec else None
+    if base_video is None or not Path(base_video).exists():
+        print("ERROR: 베이스 비디오가 없습니다. 먼저 베이스를 생성하세요.", file=sys.stderr)
         sys.exit(1)
 
-    if fb_avg:
+    if workers > 1:
+        from parallel_rife import rife_interpolate_parallel
+        out, out_fps = rife_interpolate_parallel(
+            Path(base_video), exp, rife_dir, workers, uhd=uhd, scale=scale, threads=threads,
+            batch=batch, hold_threshold=hold_threshold, fb_avg=fb_avg,
+            tag="_fbavg" if fb_avg else "", intermediate=intermediate, exact_fps=exact_fps, speed=speed,
+            mem_budget=mem_budget, fade_threshold=fade_threshold)
+    elif checkpoint > 0:
+        from checkpoint import rife_interpolate_checkpointed
+        out, out_fps = rife_interpolate_checkpointed(
+            Path(base_video), exp, rife_dir, checkpoint, uhd=uhd, scale=scale, threads=threads,
+            batch=batch, hold_threshold=hold_threshold, fb_avg=fb_avg,
+            tag="_fbavg" if fb_avg else "", intermediate=intermediate, exact_fps=exact_fps, speed=speed,
+            mem_budget=mem_budget, fade_threshold=fade_threshold)
+    elif fb_avg:
         # 정/역방향 보간 후 평균
-        return rife_interpolate_fb_avg(base_video, exp, rife_dir, uhd=uhd, scale=scale)
+        out, out_fps = rife_interpolate_fb_avg(base_video, exp, rife_dir, uhd=uhd, scale=scale,
+                                               threads=threads, batch=batch,
+                                               hold_threshold=hold_threshold, intermediate=intermediate,
+                                               exact_fps=exact_fps, speed=speed, mem_budget=mem_budget, fade_threshold=fade_threshold)
     else:
         # 단일 방향 보간
-        return rife_interpolate_one(base_video, exp, rife_dir, uhd=uhd, scale=scale, tag="")
+        out, out_fps = rife_interpolate_one(base_video, exp, rife_dir, uhd=uhd, scale=scale, tag="",
+                                            threads=threads, batch=batch,
+                                            hold_threshold=hold_threshold, intermediate=intermediate,
+                                            exact_fps=exact_fps, speed=speed, mem_budget=mem_budget, fade_threshold=fade_threshold)
+    record_artifact(work, "rife", out, fps=out_fps)
+    return out, out_fps
 
 
 # ----------------------------
 # 4) 최종 렌더
 # ----------------------------
-def finalize(shot_dir: Path, target_fps: int, speed: float = 1.0, crf: int = 17, preset: str = "slow"):
+def finalize_filter(target_fps: int, speed: float = 1.0) -> str:
+    return f"setpts={speed}*PTS,fps={target_fps}" if speed != 1.0 else f"fps={target_fps}"
+
+def finalize(shot_dir: Path, target_fps: int, speed: float = 1.0, crf: int = 17, preset: str = "slow",
+             src: Optional[Path] = None, resample: bool = True):
     """
     setpts={speed}*PTS 로 재생속도/길이를 조절하고 최종 target_fps로 리샘플.
-    항상 무음(-an)으로 출력.
+    항상 무음(-an)으로 출력. src를 주지 않으면 stages.json의 마지막 RIFE 산출물 사용.
+    src는 어떤 중간 포맷(--intermediate)이어도 된다. 출력은 항상 libx264/yuv420p mp4.
+    resample=False면 src가 이미 target_fps·speed로 합성된 것(--exact-fps)이라 필터 없이 인코드만.
     """
     work = shot_dir / "work"
     out_dir = shot_dir / "out"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    rife_candidates = sorted(work.glob("rife_*fps.mp4"), key=os.path.getmtime)
-    rife_video = rife_candidates[-1] if rife_candidates else None
+    rife_video = src
     if rife_video is None:
-        print("ERROR: work/에 rife_*fps.mp4 가 없습니다. 먼저 RIFE 보간을 실행하세요.", file=sys.stderr)
+        rec = last_artifact(work, "rife")
+        rife_video = rec[0] if rec else None
+    if rife_video is None or not Path(rife_video).exists():
+        print("ERROR: RIFE 보간 결과가 없습니다. 먼저 RIFE 보간을 실행하세요.", file=sys.stderr)
         sys.exit(1)
 
     out_path = out_dir / f"final_{target_fps}fps.mp4"
-    vf = f"setpts={speed}*PTS,fps={target_fps}" if speed != 1.0 else f"fps={target_fps}"
+    vf = ["-vf", finalize_filter(target_fps, speed)] if resample else []
 
     cmd = [
         "ffmpeg", "-y",
         "-i", str(rife_video),
-        "-vf", vf,
+        *vf,
         "-c:v", "libx264", "-crf", str(crf), "-preset", preset,
         "-pix_fmt", "yuv420p",
         "-an",  # 항상 무음
         str(out_path),
     ]
     run(cmd, check=True)
+    record_artifact(work, "final", out_path, fps=target_fps)
     return out_path
 
 # ----------------------------
 # 5) 감시 모드 (옵션)
 # ----------------------------
-def watch_and_build(root: Path, shot: str, **kwargs):
+def watch_and_build(root: Path, shot: str, incremental: bool = True, build=None, **kwargs):
     """
-    keyframes/*.png 또는 timing/scene.txt 변경 시 자동으로 전체 파이프라인 실행.
+    keyframes/*.png 또는 timing/scene.txt 변경 시 자동으로 다시 렌더.
+    incremental이면 바뀐 키프레임 구간만 다시 보간해 이어 붙이고(incremental.py),
+    아니면 전체 파이프라인을 실행. build를 주면 그 함수로 렌더 (--preview).
     """
     try:
         from watchdog.observers import Observer
@@ -208,8 +309,15 @@ def watch_and_build(root: Path, shot: str, **kwargs):
     key_dir  = shot_dir / "keyframes"
     timing   = shot_dir / "timing"
 
+    if build is not None:
+        pass
+    elif incremental:
+        from incremental import incremental_build as build
+    else:
+        build = build_pipeline
+
     # 최초 1회 빌드
-    build_pipeline(root, shot, **kwargs)
+    build(root, shot, **kwargs)
 
     class Handler(FileSystemEventHandler):
         _last = 0.0
@@ -223,7 +331,7 @@ def watch_and_build(root: Path, shot: str, **kwargs):
             self._last = now
             print(f"🔁 변경 감지: {event.src_path}")
             try:
-                build_pipeline(root, shot, **kwargs)
+                build(root, shot, **kwargs)
             except subprocess.CalledProcessError:
                 print("⚠️ 빌드 실패. 로그를 확인하세요.")
 
@@ -244,6 +352,245 @@ def watch_and_build(root: Path, shot: str, **kwargs):
 # ----------------------------
 # 6) 파이프라인 실행
 # ----------------------------
+def cached_stage(cache: Optional[StageCache], key: str, work: Path, stage: str, build,
+                 dst_dir: Optional[Path] = None):
+    """
+    캐시 적중이면 저장된 산출물을 dst_dir(기본 work/)로 복원하고, 아니면 build()를 실행해 저장.
+    build()는 (경로, extra dict)를 반환해야 한다. 반환값도 (경로, extra).
+    """
+    if cache is not None:
+        hit = cache.fetch(key, dst_dir or work)
+        if hit is not None:
+            path, extra = hit
+            record_artifact(work, stage, path, key=key, **extra)
+            profiling.mark_cached()
+            print(f"   (캐시 적중 {key[:12]}) {path.name}")
+            return path, extra
+    path, extra = build()
+    if cache is not None:
+        cache.store(key, path, stage=stage, **extra)
+    # 산출물과 함께 키를 남겨 두면 다른 도구가 "이미 최신인지"를 다시 렌더하지 않고 알 수 있다
+    record_artifact(work, stage, path, key=key, **extra)
+    return path, extra
+
+# 베이스 프레임 배치 규칙 버전 (timeline.compile_scene). 바꾸면 예전 캐시 베이스를 쓰지 않는다.
+BASE_TIMELINE = "plan-v1"
+
+def base_stage_key(shot_dir: Path, base_fps: int, width: int, height: int, fit: str = "auto",
+                   intermediate: str = DEFAULT_FORMAT) -> str:
+    return stage_key("base", scene_inputs_digest(shot_dir / "timing" / "scene.txt"),
+                     base_fps, width, height, fit, True, intermediate, BASE_TIMELINE)
+
+def base_stage(shot_dir: Path, cache: Optional[StageCache], base_fps: int, width: int, height: int,
+               fit: str = "auto", intermediate: str = DEFAULT_FORMAT):
+    """캐시를 거친 베이스 스테이지. (경로, 캐시 키) 반환."""
+    key = base_stage_key(shot_dir, base_fps, width, height, fit, intermediate)
+    path, _ = cached_stage(
+        cache, key, shot_dir / "work", "base",
+        lambda: (build_base(shot_dir, base_fps, width, height, mute=True, fit=fit,
+                            intermediate=intermediate), {"fps": base_fps}))
+    return path, key
+
+def tiling_key(mem_budget: Optional[int], batch: int) -> tuple:
+    """타일 크기는 (예산, batch)로 정해지므로 타일 추론일 때만 키에 넣는다."""
+    return ("tiles", mem_budget, batch) if mem_budget else ()
+
+def adaptive_key(fade_threshold: Optional[float]) -> tuple:
+    """--adaptive일 때만 키에 넣는다 (간격별 방식 선택이 출력 픽셀을 바꾼다)."""
+    return ("adaptive", fade_threshold) if fade_threshold is not None else ()
+
+def rife_stage_key(base_key: str, exp: int, rife_dir: Path, uhd: bool = False, scale: float = 1.0,
+                   fb_avg: bool = False, hold_threshold: Optional[float] = None,
+                   intermediate: str = DEFAULT_FORMAT, exact_fps: Optional[int] = None,
+                   speed: float = 1.0, mem_budget: Optional[int] = None, batch: int = 4,
+                   fade_threshold: Optional[float] = None) -> str:
+    exact = ("exact", exact_fps, speed) if exact_fps else ()
+    return stage_key("rife", base_key, exp, uhd, scale, fb_avg, hold_threshold, model_digest(rife_dir),
+                     intermediate, *exact, *tiling_key(mem_budget, batch), *adaptive_key(fade_threshold))
+
+def rife_stage(shot_dir: Path, cache: Optional[StageCache], base_key: str, base_video: Path,
+               exp: int, rife_dir: Path, uhd: bool = False, scale: float = 1.0, fb_avg: bool = False,
+               threads: int = 0, batch: int = 4, hold_threshold: Optional[float] = None,
+               workers: int = 0, intermediate: str = DEFAULT_FORMAT,
+               exact_fps: Optional[int] = None, speed: float = 1.0,
+               mem_budget: Optional[int] = None, fade_threshold: Optional[float] = None,
+               checkpoint: int = 0):
+    """캐시를 거친 RIFE 스테이지. (경로, 출력 fps, 캐시 키) 반환."""
+    key = rife_stage_key(base_key, exp, rife_dir, uhd, scale, fb_avg, hold_threshold, intermediate,
+                         exact_fps, speed, mem_budget, batch, fade_threshold)
+
+    def _rife():
+        out, fps = rife_interpolate(shot_dir, exp, rife_dir, uhd=uhd, scale=scale,
+                                    fb_avg=fb_avg, base_video=base_video, threads=threads, batch=batch,
+                                    hold_threshold=hold_threshold, workers=workers,
+                                    intermediate=intermediate, exact_fps=exact_fps, speed=speed,
+                                    mem_budget=mem_budget, fade_threshold=fade_threshold,
+                                    checkpoint=checkpoint)
+        return out, {"fps": fps}
+    path, extra = cached_stage(cache, key, shot_dir / "work", "rife", _rife)
+    return path, extra.get("fps"), key
+
+def final_stage_key(rife_key: str, target_fps: int, speed: float = 1.0, exact: bool = False) -> str:
+    return stage_key("final", rife_key, target_fps, speed, 17, "slow", *(("exact",) if exact else ()))
+
+def final_stage(shot_dir: Path, cache: Optional[StageCache], rife_key: str, rife_video: Path,
+                target_fps: int, speed: float = 1.0, exact: bool = False):
+    """캐시를 거친 최종 렌더 스테이지. (경로, 캐시 키) 반환. exact면 리샘플 없이 인코드만."""
+    key = final_stage_key(rife_key, target_fps, speed, exact)
+    path, _ = cached_stage(
+        cache, key, shot_dir / "work", "final",
+        lambda: (finalize(shot_dir, target_fps, speed=speed, src=rife_video, resample=not exact),
+                 {"fps": target_fps}),
+        dst_dir=shot_dir / "out")
+    return path, key
+
+def open_cache(root: Path, use_cache: bool = True, cache_dir: Optional[Path] = None,
+               cache_max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[StageCache]:
+    return StageCache(cache_dir or root / ".stage_cache", cache_max_bytes) if use_cache else None
+
+def chunk_times(plan, base_fps: int, speed: float = 1.0, chunk_sec: float = 2.0) -> list:
+    """
+    --progressive 청크 경계 (최종 출력 기준 초). 키프레임 구간 시작마다 끊고,
+    chunk_sec보다 긴 구간은 chunk_sec 간격으로 더 나눈다.
+    """
+    scale = speed / base_fps
+    bounds = [s * scale for s in plan.starts] + [plan.total * scale]
+    times = []
+    for t0, t1 in zip(bounds, bounds[1:]):
+        t = t0
+        while t < t1 - 1e-6:
+            times.append(round(t, 3))
+            t += chunk_sec
+    return times
+
+def progressive_writer(out_path: Path, width: int, height: int, fps: float, vf: Optional[str],
+                       key_times: list):
+    """
+    out/<이름>_live/<이름>.m3u8: fMP4 세그먼트 HLS (event 플레이리스트).
+    청크 경계마다 키프레임을 강제하고 lookahead 없이 인코드해 청크가 끝나는 대로 세그먼트가 붙는다.
+    최종 파일과는 별개의 보조 인코드라 최종본에는 영향이 없다.
+    """
+    from frameio import FrameWriter
+    playlist = live_playlist(out_path)
+    print(f"   진행형 출력: {playlist} (렌더 중에도 재생 가능, 청크 {len(key_times)}개)")
+    return FrameWriter(
+        playlist, width, height, fps, vf=vf, track=False,
+        codec_args=["-c:v", "libx264", "-crf", "20", "-preset", "veryfast", "-tune", "zerolatency",
+                    "-pix_fmt", "yuv420p", "-force_key_frames", ",".join(f"{t:.3f}" for t in key_times)],
+        out_args=["-f", "hls", "-hls_time", "0.1", "-hls_list_size", "0", "-hls_playlist_type", "event",
+                  "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+                  "-hls_segment_filename", str(playlist.parent / "chunk_%05d.m4s")])
+
+def live_playlist(out_path: Path) -> Path:
+    """out/<이름>_live/<이름>.m3u8 경로. 폴더는 비우고 새로 만든다."""
+    live_dir = out_path.parent / f"{out_path.stem}_live"
+    shutil.rmtree(live_dir, ignore_errors=True)
+    live_dir.mkdir(parents=True)
+    return live_dir / f"{out_path.stem}.m3u8"
+
+def progressive_from_file(video: Path, chunk_sec: float = 2.0) -> Path:
+    """
+    캐시 적중으로 렌더 없이 나온 최종본 → 같은 위치의 HLS (stream copy, 재인코드 없음).
+    세그먼트는 원본의 키프레임에서만 끊기므로 청크가 chunk_sec보다 길 수 있다.
+    """
+    playlist = live_playlist(video)
+    run(["ffmpeg", "-y", "-v", "error", "-i", str(video), "-c", "copy", "-an",
+         "-f", "hls", "-hls_time", str(chunk_sec), "-hls_list_size", "0", "-hls_playlist_type", "vod",
+         "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+         "-hls_segment_filename", str(playlist.parent / "chunk_%05d.m4s"), str(playlist)], check=True)
+    print(f"   진행형 출력: 캐시된 최종본을 그대로 나눔 → {playlist}")
+    return playlist
+
+def render_streamed(shot_dir: Path, base_fps: int, target_fps: int, width: int, height: int,
+                    rife_dir: Path, exp: int, uhd: bool = False, scale: float = 1.0,
+                    speed: float = 1.0, fit: str = "auto", crf: int = 17, preset: str = "slow",
+                    threads: int = 0, batch: int = 4, fb_avg: bool = False,
+                    hold_threshold: Optional[float] = None, proxy: int = 1,
+                    out_path: Optional[Path] = None, stage: str = "final",
+                    exact: bool = False, mem_budget: Optional[int] = None,
+                    fade_threshold: Optional[float] = None,
+                    progressive: Optional[float] = None) -> Path:
+    """
+    스트리밍 모드: 베이스 디코드 → (rawvideo 파이프) → 프로세스 내 RIFE → (파이프) → 최종 인코더.
+    디스크에는 out/final_*fps.mp4 하나만 쓴다. (프리뷰는 proxy/out_path/stage만 바꿔 재사용)
+    exact면 target_fps 출력 시각의 프레임만 합성해 fps 필터 없이 인코드.
+    progressive(청크 초)를 주면 같은 프레임을 진행형 HLS(progressive_writer)에도 보낸다.
+    """
+    import contextlib
+    from frameio import FrameWriter
+    from rife_engine import get_engine, exact_step, write_decisions
+
+    out_path = out_path or shot_dir / "out" / f"final_{target_fps}fps.mp4"
+    engine = get_engine(rife_dir, uhd=uhd, scale=scale, threads=threads, batch=batch,
+                        hold_threshold=hold_threshold, mem_budget=mem_budget, fade_threshold=fade_threshold)
+    require_exact_support(engine, exact)
+    reader = read_base_frames(shot_dir, base_fps, width, height, fit, proxy=proxy)
+    if exact:
+        out_fps, vf = target_fps, None
+        frames = engine.stream_exact(reader, exact_step(base_fps, target_fps, speed), fb_avg=fb_avg)
+    else:
+        out_fps, vf = base_fps * (2 ** exp), finalize_filter(target_fps, speed)
+        frames = (engine.stream_fb_avg if fb_avg else engine.stream)(reader, exp)
+    live = (progressive_writer(out_path, reader.width, reader.height, out_fps, vf,
+                               chunk_times(reader.plan, base_fps, speed, progressive))
+            if progressive else contextlib.nullcontext())
+    with reader, FrameWriter(
+        out_path, reader.width, reader.height, out_fps, vf=vf,
+        codec_args=["-c:v", "libx264", "-crf", str(crf), "-preset", preset, "-pix_fmt", "yuv420p"],
+    ) as writer, live as live_writer:
+        for frame in frames:
+            writer.write(frame)
+            if live_writer is not None:
+                live_writer.write(frame)
+    print(f"   ({writer.count} 프레임 @ {out_fps}fps → {target_fps}fps 인코드)")
+    if hold_threshold is not None or fade_threshold is not None:
+        print(f"   {engine.hold_report()}")
+    if fade_threshold is not None:
+        write_decisions(shot_dir / "work" / "logs" / "adaptive_gaps.json", engine.decisions, fade_threshold,
+                        engine.hold_threshold)
+    record_artifact(shot_dir / "work", stage, out_path, fps=target_fps)
+    return out_path
+
+def stream_stage_key(shot_dir: Path, base_fps: int, target_fps: int, width: int, height: int,
+                     rife_dir: Path, exp: int, uhd: bool = False, scale: float = 1.0, speed: float = 1.0,
+                     fit: str = "auto", fb_avg: bool = False,
+                     hold_threshold: Optional[float] = None, exact: bool = False,
+                     mem_budget: Optional[int] = None, batch: int = 4,
+                     fade_threshold: Optional[float] = None) -> str:
+    base_key = base_stage_key(shot_dir, base_fps, width, height, fit)
+    return stage_key("stream", base_key, exp, uhd, scale, fb_avg, hold_threshold, model_digest(rife_dir),
+                     target_fps, speed, 17, "slow", *(("exact",) if exact else ()),
+                     *tiling_key(mem_budget, batch), *adaptive_key(fade_threshold))
+
+def final_key(shot_dir: Path, base_fps: int, target_fps: int, width: int, height: int, rife_dir: Path,
+              exp: Optional[int] = None, uhd: bool = False, scale: float = 1.0, speed: float = 1.0,
+              fit: str = "auto", fb_avg: bool = False, stream: bool = False,
+              hold_threshold: Optional[float] = None, intermediate: str = DEFAULT_FORMAT,
+              exact: bool = False, mem_budget: Optional[int] = None, batch: int = 4,
+              fade_threshold: Optional[float] = None, **_) -> str:
+    """build_pipeline이 같은 인자로 만들 최종본의 키 (렌더 없이 입력 해시만 계산)."""
+    exp_val = compute_exp(base_fps, target_fps) if exp is None else int(exp)
+    if stream:
+        return stream_stage_key(shot_dir, base_fps, target_fps, width, height, rife_dir, exp_val,
+                                uhd, scale, speed, fit, fb_avg, hold_threshold, exact, mem_budget, batch,
+                                fade_threshold)
+    base_key = base_stage_key(shot_dir, base_fps, width, height, fit, intermediate)
+    rife_key = rife_stage_key(base_key, exp_val, rife_dir, uhd, scale, fb_avg, hold_threshold, intermediate,
+                              target_fps if exact else None, speed, mem_budget, batch, fade_threshold)
+    return final_stage_key(rife_key, target_fps, speed, exact)
+
+def up_to_date_final(root: Path, shot: str, **kwargs) -> Optional[Path]:
+    """
+    out/의 최종본이 지금 입력(scene.txt·키프레임·모델·옵션)으로 만든 것이면 그 경로, 아니면 None.
+    stages.json의 final 기록에 남은 키와 비교하므로 아무것도 디코드/렌더하지 않는다.
+    """
+    shot_dir = root / "project" / shot
+    rec = last_artifact(shot_dir / "work", "final")
+    if rec is None or not (shot_dir / "timing" / "scene.txt").exists():
+        return None
+    path, extra = rec
+    return path.resolve() if extra.get("key") == final_key(shot_dir, **kwargs) else None
+
 def build_pipeline(
     root: Path,
     shot: str,
@@ -258,33 +605,175 @@ def build_pipeline(
     scale: float = 1.0,
     speed: float = 1.0,
     fit: str = "auto",
-    fb_avg: bool = False
+    fb_avg: bool = False,
+    use_cache: bool = True,
+    cache_dir: Optional[Path] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    stream: bool = False,
+    threads: int = 0,
+    batch: int = 4,
+    hold_threshold: Optional[float] = None,
+    workers: int = 0,
+    intermediate: str = DEFAULT_FORMAT,
+    exact: bool = False,
+    mem_budget: Optional[int] = None,
+    fade_threshold: Optional[float] = None,
+    progressive: Optional[float] = None,
+    checkpoint: int = 0
 ):
     shot_dir = root / "project" / shot
     ensure_dirs(shot_dir)
+    work = shot_dir / "work"
+
+    # 스테이지 키는 앞 스테이지 키를 이어받는다(체인) → 상류가 바뀌면 하류도 무효
+    cache = open_cache(root, use_cache, cache_dir, cache_max_bytes)
+    exp_val = compute_exp(base_fps, target_fps) if exp is None else int(exp)
+
+    if stream or progressive:
+        mode = "정확한 timestep" if exact else f"exp={exp_val}"
+        print(f"== 스트리밍 렌더 (베이스→RIFE {mode}→최종 {target_fps}fps) ==")
+        stream_key = stream_stage_key(shot_dir, base_fps, target_fps, width, height, rife_dir, exp_val,
+                                      uhd, scale, speed, fit, fb_avg, hold_threshold, exact,
+                                      mem_budget, batch, fade_threshold)
+        rendered = []   # 캐시 적중이면 비어 있음
+
+        def _render():
+            rendered.append(True)
+            return (render_streamed(shot_dir, base_fps, target_fps, width, height, rife_dir, exp_val,
+                                    uhd=uhd, scale=scale, speed=speed, fit=fit,
+                                    threads=threads, batch=batch, fb_avg=fb_avg,
+                                    hold_threshold=hold_threshold, exact=exact,
+                                    mem_budget=mem_budget, fade_threshold=fade_threshold,
+                                    progressive=progressive), {"fps": target_fps})
+        with profiling.stage("stream"):
+            final_video, _ = cached_stage(cache, stream_key, work, "final", _render, dst_dir=shot_dir / "out")
+        if progressive and not rendered:
+            progressive_from_file(final_video, progressive)
+        print(f"   -> {final_video}")
+        print("✅ 완료!")
+        return final_video
 
     print("== 1) 베이스 비디오 생성 ==")
-    base_video = build_base(shot_dir, base_fps, width, height, mute=True, fit=fit)  # ← 수정
+    with profiling.stage("base"):
+        base_video, base_key = base_stage(shot_dir, cache, base_fps, width, height, fit=fit,
+                                          intermediate=intermediate)
     print(f"   -> {base_video}")
 
-    exp_val = compute_exp(base_fps, target_fps) if exp is None else int(exp)
-    print(f"== 2) RIFE 보간 (exp={exp_val}) ==")
-    rife_video, out_fps = rife_interpolate(
-        shot_dir, exp_val, rife_dir, tta=tta, uhd=uhd, scale=scale, fb_avg=fb_avg
-    )
+    print(f"== 2) RIFE 보간 ({f'정확한 timestep → {target_fps}fps' if exact else f'exp={exp_val}'}) ==")
+    with profiling.stage("rife_fbavg" if fb_avg else "rife"):
+        rife_video, out_fps, rife_key = rife_stage(
+            shot_dir, cache, base_key, base_video, exp_val, rife_dir, uhd=uhd, scale=scale,
+            fb_avg=fb_avg, threads=threads, batch=batch, hold_threshold=hold_threshold, workers=workers,
+            intermediate=intermediate, exact_fps=target_fps if exact else None, speed=speed,
+            mem_budget=mem_budget, fade_threshold=fade_threshold, checkpoint=checkpoint)
     print(f"   -> {rife_video} ({out_fps}fps)")
 
     print(f"== 3) 최종 {target_fps}fps 렌더 ==")
-    final_video = finalize(shot_dir, target_fps, speed=speed)
+    with profiling.stage("finalize"):
+        final_video, _ = final_stage(shot_dir, cache, rife_key, rife_video, target_fps, speed=speed,
+                                     exact=exact)
     print(f"   -> {final_video}")
     print("✅ 완료!")
+    return final_video
+
+# ----------------------------
+# 7) 프리뷰 (프록시 해상도)
+# ----------------------------
+PREVIEW_INTERP = ("blend", "rife")
+
+def build_preview(
+    root: Path,
+    shot: str,
+    base_fps: int,
+    target_fps: int,
+    width: int,
+    height: int,
+    rife_dir: Path,
+    exp: Optional[int] = None,
+    uhd: bool = False,
+    scale: float = 1.0,
+    speed: float = 1.0,
+    fit: str = "auto",
+    threads: int = 0,
+    batch: int = 4,
+    hold_threshold: Optional[float] = None,
+    proxy: int = 4,
+    interp: str = "blend",
+    use_cache: bool = True,
+    cache_dir: Optional[Path] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    **_full_only
+) -> Path:
+    """
+    --preview: 같은 scene.txt/키프레임을 1/proxy 해상도로 스트리밍 렌더 → out/preview_*fps.mp4.
+    보간은 blend(크로스페이드, 모델 없음) 또는 rife(프록시 해상도, 홀드 건너뜀),
+    인코드는 ultrafast. 최종 산출물(final_*fps.mp4)은 건드리지 않는다.
+    """
+    from rife_engine import STUB_NAME
+
+    shot_dir = root / "project" / shot
+    ensure_dirs(shot_dir)
+    work = shot_dir / "work"
+    cache = open_cache(root, use_cache, cache_dir, cache_max_bytes)
+    exp_val = compute_exp(base_fps, target_fps) if exp is None else int(exp)
+    model_dir = Path(STUB_NAME) if interp == "blend" else rife_dir
+    hold = 1.0 if hold_threshold is None else hold_threshold
+    out_path = shot_dir / "out" / f"preview_{target_fps}fps.mp4"
+
+    print(f"== 프리뷰 렌더 (1/{proxy} 해상도, {interp}, exp={exp_val} → {target_fps}fps) ==")
+    key = stage_key("preview", base_stage_key(shot_dir, base_fps, width, height, fit), proxy, interp,
+                    exp_val, uhd, scale, hold, model_digest(model_dir), target_fps, speed)
+    with profiling.stage("preview"):
+        path, _ = cached_stage(
+            cache, key, work, "preview",
+            lambda: (render_streamed(shot_dir, base_fps, target_fps, width, height, model_dir, exp_val,
+                                     uhd=uhd, scale=scale, speed=speed, fit=fit, crf=23,
+                                     preset="ultrafast", threads=threads, batch=batch,
+                                     hold_threshold=hold, proxy=proxy, out_path=out_path,
+                                     stage="preview"), {"fps": target_fps}),
+            dst_dir=shot_dir / "out")
+    print(f"   -> {path}")
+    return path
+
+PREVIEW_FLAGS = {"--preview": 0, "--full-after": 0, "--watch": 0, "--full-rebuild": 0,
+                 "--preview-scale": 1, "--preview-interp": 1}
+
+def full_render_argv(argv) -> list:
+    """현재 명령줄에서 프리뷰/감시 관련 옵션만 뺀 전체 렌더 인자."""
+    out, skip = [], 0
+    for tok in argv:
+        if skip:
+            skip -= 1
+            continue
+        name = tok.split("=", 1)[0]
+        if name in PREVIEW_FLAGS:
+            skip = PREVIEW_FLAGS[name] if "=" not in tok else 0
+            continue
+        out.append(tok)
+    return out
+
+def spawn_full_render(shot_dir: Path, argv, previous: Optional[subprocess.Popen] = None) -> subprocess.Popen:
+    """
+    전체 품질 렌더를 별도 프로세스로 시작 (로그: work/logs/full_render.log).
+    앞서 띄운 렌더가 아직 돌고 있으면 (이미 낡은 입력이므로) 중단시킨다.
+    """
+    if previous is not None and previous.poll() is None:
+        print("   (이전 전체 렌더 중단)")
+        previous.terminate()
+        previous.wait()
+    log = shot_dir / "work" / "logs" / "full_render.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [sys.executable, str(Path(__file__).resolve()), *full_render_argv(argv)]
+    with open(log, "a", encoding="utf-8") as f:
+        proc = subprocess.Popen(cmd, stdout=f, stderr=subprocess.STDOUT)
+    print(f"   전체 렌더 시작 (pid {proc.pid}) → 로그 {log}")
+    return proc
 
 # ----------------------------
 # main
 # ----------------------------
-def main():
-    parser = argparse.ArgumentParser(description="RIFE 파이프라인 (키프레임→베이스→보간→최종)")
-    parser.add_argument("--shot", required=True, help="샷 폴더 이름 (예: shot_001)")
+def add_pipeline_args(parser: argparse.ArgumentParser):
+    """렌더 옵션 (pipeline.py / render_all.py 공용)."""
     parser.add_argument("--base-fps", type=int, default=1)
     parser.add_argument("--target-fps", type=int, default=24)
     parser.add_argument("--exp", default="auto", help="RIFE exp (auto 또는 정수)")
@@ -297,51 +786,152 @@ def main():
     parser.add_argument("--speed", type=float, default=1.5, help="setpts 배수(예: 1.5)")
     parser.add_argument("--fit", choices=["auto","canvas"], default="auto",
                         help="auto=원본 해상도 유지(짝수화), canvas=--width/--height에 레터박스")
-    parser.add_argument("--watch", action="store_true", help="키프레임/scene.txt 변경 자동 감시")
+    parser.add_argument("--mem-budget", default="",
+                        help="RIFE 추론 메모리 예산 (예: 4G, 1500M). 주면 예산에 맞는 크기의 겹치는 타일로 나눠 추론")
     parser.add_argument("--fb-avg", type=int, default=0, help="정/역방향 보간 후 평균(1=사용)")
+    parser.add_argument("--stream", action="store_true",
+                        help="중간 mp4 없이 파이프로 베이스→RIFE→최종 인코드 (기본은 파일 기반 단계)")
+    parser.add_argument("--progressive", action="store_true",
+                        help="--stream 렌더 중 키프레임 구간 단위 청크를 out/final_*fps_live/*.m3u8 (fMP4 HLS)에 "
+                             "바로 붙여 끝나기 전에 앞부분을 볼 수 있게 함 (--stream 포함, 최종 파일은 동일)")
+    parser.add_argument("--chunk-sec", type=float, default=2.0,
+                        help="--progressive: 키프레임 구간이 이보다 길면 이 간격으로 청크를 더 나눔")
+    parser.add_argument("--threads", type=int, default=0, help="RIFE CPU 스레드 수 (0=torch 기본값)")
+    parser.add_argument("--batch", type=int, default=4, help="RIFE 한 번에 추론할 프레임 수")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="키프레임 구간을 N개 프로세스로 병렬 보간 (0/1=사용 안 함, 스레드는 코어/N)")
+    parser.add_argument("--checkpoint", type=int, default=0, metavar="N",
+                        help="RIFE 보간을 입력 N프레임 청크마다 work/ckpt/에 커밋 → 중단 후 다시 실행하면 "
+                             "이어서 보간 (0=사용 안 함, 파일 기반 단계만)")
+    parser.add_argument("--intermediate", choices=list(FORMATS), default=DEFAULT_FORMAT,
+                        help="work/ 중간 파일 포맷 (h264=손실·긴 GOP, ffv1/utvideo=무손실 인트라, "
+                             "mjpeg=준무손실 인트라, raw=rawvideo)")
+    parser.add_argument("--exact-fps", action="store_true",
+                        help="2^exp배로 만들고 버리는 대신 최종 fps 시각의 프레임만 임의 timestep으로 합성 "
+                             "(RIFE 4.x/stub, finalize는 리샘플 없이 인코드만)")
+    parser.add_argument("--skip-holds", action="store_true",
+                        help="같은 키프레임이 반복되는 구간은 RIFE 없이 복사")
+    parser.add_argument("--hold-threshold", type=float, default=1.0,
+                        help="홀드 판정 평균 픽셀 차이(0~255, 코덱 노이즈 허용치)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="간격마다 움직임을 싸게 추정해 RIFE / 크로스페이드 / 홀드 중 선택 "
+                             "(결정 기록: work/logs/adaptive_gaps.json)")
+    parser.add_argument("--fade-threshold", type=float, default=6.0,
+                        help="--adaptive: 평균 픽셀 차이가 이 값 이하이고 전역 이동이 거의 없으면 크로스페이드")
+    parser.add_argument("--no-cache", action="store_true", help="스테이지 캐시 사용 안 함")
+    parser.add_argument("--cache-dir", default=".stage_cache", help="스테이지 캐시 폴더")
+    parser.add_argument("--cache-max-gb", type=float, default=20.0, help="캐시 크기 상한(GB, LRU 축출)")
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", action="store_true",
+                        help="스테이지별 시간/CPU/RSS/프레임 리포트를 산출물 옆 *.profile.json 으로 저장")
+    parser.add_argument("--profile-live", action="store_true",
+                        help="렌더 중 스테이지 처리량(fps)을 한 줄로 계속 표시 (--profile 포함)")
+
+def mem_budget_arg(text) -> Optional[int]:
+    """--mem-budget 문자열 → 바이트. rife_engine(numpy)은 값이 있을 때만 import."""
+    if not text:
+        return None
+    from rife_engine import parse_mem_budget
+    return parse_mem_budget(text)
+
+def check_progressive_args(parser: argparse.ArgumentParser, args, watch: bool = False):
+    """--progressive는 파이프 렌더(--stream)로 도므로 파일 기반 단계 옵션과는 함께 쓸 수 없다."""
+    if not getattr(args, "progressive", False):
+        return
+    bad = [flag for flag, on in (("--workers", args.workers > 1), ("--checkpoint", args.checkpoint > 0),
+                                 ("--intermediate", args.intermediate != DEFAULT_FORMAT), ("--watch", watch)) if on]
+    if bad:
+        parser.error(f"--progressive는 {', '.join(bad)} 와 함께 쓸 수 없습니다 (--stream 렌더로 실행됨)")
+
+def pipeline_kwargs(args, ws: Path) -> dict:
+    """add_pipeline_args로 파싱한 값 → build_pipeline 키워드 인자."""
+    return dict(
+        base_fps=args.base_fps,
+        target_fps=args.target_fps,
+        width=args.width, height=args.height,
+        rife_dir=ws / args.rife_dir,
+        exp=None if args.exp == "auto" else int(args.exp),
+        tta=bool(args.tta),
+        uhd=bool(args.uhd),
+        scale=args.scale,
+        speed=args.speed,
+        fit=args.fit,
+        fb_avg=bool(args.fb_avg),
+        stream=args.stream or args.progressive,
+        threads=args.threads,
+        batch=args.batch,
+        hold_threshold=args.hold_threshold if args.skip_holds else None,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+        intermediate=args.intermediate,
+        exact=args.exact_fps,
+        mem_budget=mem_budget_arg(args.mem_budget),
+        fade_threshold=args.fade_threshold if args.adaptive else None,
+        progressive=args.chunk_sec if args.progressive else None,
+        use_cache=not args.no_cache,
+        cache_dir=ws / args.cache_dir,
+        cache_max_bytes=int(args.cache_max_gb * 1024 ** 3),
+    )
 
+def main():
+    from render_daemon import add_submit_args, submit_from_args
+
+    parser = argparse.ArgumentParser(description="RIFE 파이프라인 (키프레임→베이스→보간→최종)")
+    parser.add_argument("--shot", required=True, help="샷 폴더 이름 (예: shot_001)")
+    parser.add_argument("--watch", action="store_true", help="키프레임/scene.txt 변경 자동 감시")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="watch 모드에서 바뀐 구간만이 아니라 매번 전체 파이프라인 실행")
+    parser.add_argument("--preview", action="store_true",
+                        help="저해상도 프록시로 빠르게 렌더 → out/preview_*fps.mp4 (최종 파일은 그대로)")
+    parser.add_argument("--preview-scale", type=int, default=4, help="프리뷰 축소 배수 (4 = 1/4 해상도)")
+    parser.add_argument("--preview-interp", choices=PREVIEW_INTERP, default="blend",
+                        help="프리뷰 보간: blend=크로스페이드(가장 빠름), rife=프록시 해상도 RIFE")
+    parser.add_argument("--full-after", action="store_true",
+                        help="프리뷰가 끝나면 전체 품질 렌더를 별도 프로세스로 시작")
+    add_profile_args(parser)
+    add_pipeline_args(parser)
+    add_submit_args(parser)
 
     args = parser.parse_args()
+    check_progressive_args(parser, args, watch=args.watch)
     ws = Path.cwd()
     shot_dir = ws / "project" / args.shot
-    rife_dir = ws / args.rife_dir
+
+    if args.submit:
+        if args.watch:
+            parser.error("--watch는 --submit과 함께 쓸 수 없습니다")
+        preview = dict(proxy=args.preview_scale, interp=args.preview_interp) if args.preview else None
+        submit_from_args(args, ws, "pipeline", args.shot, dict(kwargs=pipeline_kwargs(args, ws), preview=preview))
+        return
 
     check_ffmpeg()
     ensure_dirs(shot_dir)
 
-    exp_val = None if args.exp == "auto" else int(args.exp)
-
-    if args.watch:
-        watch_and_build(
-            ws, args.shot,
-            base_fps=args.base_fps,
-            target_fps=args.target_fps,
-            width=args.width, height=args.height,
-            rife_dir=rife_dir,
-            exp=exp_val,
-            tta=bool(args.tta),
-            uhd=bool(args.uhd),
-            scale=args.scale,
-            speed=args.speed,
-            fb_avg=bool(args.fb_avg),
-            fit=args.fit
-            
-        )
+    if args.preview:
+        kwargs = dict(pipeline_kwargs(args, ws), proxy=args.preview_scale, interp=args.preview_interp)
+        full = {"proc": None}
+
+        def preview_then_full(root, shot, **kw):
+            path = build_preview(root, shot, **kw)
+            if args.full_after:
+                full["proc"] = spawn_full_render(shot_dir, sys.argv[1:], full["proc"])
+            return path
+
+        if args.watch:
+            watch_and_build(ws, args.shot, build=preview_then_full, **kwargs)
+        else:
+            prof = profiling.start(live=args.profile_live) if args.profile or args.profile_live else None
+            preview = preview_then_full(ws, args.shot, **kwargs)
+            if prof is not None:
+                profiling.stop().write(preview)
+    elif args.watch:
+        watch_and_build(ws, args.shot, incremental=not args.full_rebuild, **pipeline_kwargs(args, ws))
     else:
-        build_pipeline(
-            ws, args.shot,
-            base_fps=args.base_fps,
-            target_fps=args.target_fps,
-            width=args.width, height=args.height,
-            rife_dir=rife_dir,
-            exp=exp_val,
-            tta=bool(args.tta),
-            uhd=bool(args.uhd),
-            scale=args.scale,
-            speed=args.speed,
-            fit=args.fit,
-            fb_avg=bool(args.fb_avg)
-        )
+        prof = profiling.start(live=args.profile_live) if args.profile or args.profile_live else None
+        final_video = build_pipeline(ws, args.shot, **pipeline_kwargs(args, ws))
+        if prof is not None:
+            profiling.stop().write(final_video)
 
 if __name__ == "__main__":
     main()
@@ -2,27 +2,30 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import argparse, os, sys, subprocess
+import argparse, os, sys
 from pathlib import Path
 
 # Reuse functions from the original pipeline
-from pipeline import ensure_dirs, check_ffmpeg, rife_interpolate, compute_exp
+from pipeline import ensure_dirs, check_ffmpeg, rife_interpolate, compute_exp, add_profile_args, build_pipeline
+from intermediate import get_format, FORMATS, DEFAULT_FORMAT
+import profiling
 
 def sh(cmd):
     print("[cmd]", " ".join(map(str, cmd)), flush=True)
-    subprocess.run(cmd, check=True)
+    profiling.run_cmd(cmd, check=True)
 
 def latest_one(dirpath: Path, pattern: str):
     files = sorted(dirpath.glob(pattern), key=os.path.getmtime)
     return files[-1] if files else None
 
-def convert_video_to_base(src: Path, dst: Path, base_fps: int):
+def convert_video_to_base(src: Path, dst: Path, base_fps: int, intermediate: str = DEFAULT_FORMAT):
+    fmt = get_format(intermediate)
     dst.parent.mkdir(parents=True, exist_ok=True)
     sh(["ffmpeg", "-y",
         "-i", str(src),
-        "-vf", f"fps={base_fps},scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1,format=yuv420p",
+        "-vf", f"fps={base_fps},scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1,format={fmt.pix_fmt}",
         "-an",
-        "-c:v", "libx264", "-preset", "fast", "-crf", "18",
+        *fmt.codec_args(),
         str(dst)])
 
 def finalize_from(src: Path, out: Path, target_fps: int, speed: float = 1.0, crf: int = 17, preset: str = "slow"):
@@ -36,12 +39,63 @@ def finalize_from(src: Path, out: Path, target_fps: int, speed: float = 1.0, crf
         "-pix_fmt", "yuv420p",
         str(out)])
 
+def post_from_source(src: Path, out: Path, target_fps: int, rife_dir: Path, speed: float = 1.0,
+                     uhd: bool = False, scale: float = 1.0, crf: int = 17, preset: str = "slow") -> Path:
+    """
+    --post auto: 생성된 클립의 fps/프레임 수를 보고 필요한 만큼만 보간해 바로 최종 인코드.
+    소스가 이미 target_fps(speed 반영) 이상이면 보간 없이 finalize_from 한 번.
+    아니면 소스 프레임을 파이프로 읽어 모자란 비율만 합성 (base 다운샘플·중간 인코드 없음).
+    임의 timestep 모델이면 출력 시각 프레임만, 아니면 2^exp배 후 fps 필터로 맞춘다.
+    """
+    from frameio import FrameReader, FrameWriter, probe_video
+    from pipeline import finalize_filter
+    from rife_engine import exact_step, get_engine
+
+    info = probe_video(src)
+    src_fps = info.fps or float(target_fps)
+    need = target_fps * speed   # 소스 기준으로 필요한 fps (speed>1이면 늘려 재생)
+    frames = f"{info.nb_frames}프레임" if info.nb_frames else "프레임 수 미상"
+    print(f"   소스: {info.width}x{info.height}, {src_fps:.3f}fps, {frames} (필요 {need:.3f}fps)")
+    if src_fps >= need - 1e-3 or (info.nb_frames is not None and info.nb_frames < 2):
+        print("   소스가 이미 목표 fps 이상 → 보간 생략")
+        with profiling.stage("finalize"):
+            finalize_from(src, out, target_fps=target_fps, speed=speed, crf=crf, preset=preset)
+        return out
+
+    # yuv420p 인코드를 위해 짝수 크기로 자른다 (생성 클립은 보통 이미 짝수)
+    w, h = info.width // 2 * 2, info.height // 2 * 2
+    vf = f"crop={w}:{h}:0:0" if (w, h) != (info.width, info.height) else None
+    engine = get_engine(rife_dir, uhd=uhd, scale=scale)
+    codec = ["-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p"]
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with profiling.stage("rife"):
+        with FrameReader(["-i", str(src)], w, h, vf=vf) as reader:
+            if engine.model.arbitrary_timestep:
+                print(f"   보간: x{need / src_fps:.3f} (출력 시각 프레임만 합성)")
+                with FrameWriter(out, w, h, target_fps, codec_args=codec) as writer:
+                    for frame in engine.stream_exact(reader, exact_step(src_fps, target_fps, speed)):
+                        writer.write(frame)
+            else:
+                exp = compute_exp(src_fps, need)
+                print(f"   보간: exp={exp} → {finalize_filter(target_fps, speed)}")
+                with FrameWriter(out, w, h, src_fps * (2 ** exp), vf=finalize_filter(target_fps, speed),
+                                 codec_args=codec) as writer:
+                    for frame in engine.stream(reader, exp):
+                        writer.write(frame)
+    print(f"   실제 추론 {engine.inferred} 프레임")
+    return out
+
 def main():
+    from render_daemon import add_submit_args, submit_from_args
+
     p = argparse.ArgumentParser(description="Hybrid pipeline with Kling + (optional) RIFE")
     p.add_argument("--shot", required=True)
     # Kling options
     p.add_argument("--engine", choices=["kling","rife"], default="kling")
-    p.add_argument("--post", choices=["none","rife"], default="rife")
+    p.add_argument("--post", choices=["none","rife","auto"], default="rife",
+                   help="auto: 소스 fps를 보고 모자란 만큼만 보간 (base 변환 없음)")
+    p.add_argument("--clip", default="",
+                   help="Kling 생성 대신 이미 받은 클립(예: work/wan_out.mp4)을 후처리")
     p.add_argument("--kling-prompt", default="")
     p.add_argument("--kling-negative", default="")
     p.add_argument("--kling-duration", type=int, default=5)
@@ -56,37 +110,46 @@ def main():
     p.add_argument("--uhd", type=int, default=0)
     p.add_argument("--scale", type=float, default=1.0)
     p.add_argument("--speed", type=float, default=1.0)
+    p.add_argument("--intermediate", choices=list(FORMATS), default=DEFAULT_FORMAT,
+                   help="work/ base/rife file format")
+    add_profile_args(p)
+    add_submit_args(p)
     args = p.parse_args()
 
     ws = Path.cwd()
+    if args.submit:
+        submit_from_args(args, ws, "plus", args.shot, vars(args))
+        return
+    check_ffmpeg()
+    prof = profiling.start(live=args.profile_live) if args.profile or args.profile_live else None
+    final_mp4 = run_plus(ws, args)
+    if prof is not None:
+        profiling.stop().write(final_mp4)
+    print("✅ 완료!")
+
+def run_plus(ws: Path, args) -> Path:
+    """main()의 본체. args는 argparse 결과(렌더 데몬은 저장된 dict로 다시 만든 Namespace)."""
     shot_dir = ws / "project" / args.shot
     ensure_dirs(shot_dir)
-    check_ffmpeg()
 
     work = shot_dir / "work"
     out_dir = shot_dir / "out"
     out_dir.mkdir(parents=True, exist_ok=True)
 
     if args.engine == "rife":
-        # Simply call original pipeline via subprocess for compatibility
-        cmd = [sys.executable, "scripts/pipeline.py",
-               "--shot", args.shot,
-               "--base-fps", str(args.base_fps),
-               "--target-fps", str(args.target_fps),
-               "--exp", str(args.exp),
-               "--rife-dir", args.rife_dir,
-               "--tta", str(args.tta),
-               "--uhd", str(args.uhd),
-               "--scale", str(args.scale),
-               "--speed", str(args.speed)]
-        subprocess.run(cmd, check=True)
+        # Same in-process pipeline as pipeline.py (keeps the warm RIFE model when run by the daemon)
+        final = build_pipeline(ws, args.shot, args.base_fps, args.target_fps, 1920, 1080, ws / args.rife_dir,
+                               exp=None if args.exp == "auto" else int(args.exp), tta=bool(args.tta),
+                               uhd=bool(args.uhd), scale=args.scale, speed=args.speed,
+                               intermediate=args.intermediate)
         print("✅ Done (RIFE pipeline)")
-        return
+        return final
 
     # === Kling path ===
     # pick start image
-    start_img = Path(args.kling_start_image) if args.kling_start_image else None
-    if start_img is None:
+    # 상대 경로는 워크스페이스 기준 (렌더 데몬은 다른 cwd에서 실행한다)
+    start_img = ws / args.kling_start_image if args.kling_start_image else None
+    if start_img is None and not args.clip:
         candidates = sorted(list((shot_dir / "keyframes").glob("*.png")) +
                             list((shot_dir / "keyframes").glob("*.jpg")) +
                             list((shot_dir / "keyframes").glob("*.jpeg")))
@@ -95,18 +158,35 @@ def main():
             sys.exit(2)
         start_img = candidates[0]
 
-    print("== 1) Kling 생성 ==")
-    from kling_runner import generate_kling_video, download
-    url = generate_kling_video(start_img, args.kling_prompt, duration=args.kling_duration,
-                               aspect_ratio=args.kling_aspect, negative_prompt=args.kling_negative)
-    kling_mp4 = work / f"kling_{int(args.kling_duration)}s.mp4"
-    download(url, kling_mp4)
+    if args.clip:
+        kling_mp4 = ws / args.clip
+        if not kling_mp4.exists():
+            print(f"ERROR: 클립이 없습니다: {kling_mp4}", file=sys.stderr)
+            sys.exit(2)
+        print("== 1) 기존 클립 사용 ==")
+    else:
+        print("== 1) Kling 생성 ==")
+        from kling_runner import generate_kling_video, download
+        url = generate_kling_video(start_img, args.kling_prompt, duration=args.kling_duration,
+                                   aspect_ratio=args.kling_aspect, negative_prompt=args.kling_negative)
+        kling_mp4 = work / f"kling_{int(args.kling_duration)}s.mp4"
+        with profiling.stage("download"):
+            download(url, kling_mp4)
     print("   ->", kling_mp4)
 
+    final_mp4 = out_dir / f"final_{args.target_fps}fps.mp4"
+    if args.post == "auto":
+        print(f"== 2) 소스 fps 기반 후처리 → {args.target_fps}fps ==")
+        post_from_source(kling_mp4, final_mp4, args.target_fps, ws / args.rife_dir, speed=args.speed,
+                         uhd=bool(args.uhd), scale=args.scale)
+        print("   ->", final_mp4)
+        return final_mp4
+
     # Convert to base for RIFE compatibility
-    base_mp4 = work / f"base_{args.base_fps}fps.mp4"
+    base_mp4 = get_format(args.intermediate).path(work, f"base_{args.base_fps}fps")
     print("== 2) Kling → base 변환 ==")
-    convert_video_to_base(kling_mp4, base_mp4, base_fps=args.base_fps)
+    with profiling.stage("base"):
+        convert_video_to_base(kling_mp4, base_mp4, base_fps=args.base_fps, intermediate=args.intermediate)
     print("   ->", base_mp4)
 
     # Optional RIFE post
@@ -125,16 +205,18 @@ def main():
                 return n
             exp = compute_exp(args.base_fps, args.target_fps)
         print(f"== 3) RIFE 보간 (exp={exp}) ==")
-        rife_out, rife_fps = rife_interpolate(shot_dir, exp, ws / args.rife_dir,
-                                              tta=bool(args.tta), uhd=bool(args.uhd), scale=args.scale)
+        with profiling.stage("rife"):
+            rife_out, rife_fps = rife_interpolate(shot_dir, exp, ws / args.rife_dir,
+                                                  tta=bool(args.tta), uhd=bool(args.uhd), scale=args.scale,
+                                                  base_video=base_mp4, intermediate=args.intermediate)
         print("   ->", rife_out, f"({rife_fps}fps)")
         src_for_final = rife_out
 
     print(f"== 최종 {args.target_fps}fps 렌더 ==")
-    final_mp4 = out_dir / f"final_{args.target_fps}fps.mp4"
-    finalize_from(src_for_final, final_mp4, target_fps=args.target_fps, speed=args.speed)
+    with profiling.stage("finalize"):
+        finalize_from(src_for_final, final_mp4, target_fps=args.target_fps, speed=args.speed)
     print("   ->", final_mp4)
-    print("✅ 완료!")
+    return final_mp4
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+--profile: 스테이지별 시간/자원 리포트.
+
+스테이지(base, rife, finalize, pingpong, download ...)마다
+  wall 시간, CPU 시간(이 프로세스 + 자식 프로세스), 자식 프로세스 최대 RSS,
+  처리 프레임 수, fps
+를 기록해 산출물 옆에 <산출물>.profile.json 으로 쓴다.
+
+- ffmpeg 명령은 `-progress pipe:1` 출력을 읽어 프레임 수/속도를 얻는다.
+- 프로세스 내 단계(RIFE 엔진, FrameWriter)는 add_frames()로 직접 센다.
+- fb-avg 의 정/역방향, 평균(blend)은 timed()로 스레드 CPU 시간을 따로 모은다.
+- live=True 면 진행 중 스테이지의 처리량을 한 줄로 계속 갱신해 보여 준다.
+
+프로파일러가 켜져 있지 않으면 모든 함수가 그냥 통과한다 (오버헤드 없음).
+cancel()을 부르면 다음 프레임/ffmpeg 진행 보고 시점에 Cancelled를 던진다 (render_daemon.py).
+"""
+import json, os, platform, subprocess, sys, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource   # POSIX 전용 (Windows에서는 CPU/RSS 없이 시간·프레임만 기록)
+except ImportError:
+    resource = None
+
+LIVE_INTERVAL = 0.5
+
+def _rusage():
+    """(자기 CPU 초, 자식 CPU 초, 자식 최대 RSS KB). resource가 없으면 0."""
+    if resource is None:
+        return 0.0, 0.0, 0
+    me = resource.getrusage(resource.RUSAGE_SELF)
+    ch = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return me.ru_utime + me.ru_stime, ch.ru_utime + ch.ru_stime, _kb(ch.ru_maxrss)
+
+def _kb(maxrss: int) -> int:
+    # macOS는 바이트, Linux는 KB 단위
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+class Cancelled(Exception):
+    """Profiler.cancel()로 중단된 렌더."""
+
+
+class StageRecord:
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu_self = 0.0
+        self.cpu_children = 0.0
+        self.peak_rss_kb = 0
+        self.frames = 0
+        self.cached = False
+        self.parts: Dict[str, Dict[str, float]] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "wall_s": round(self.wall, 3),
+            "cpu_s": round(self.cpu_self + self.cpu_children, 3),
+            "cpu_self_s": round(self.cpu_self, 3),
+            "cpu_children_s": round(self.cpu_children, 3),
+            "peak_rss_mb": round(self.peak_rss_kb / 1024, 1),
+            "frames": self.frames,
+            "fps": round(self.frames / self.wall, 2) if self.wall > 0 and self.frames else None,
+            "cached": self.cached,
+            "parts": {k: {kk: round(vv, 3) for kk, vv in v.items()} for k, v in self.parts.items()},
+        }
+
+
+class Profiler:
+    def __init__(self, live: bool = False):
+        self.live = live
+        self.stages: List[StageRecord] = []
+        self.current: Optional[StageRecord] = None
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._last_live = 0.0
+        self._stage_t0 = 0.0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled("취소됨")
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.current is not None:   # 중첩 스테이지는 바깥 스테이지에 합산
+            yield self.current
+            return
+        self.check()
+        rec = StageRecord(name)
+        self.current, self._stage_t0 = rec, time.perf_counter()
+        cpu_me, cpu_ch, rss0 = _rusage()
+        try:
+            yield rec
+        finally:
+            rec.wall = time.perf_counter() - self._stage_t0
+            cpu_me2, cpu_ch2, rss1 = _rusage()
+            rec.cpu_self = cpu_me2 - cpu_me
+            rec.cpu_children = cpu_ch2 - cpu_ch
+            if rss1 > rss0:   # 프로세스 전체 최대값이 이 스테이지에서 갱신된 경우
+                rec.peak_rss_kb = max(rec.peak_rss_kb, rss1)
+            self.current = None
+            self.stages.append(rec)
+            if self.live:
+                sys.stderr.write("\n")
+            print(f"   ⏱ {name}: {rec.wall:.2f}s, CPU {rec.cpu_self + rec.cpu_children:.2f}s"
+                  + (f", {rec.frames} 프레임" if rec.frames else "")
+                  + (" (캐시)" if rec.cached else ""))
+
+    def add_frames(self, n: int):
+        self.check()
+        rec = self.current
+        if rec is None:
+            return
+        with self._lock:
+            rec.frames += n
+        self._show_live(rec)
+
+    def child_done(self, peak_rss_kb: int):
+        if self.current is not None:
+            self.current.peak_rss_kb = max(self.current.peak_rss_kb, peak_rss_kb)
+
+    def add_part(self, name: str, wall: float, cpu: float, frames: int = 0):
+        rec = self.current
+        if rec is None:
+            return
+        with self._lock:
+            part = rec.parts.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "frames": 0})
+            part["wall_s"] += wall
+            part["cpu_s"] += cpu
+            part["frames"] += frames
+
+    def _show_live(self, rec: StageRecord, fps: Optional[float] = None):
+        if not self.live:
+            return
+        now = time.perf_counter()
+        if now - self._last_live < LIVE_INTERVAL:
+            return
+        self._last_live = now
+        elapsed = now - self._stage_t0
+        rate = fps if fps is not None else (rec.frames / elapsed if elapsed > 0 else 0.0)
+        sys.stderr.write(f"\r   ▸ {rec.name}: {rec.frames} 프레임, {rate:.1f} fps, {elapsed:.1f}s   ")
+        sys.stderr.flush()
+
+    def report(self) -> dict:
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_wall_s": round(time.perf_counter() - self._t0, 3),
+            "host": {"platform": platform.platform(), "cpus": os.cpu_count()},
+            "stages": [s.to_dict() for s in self.stages],
+        }
+
+    def write(self, output: Path) -> Path:
+        """산출물 옆 <이름>.profile.json 으로 저장."""
+        path = Path(output).with_suffix(".profile.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"   프로파일 → {path}")
+        return path
+
+
+_active: Optional[Profiler] = None
+
+def start(live: bool = False) -> Profiler:
+    global _active
+    _active = Profiler(live=live)
+    return _active
+
+def stop() -> Optional[Profiler]:
+    global _active
+    prof, _active = _active, None
+    return prof
+
+def active() -> Optional[Profiler]:
+    return _active
+
+@contextmanager
+def stage(name: str):
+    if _active is None:
+        yield None
+    else:
+        with _active.stage(name) as rec:
+            yield rec
+
+def mark_cached():
+    if _active is not None and _active.current is not None:
+        _active.current.cached = True
+
+def add_frames(n: int = 1):
+    if _active is not None:
+        _active.add_frames(n)
+
+def timed(name: str, fn, *args, frames: int = 0):
+    """fn(*args) 실행 시간/스레드 CPU 시간을 현재 스테이지의 parts[name]에 합산."""
+    if _active is None:
+        return fn(*args)
+    t0, c0 = time.perf_counter(), time.thread_time()
+    try:
+        return fn(*args)
+    finally:
+        _active.add_part(name, time.perf_counter() - t0, time.thread_time() - c0, frames)
+
+def run_cmd(cmd, cwd=None, check=True) -> subprocess.CompletedProcess:
+    """
+    subprocess.run 대체. 프로파일 중인 ffmpeg 명령이면 -progress 를 붙여 프레임 수를 읽고,
+    POSIX에서는 wait4로 그 자식의 최대 RSS를 얻는다.
+    """
+    cmd = [str(c) for c in cmd]
+    if _active is None or _active.current is None or Path(cmd[0]).stem != "ffmpeg":
+        return subprocess.run(cmd, cwd=cwd, check=check)
+
+    prof, rec = _active, _active.current
+    full = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    proc = subprocess.Popen(full, cwd=cwd, stdout=subprocess.PIPE, text=True)
+    base_frames, frame = rec.frames, 0
+    for line in proc.stdout:
+        if prof.cancelled:
+            proc.kill()
+        key, _, val = line.strip().partition("=")
+        if key == "frame" and val.isdigit():
+            frame = int(val)
+            with prof._lock:
+                rec.frames = base_frames + frame
+        elif key == "fps":
+            try:
+                prof._show_live(rec, float(val))
+            except ValueError:
+                pass
+    proc.stdout.close()
+    if hasattr(os, "wait4"):
+        _, status, ru = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        prof.child_done(_kb(ru.ru_maxrss))
+    else:
+        proc.wait()
+    prof.check()
+    if check and proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return subprocess.CompletedProcess(cmd, proc.returncode)
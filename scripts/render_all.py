@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+render-all: project/shot_* 전체를 한 번에 렌더.
+
+샷마다 base → interpolate → finalize (→ pingpong) 를 의존 관계(DAG)로 두고
+프로세스 풀에서 병렬 실행한다. ffmpeg 인코드 슬롯과 보간 슬롯을 따로 제한해
+코어를 과하게 나눠 쓰지 않게 한다. 실패한 샷은 그 샷의 남은 단계만 건너뛰고
+나머지 샷은 계속 진행한다.
+"""
+import argparse, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pipeline import (add_pipeline_args, pipeline_kwargs, check_ffmpeg, ensure_dirs, compute_exp,
+                      open_cache, base_stage, rife_stage, final_stage)
+
+# (단계 이름, 슬롯 종류)
+STAGES = [
+    ("base", "encode"),
+    ("interpolate", "interp"),
+    ("finalize", "encode"),
+    ("pingpong", "encode"),
+]
+
+def find_shots(ws: Path, pattern: str = "shot_*") -> List[str]:
+    root = ws / "project"
+    return sorted(p.name for p in root.glob(pattern)
+                  if p.is_dir() and (p / "timing" / "scene.txt").exists())
+
+@contextmanager
+def redirect_output(log_path: Path):
+    """워커 프로세스의 stdout/stderr(ffmpeg 자식 포함)를 로그 파일로 돌림."""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    sys.stdout.flush(); sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    with open(log_path, "a", encoding="utf-8") as f:
+        os.dup2(f.fileno(), 1)
+        os.dup2(f.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush(); sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0]); os.close(saved[1])
+
+def run_task(stage: str, ws: Path, shot: str, opts: dict, upstream: Optional[dict]) -> dict:
+    """워커 프로세스에서 단계 하나 실행. 결과(경로, 캐시 키 등)를 dict로 반환."""
+    shot_dir = ws / "project" / shot
+    t0 = time.time()
+    with redirect_output(shot_dir / "work" / "logs" / f"{stage}.log"):
+        try:
+            cache = open_cache(ws, opts["use_cache"], opts["cache_dir"], opts["cache_max_bytes"])
+            if stage == "base":
+                path, key = base_stage(shot_dir, cache, opts["base_fps"], opts["width"], opts["height"],
+                                       fit=opts["fit"], intermediate=opts["intermediate"])
+                result = {"path": str(path), "key": key}
+            elif stage == "interpolate":
+                exp = opts["exp"] if opts["exp"] is not None else compute_exp(opts["base_fps"], opts["target_fps"])
+                path, fps, key = rife_stage(
+                    shot_dir, cache, upstream["key"], Path(upstream["path"]), exp, opts["rife_dir"],
+                    uhd=opts["uhd"], scale=opts["scale"], fb_avg=opts["fb_avg"],
+                    threads=opts["threads"], batch=opts["batch"], hold_threshold=opts["hold_threshold"],
+                    workers=opts["workers"], intermediate=opts["intermediate"],
+                    exact_fps=opts["target_fps"] if opts["exact"] else None, speed=opts["speed"],
+                    mem_budget=opts["mem_budget"], fade_threshold=opts["fade_threshold"],
+                    checkpoint=opts["checkpoint"])
+                result = {"path": str(path), "key": key, "fps": fps}
+            elif stage == "finalize":
+                path, key = final_stage(shot_dir, cache, upstream["key"], Path(upstream["path"]),
+                                        opts["target_fps"], speed=opts["speed"], exact=opts["exact"])
+                result = {"path": str(path), "key": key}
+            elif stage == "pingpong":
+                from make_pingpong import make_pingpong_from_video
+                dst = shot_dir / "out" / f"{shot}_pingpong_{int(opts['pingpong_duration'])}s.mp4"
+                make_pingpong_from_video(Path(upstream["path"]), dst, fps=opts["target_fps"],
+                                         duration_sec=opts["pingpong_duration"])
+                result = {"path": str(dst), "key": upstream["key"]}
+            else:
+                raise ValueError(f"알 수 없는 단계: {stage}")
+        except SystemExit as e:
+            # 단계 함수들은 오류 시 sys.exit() → 워커가 죽지 않도록 일반 예외로 변환
+            raise RuntimeError(f"{stage} 실패 (exit {e.code})") from None
+    result["wall"] = time.time() - t0
+    return result
+
+class ShotState:
+    def __init__(self, shot: str, n_stages: int):
+        self.shot = shot
+        self.n_stages = n_stages
+        self.times: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.last: Optional[dict] = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "failed"
+        return "ok" if len(self.times) == self.n_stages else "pending"
+
+def render_all(ws: Path, shots: List[str], opts: dict, encode_slots: int = 2, interp_slots: int = 1,
+               pingpong: bool = False) -> Dict[str, ShotState]:
+    stages = STAGES if pingpong else STAGES[:3]
+    limits = {"encode": max(1, encode_slots), "interp": max(1, interp_slots)}
+    states = {shot: ShotState(shot, len(stages)) for shot in shots}
+    ready = [(shot, 0) for shot in shots]   # (샷, 단계 인덱스)
+    in_use = {"encode": 0, "interp": 0}
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=limits["encode"] + limits["interp"]) as pool:
+        while ready or running:
+            # 뒤 단계부터 우선 배정 → 먼저 시작한 샷이 먼저 끝남
+            ready.sort(key=lambda item: -item[1])
+            for item in list(ready):
+                shot, idx = item
+                stage, kind = stages[idx]
+                if in_use[kind] >= limits[kind]:
+                    continue
+                st = states[shot]
+                if st.start is None:
+                    st.start = time.time()
+                fut = pool.submit(run_task, stage, ws, shot, opts, st.last)
+                running[fut] = (shot, idx)
+                in_use[kind] += 1
+                ready.remove(item)
+                print(f"▶ {shot}: {stage}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                shot, idx = running.pop(fut)
+                stage, kind = stages[idx]
+                in_use[kind] -= 1
+                st = states[shot]
+                try:
+                    res = fut.result()
+                except Exception as e:   # 해당 샷만 중단
+                    st.error = f"{stage}: {e}"
+                    st.end = time.time()
+                    print(f"✖ {shot}: {stage} 실패 → 남은 단계 건너뜀 ({e})")
+                    continue
+                st.times[stage] = res["wall"]
+                st.last = res
+                print(f"✔ {shot}: {stage} ({res['wall']:.1f}s)")
+                if idx + 1 < len(stages):
+                    ready.append((shot, idx + 1))
+                else:
+                    st.end = time.time()
+    return states
+
+def print_summary(states: Dict[str, ShotState], stage_names: List[str]):
+    header = f"{'shot':<16}{'status':<9}" + "".join(f"{n:>13}" for n in stage_names) + f"{'wall':>10}"
+    print("\n" + header)
+    print("-" * len(header))
+    for st in states.values():
+        cols = "".join(f"{(f'{st.times[n]:.1f}s' if n in st.times else '-'):>13}" for n in stage_names)
+        wall = f"{st.end - st.start:.1f}s" if st.start and st.end else "-"
+        print(f"{st.shot:<16}{st.status:<9}{cols}{wall:>10}")
+        if st.error:
+            print(f"{'':<16}└ {st.error}")
+
+def main():
+    p = argparse.ArgumentParser(description="project/shot_* 일괄 렌더 (DAG + 프로세스 풀)")
+    p.add_argument("--shots", default="shot_*", help="샷 폴더 glob 패턴")
+    p.add_argument("--encode-slots", type=int, default=2, help="동시에 돌릴 ffmpeg 인코드 수")
+    p.add_argument("--interp-slots", type=int, default=1, help="동시에 돌릴 RIFE 보간 수")
+    p.add_argument("--pingpong", action="store_true", help="최종 렌더 뒤 핑퐁까지 생성")
+    p.add_argument("--pingpong-duration", type=float, default=6.0)
+    p.add_argument("--summary-json", default="", help="샷별 소요 시간 요약 JSON 경로")
+    add_pipeline_args(p)
+    args = p.parse_args()
+    # 단계별 DAG는 단계 산출물 파일을 주고받으므로 파이프 렌더(render_streamed)와 섞을 수 없다
+    if args.stream or args.progressive or args.chunk_sec != p.get_default("chunk_sec"):
+        p.error("--stream / --progressive / --chunk-sec 는 render_all에서 지원하지 않습니다 "
+                "(샷마다 pipeline.py로 실행하세요)")
+
+    ws = Path.cwd()
+    check_ffmpeg()
+    shots = find_shots(ws, args.shots)
+    if not shots:
+        print(f"ERROR: project/{args.shots} 에 timing/scene.txt가 있는 샷이 없습니다.", file=sys.stderr)
+        sys.exit(2)
+    for shot in shots:
+        ensure_dirs(ws / "project" / shot)
+
+    opts = pipeline_kwargs(args, ws)
+    opts["pingpong_duration"] = args.pingpong_duration
+    if not opts["threads"]:
+        # 워커당 스레드 상한: 코어를 전체 슬롯 수로 나눔 (--workers면 parallel_rife가 세그먼트 프로세스끼리 다시 나눔)
+        opts["threads"] = max(1, (os.cpu_count() or 1) // (args.encode_slots + args.interp_slots))
+
+    print(f"샷 {len(shots)}개: 인코드 슬롯 {args.encode_slots}, 보간 슬롯 {args.interp_slots}, "
+          f"보간 스레드 {opts['threads']}")
+    t0 = time.time()
+    states = render_all(ws, shots, opts, encode_slots=args.encode_slots,
+                        interp_slots=args.interp_slots, pingpong=args.pingpong)
+    stage_names = [s for s, _ in (STAGES if args.pingpong else STAGES[:3])]
+    print_summary(states, stage_names)
+    failed = [s for s in states.values() if s.status != "ok"]
+    print(f"\n전체 {time.time() - t0:.1f}s, 성공 {len(states) - len(failed)} / 실패 {len(failed)}")
+
+    if args.summary_json:
+        summary = {
+            st.shot: {"status": st.status, "stages": st.times, "error": st.error,
+                      "wall": (st.end - st.start) if st.start and st.end else None}
+            for st in states.values()
+        }
+        Path(args.summary_json).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+렌더 데몬: 작업 큐(SQLite) + 프로세스 안에 계속 떠 있는 RIFE 모델.
+
+  python scripts/render_daemon.py serve --preload Practical-RIFE      # 워크스페이스 루트에서
+  python scripts/pipeline.py --shot shot_001 --submit --priority 5 --follow
+  python scripts/render_daemon.py list | follow <id> | cancel <id>
+
+- 작업은 .render_daemon/jobs.db 에 저장돼 데몬을 다시 켜도 남는다. 실행 중에 죽은 작업은
+  재시작할 때 다시 대기열로 돌아간다 (캐시/stages.json은 완성된 산출물만 기록하므로 안전).
+- 큰 priority부터, 같으면 먼저 들어온 순서로 한 번에 하나씩 실행한다.
+- 작업은 데몬 프로세스 안에서 실행되므로 get_engine()의 모델이 작업 사이에 그대로 재사용된다.
+- 로그(ffmpeg 포함)는 project/<shot>/work/logs/job_<id>.log, 진행 상황은 profiling 스테이지/프레임 수.
+- 취소는 profiling.cancel() → 다음 프레임 경계에서 중단 (미완성 인코드는 FrameWriter가 지운다).
+
+HTTP (127.0.0.1만, JSON). 작업 본문의 ws/rife_dir(모델 코드를 import)을 그대로 믿으므로 루프백 외의 주소에는
+절대 열지 않는다. 같은 PC의 브라우저 페이지(CSRF, DNS rebinding)도 막기 위해 모든 요청에
+X-Render-Token(serve가 .render_daemon/token 에 0600으로 쓰는 값)을 요구하고, Origin 헤더가 있거나
+Host가 127.0.0.1/localhost가 아니거나 POST 본문이 application/json이 아니면 거절한다:
+  POST /jobs                  {kind, shot, ws, params, priority} → {id}
+  GET  /jobs, /jobs/<id>
+  GET  /jobs/<id>/events      줄 단위 JSON (log / progress / 끝나면 status) 스트림
+  POST /jobs/<id>/cancel
+"""
+import argparse, hmac, json, os, secrets, sqlite3, sys, threading, time, traceback
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_URL = os.environ.get("RENDER_DAEMON", "http://127.0.0.1:8765")
+STATE_DIR = ".render_daemon"
+KINDS = ("pipeline", "pingpong", "plus")
+FINISHED = ("done", "failed", "cancelled")
+PATH_KEYS = ("rife_dir", "cache_dir")   # pipeline_kwargs 중 JSON으로는 문자열이 되는 값
+POLL = 0.5
+HOST = "127.0.0.1"   # 고정. 다른 주소로 열면 원격 코드 실행이 된다
+ALLOWED_HOSTS = ("127.0.0.1", "localhost")
+TOKEN_FILE = "token"
+TOKEN_HEADER = "X-Render-Token"
+
+
+def write_token(ws: Path) -> str:
+    """데몬을 켤 때마다 새 토큰을 만들어 소유자만 읽을 수 있게(0600) 저장."""
+    path = ws / STATE_DIR / TOKEN_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+def read_token(ws: Optional[Path] = None) -> str:
+    """클라이언트 쪽 토큰: 환경변수 RENDER_DAEMON_TOKEN, 없으면 워크스페이스의 .render_daemon/token."""
+    token = os.environ.get("RENDER_DAEMON_TOKEN")
+    if token:
+        return token
+    try:
+        return (Path(ws or Path.cwd()) / STATE_DIR / TOKEN_FILE).read_text().strip()
+    except OSError:
+        return ""
+
+
+# ---------------- 작업 큐 ----------------
+class JobQueue:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL, shot TEXT NOT NULL, ws TEXT NOT NULL, params TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT 'queued',
+                created REAL, started REAL, finished REAL,
+                result TEXT, error TEXT, cancel INTEGER NOT NULL DEFAULT 0)""")
+
+    def _conn(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    @staticmethod
+    def _row(row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def submit(self, kind: str, shot: str, ws: str, params: dict, priority: int = 0) -> int:
+        with self._conn() as db:
+            cur = db.execute("INSERT INTO jobs (kind, shot, ws, params, priority, created) VALUES (?,?,?,?,?,?)",
+                             (kind, shot, ws, json.dumps(params, default=str), int(priority), time.time()))
+            return cur.lastrowid
+
+    def claim(self) -> Optional[dict]:
+        """대기 중인 작업 중 priority가 가장 큰(같으면 가장 오래된) 것을 running으로 바꿔 반환."""
+        db = self._conn()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT * FROM jobs WHERE status='queued' "
+                             "ORDER BY priority DESC, id LIMIT 1").fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status='running', started=? WHERE id=?", (time.time(), row["id"]))
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        return self._row(row)
+
+    def finish(self, job_id: int, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._conn() as db:
+            db.execute("UPDATE jobs SET status=?, finished=?, result=?, error=? WHERE id=?",
+                       (status, time.time(), result, error, job_id))
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        """대기 중이면 바로 cancelled, 실행 중이면 취소 요청만 남긴다. 새 상태(없는 작업이면 None)."""
+        with self._conn() as db:
+            db.execute("UPDATE jobs SET status='cancelled', finished=? WHERE id=? AND status='queued'",
+                       (time.time(), job_id))
+            db.execute("UPDATE jobs SET cancel=1 WHERE id=? AND status='running'", (job_id,))
+            row = db.execute("SELECT status FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._conn() as db:
+            return self._row(db.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone())
+
+    def list(self, limit: int = 50) -> list:
+        with self._conn() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def recover(self) -> int:
+        """이전 데몬이 실행하다 멈춘 작업을 다시 대기열로 (취소 요청이 있던 것은 cancelled)."""
+        with self._conn() as db:
+            db.execute("UPDATE jobs SET status='cancelled', finished=? WHERE status='running' AND cancel=1",
+                       (time.time(),))
+            return db.execute("UPDATE jobs SET status='queued', started=NULL WHERE status='running'").rowcount
+
+
+# ---------------- 작업 실행 ----------------
+def job_log(job: dict) -> Path:
+    return Path(job["ws"]) / "project" / job["shot"] / "work" / "logs" / f"job_{job['id']}.log"
+
+def _restore_paths(kwargs: dict) -> dict:
+    return {k: (Path(v) if k in PATH_KEYS and v is not None else v) for k, v in kwargs.items()}
+
+def run_job(job: dict) -> Path:
+    """저장된 작업을 이 프로세스에서 실행하고 산출물 경로를 반환."""
+    ws, shot, params = Path(job["ws"]), job["shot"], job["params"]
+    if job["kind"] == "pipeline":
+        kwargs = _restore_paths(params["kwargs"])
+        if params.get("preview"):
+            from pipeline import build_preview
+            return build_preview(ws, shot, **kwargs, **params["preview"])
+        from pipeline import build_pipeline
+        return build_pipeline(ws, shot, **kwargs)
+    if job["kind"] == "pingpong":
+        from make_pingpong import build_pingpong
+        opts = {k: v for k, v in params.items() if k != "profile"}
+        return build_pingpong(ws, shot, **dict(opts, kwargs=_restore_paths(params["kwargs"])))
+    if job["kind"] == "plus":
+        from pipeline_plus import run_plus
+        return run_plus(ws, argparse.Namespace(**params))
+    raise ValueError(f"알 수 없는 작업 종류: {job['kind']}")
+
+
+class RenderDaemon:
+    def __init__(self, queue: JobQueue, token: str):
+        self.queue, self.token = queue, token
+        self.wake = threading.Event()
+        self.running: Optional[dict] = None   # 실행 중인 작업
+        self.prof = None                      # 그 작업의 profiling.Profiler
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        status = self.queue.cancel(job_id)
+        if status == "running" and self.running is not None and self.running["id"] == job_id:
+            self.prof.cancel()
+            status = "cancelling"
+        return status
+
+    def progress(self, job_id: int) -> Optional[dict]:
+        job, prof = self.running, self.prof
+        if job is None or job["id"] != job_id or prof is None:
+            return None
+        rec = prof.current
+        done = [s.name for s in prof.stages]
+        if rec is None:
+            return {"stage": None, "done": done}
+        elapsed = time.perf_counter() - prof._stage_t0
+        return {"stage": rec.name, "frames": rec.frames, "elapsed": round(elapsed, 1),
+                "fps": round(rec.frames / elapsed, 1) if elapsed > 0 else 0.0, "done": done}
+
+    def loop(self):
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                self.wake.wait(POLL * 4)
+                self.wake.clear()
+                continue
+            self.run(job)
+
+    def run(self, job: dict):
+        import profiling
+        from render_all import redirect_output
+
+        print(f"▶ 작업 {job['id']} ({job['kind']} {job['shot']}, priority {job['priority']})")
+        status, result, error = "done", None, None
+        self.prof = profiling.start()
+        self.running = job
+        if self.queue.get(job["id"])["cancel"]:   # 대기 중 상태가 바뀌기 직전에 들어온 취소
+            self.prof.cancel()
+        try:
+            with redirect_output(job_log(job)):
+                try:
+                    out = run_job(job)
+                    result = str(out)
+                    if job["params"].get("profile"):
+                        self.prof.write(out)
+                except profiling.Cancelled:
+                    status = "cancelled"
+                    print("⏹ 취소됨")
+                except SystemExit as e:
+                    status, error = "failed", f"exit {e.code}"
+                except Exception as e:
+                    status, error = "failed", f"{type(e).__name__}: {e}"
+                    traceback.print_exc()
+        finally:
+            profiling.stop()
+            self.running, self.prof = None, None
+        self.queue.finish(job["id"], status, result, error)
+        print(f"   작업 {job['id']}: {status}" + (f" → {result}" if result else "") + (f" ({error})" if error else ""))
+
+
+# ---------------- HTTP ----------------
+def handler_class(daemon: RenderDaemon):
+    """HTTP 핸들러. http.server는 serve할 때만 import (--submit 클라이언트 시작 시간 절약)."""
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        daemon: RenderDaemon = None
+
+        def log_message(self, *args):
+            pass   # 작업 로그로 stderr를 돌려 두므로 접근 로그는 남기지 않는다
+
+        def _json(self, code: int, obj):
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _reject(self, post: bool) -> bool:
+            """브라우저발 요청/토큰 없는 요청이면 403을 보내고 True."""
+            host = (self.headers.get("Host") or "").rsplit(":", 1)[0]
+            error = None
+            if self.headers.get("Origin") is not None:
+                error = "브라우저 요청은 받지 않습니다"
+            elif host not in ALLOWED_HOSTS:
+                error = "Host가 127.0.0.1/localhost가 아닙니다"
+            elif post and (self.headers.get("Content-Type") or "").split(";")[0].strip() != "application/json":
+                error = "Content-Type은 application/json이어야 합니다"
+            elif not hmac.compare_digest(self.headers.get(TOKEN_HEADER) or "", self.daemon.token):
+                error = f"{TOKEN_HEADER}가 없거나 틀립니다"
+            if error:
+                self._json(403, {"error": error})
+            return error is not None
+
+        def _job_id(self, parts) -> Optional[int]:
+            return int(parts[1]) if len(parts) >= 2 and parts[1].isdigit() else None
+
+        def do_GET(self):
+            if self._reject(post=False):
+                return
+            parts = self.path.strip("/").split("/")
+            queue = self.daemon.queue
+            if parts == ["jobs"]:
+                return self._json(200, queue.list())
+            job_id = self._job_id(parts)
+            job = queue.get(job_id) if parts[0] == "jobs" and job_id is not None else None
+            if job is None:
+                return self._json(404, {"error": "없는 작업"})
+            if len(parts) == 2:
+                return self._json(200, dict(job, progress=self.daemon.progress(job_id)))
+            if parts[2:] == ["events"]:
+                return self._events(job)
+            self._json(404, {"error": "없는 경로"})
+
+        def do_POST(self):
+            if self._reject(post=True):
+                return
+            parts = self.path.strip("/").split("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._json(400, {"error": "JSON 아님"})
+            if parts == ["jobs"]:
+                if body.get("kind") not in KINDS or not body.get("shot") or not body.get("ws"):
+                    return self._json(400, {"error": f"kind({'/'.join(KINDS)}), shot, ws 가 필요합니다"})
+                if not Path(body["ws"]).is_absolute():
+                    # 상대 경로면 데몬의 cwd 기준이 되어 다른 워크스페이스에 렌더한다
+                    return self._json(400, {"error": "ws는 절대 경로여야 합니다"})
+                job_id = self.daemon.queue.submit(body["kind"], body["shot"], body["ws"], body.get("params", {}),
+                                                  body.get("priority", 0))
+                self.daemon.wake.set()
+                return self._json(200, {"id": job_id})
+            job_id = self._job_id(parts)
+            if parts[0] == "jobs" and job_id is not None and parts[2:] == ["cancel"]:
+                status = self.daemon.cancel(job_id)
+                return self._json(404 if status is None else 200, {"id": job_id, "status": status})
+            self._json(404, {"error": "없는 경로"})
+
+        def _events(self, job: dict):
+            """로그 새 줄과 진행 상황을 줄 단위 JSON으로 흘려보내다가 작업이 끝나면 status 한 줄로 닫는다."""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.end_headers()
+            log, pos, last = job_log(job), 0, None
+            try:
+                while True:
+                    job = self.daemon.queue.get(job["id"])
+                    finished = job["status"] in FINISHED
+                    lines = []
+                    if log.exists():
+                        with open(log, "rb") as f:
+                            f.seek(pos)
+                            chunk = f.read()
+                        end = chunk.rfind(b"\n") + 1 if not finished else len(chunk)
+                        pos += end
+                        lines = chunk[:end].decode("utf-8", "replace").splitlines()
+                    events = [{"log": line} for line in lines]
+                    prog = self.daemon.progress(job["id"])
+                    if prog is not None and prog != last:
+                        events.append({"progress": prog})
+                        last = prog
+                    if finished:
+                        events.append({"status": job["status"], "result": job["result"], "error": job["error"]})
+                    for ev in events:
+                        self.wfile.write((json.dumps(ev, ensure_ascii=False) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                    if finished:
+                        return
+                    time.sleep(POLL)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+    Handler.daemon = daemon
+    return Handler
+
+
+def serve(ws: Path, port: int, db: Optional[Path] = None, preload: str = ""):
+    from pipeline import check_ffmpeg
+
+    check_ffmpeg()
+    queue = JobQueue(db or ws / STATE_DIR / "jobs.db")
+    recovered = queue.recover()
+    if recovered:
+        print(f"   중단됐던 작업 {recovered}개를 다시 대기열로")
+    if preload:
+        from rife_engine import get_engine
+        get_engine(ws / preload)
+        print(f"   모델 로드: {preload}")
+    from http.server import ThreadingHTTPServer
+
+    daemon = RenderDaemon(queue, write_token(ws))
+    server = ThreadingHTTPServer((HOST, port), handler_class(daemon))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🛰 렌더 데몬: http://{HOST}:{port}  (큐 {queue.path}, Ctrl+C로 종료)")
+    try:
+        daemon.loop()
+    except KeyboardInterrupt:
+        print("종료 (실행 중이던 작업은 다음 시작 때 다시 실행)")
+    finally:
+        server.shutdown()
+
+
+# ---------------- 클라이언트 ----------------
+def _call(url: str, path: str, body: Optional[dict] = None, ws: Optional[Path] = None):
+    from urllib import request as urlrequest
+    from urllib.error import HTTPError, URLError
+
+    data = json.dumps(body, default=str).encode("utf-8") if body is not None else None
+    req = urlrequest.Request(url.rstrip("/") + path, data=data, method="POST" if data is not None else "GET",
+                             headers={"Content-Type": "application/json", TOKEN_HEADER: read_token(ws)})
+    try:
+        with urlrequest.urlopen(req, timeout=30) as resp:
+            return json.loads(resp.read())
+    except HTTPError as e:
+        print(f"ERROR: {json.loads(e.read()).get('error', e)}", file=sys.stderr); sys.exit(1)
+    except URLError as e:
+        print(f"ERROR: 렌더 데몬({url})에 연결할 수 없습니다: {e.reason}\n"
+              f"       python scripts/render_daemon.py serve 로 먼저 띄우세요.", file=sys.stderr)
+        sys.exit(1)
+
+def submit_job(url: str, kind: str, shot: str, ws: Path, params: dict, priority: int = 0) -> int:
+    return _call(url, "/jobs", {"kind": kind, "shot": shot, "ws": str(Path(ws).resolve()),
+                                "params": params, "priority": priority}, ws)["id"]
+
+def follow_job(url: str, job_id: int, ws: Optional[Path] = None) -> dict:
+    """진행 로그를 출력하며 작업이 끝날 때까지 기다린다. 마지막 status 이벤트를 반환."""
+    from urllib import request as urlrequest
+
+    live = False
+    req = urlrequest.Request(f"{url.rstrip('/')}/jobs/{job_id}/events", headers={TOKEN_HEADER: read_token(ws)})
+    with urlrequest.urlopen(req) as resp:
+        for raw in resp:
+            ev = json.loads(raw)
+            if "progress" in ev:
+                p = ev["progress"]
+                if p.get("stage"):
+                    sys.stderr.write(f"\r   ▸ {p['stage']}: {p['frames']} 프레임, {p['fps']:.1f} fps, "
+                                     f"{p['elapsed']:.1f}s   ")
+                    sys.stderr.flush()
+                    live = True
+                continue
+            if live:
+                sys.stderr.write("\n")
+                live = False
+            if "log" in ev:
+                print(ev["log"], flush=True)
+            elif "status" in ev:
+                return ev
+    return {"status": "unknown"}
+
+def add_submit_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--submit", action="store_true",
+                        help="바로 실행하지 않고 렌더 데몬(render_daemon.py serve)의 큐에 넣음")
+    parser.add_argument("--priority", type=int, default=0, help="--submit: 클수록 먼저 실행")
+    parser.add_argument("--follow", action="store_true", help="--submit: 끝날 때까지 진행 로그를 받아 출력")
+    parser.add_argument("--daemon", default=DEFAULT_URL, help="렌더 데몬 주소 (환경변수 RENDER_DAEMON)")
+
+def submit_from_args(args, ws: Path, kind: str, shot: str, params: dict) -> int:
+    """add_submit_args로 받은 옵션대로 제출(하고 --follow면 기다림). 실패/취소면 exit 1."""
+    params = dict(params, profile=bool(getattr(args, "profile", False)))
+    job_id = submit_job(args.daemon, kind, shot, ws, params, args.priority)
+    print(f"📮 작업 {job_id} 제출 ({kind} {shot}, priority {args.priority}) → {args.daemon}")
+    if args.follow:
+        try:
+            ev = follow_job(args.daemon, job_id, ws)
+        except KeyboardInterrupt:
+            print(f"\n작업은 계속 실행됩니다. 취소: python scripts/render_daemon.py cancel {job_id}")
+            sys.exit(130)
+        print(f"작업 {job_id}: {ev['status']}" + (f" → {ev['result']}" if ev.get("result") else "")
+              + (f" ({ev['error']})" if ev.get("error") else ""))
+        if ev["status"] != "done":
+            sys.exit(1)
+    return job_id
+
+
+def main():
+    ap = argparse.ArgumentParser(description="렌더 데몬 (SQLite 작업 큐 + warm RIFE 모델)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="데몬 실행 (워크스페이스 루트에서)")
+    s.add_argument("--port", type=int, default=8765)
+    s.add_argument("--db", default="", help=f"큐 DB 경로 (기본 {STATE_DIR}/jobs.db)")
+    s.add_argument("--preload", default="", help="시작할 때 미리 로드할 RIFE 폴더 (예: Practical-RIFE, stub)")
+    for name, help_ in (("list", "최근 작업 목록"), ("status", "작업 상태"), ("follow", "진행 로그 스트리밍"),
+                        ("cancel", "작업 취소")):
+        c = sub.add_parser(name, help=help_)
+        if name != "list":
+            c.add_argument("id", type=int)
+        c.add_argument("--daemon", default=DEFAULT_URL)
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        serve(Path.cwd(), args.port, Path(args.db) if args.db else None, args.preload)
+    elif args.cmd == "list":
+        for job in _call(args.daemon, "/jobs"):
+            print(f"{job['id']:>5}  {job['status']:<10} p{job['priority']:<3} {job['kind']:<9} {job['shot']}"
+                  + (f"  → {job['result']}" if job["result"] else "") + (f"  ({job['error']})" if job["error"] else ""))
+    elif args.cmd == "status":
+        print(json.dumps(_call(args.daemon, f"/jobs/{args.id}"), ensure_ascii=False, indent=2))
+    elif args.cmd == "follow":
+        ev = follow_job(args.daemon, args.id)
+        print(f"작업 {args.id}: {ev['status']}")
+        sys.exit(0 if ev["status"] == "done" else 1)
+    elif args.cmd == "cancel":
+        print(f"작업 {args.id}: {_call(args.daemon, f'/jobs/{args.id}/cancel', {})['status']}")
+
+if __name__ == "__main__":
+    main()
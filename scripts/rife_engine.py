@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Practical-RIFE 모델을 프로세스 안에서 직접 호출하는 보간 엔진.
+
+- 모델은 get_engine()으로 한 번만 로드하고 프로세스가 살아 있는 동안 재사용(warm)
+- 프레임 쌍(f0, f1, t)을 batch 단위로 묶어 한 번에 추론
+- CPU 스레드 수를 명시적으로 지정 (GPU 없는 렌더 노드용)
+- 홀드 감지: 키프레임이 반복되는 구간은 모델 대신 복사본으로 채움
+- --fb-avg: 정/역방향을 동시에 추론하고 numpy로 픽셀 평균
+- --exact-fps: 2^exp배로 만든 뒤 버리는 대신, 최종 출력 시각의 프레임만 임의 timestep으로 합성
+- --adaptive: 간격마다 움직임을 추정해 모델 / 크로스페이드 / 홀드 중 고름 (motion.py)
+- --mem-budget: 프레임이 예산보다 크면 겹치는 타일로 나눠 추론하고 겹친 부분을 가중 평균으로 이어 붙임
+- --rife-dir 이 'stub' 이면 가중치 없이 동작하는 선형 블렌드 모델 사용 (테스트용)
+"""
+import math, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import profiling
+from motion import HOLD, FADE, MODEL, classify, crossfade
+
+STUB_NAME = "stub"
+
+Job = Tuple[np.ndarray, np.ndarray, float]   # (f0, f1, timestep)
+
+
+def is_stub(rife_dir: Path) -> bool:
+    rife_dir = Path(rife_dir)
+    return rife_dir.name == STUB_NAME and not (rife_dir / "train_log").exists()
+
+def set_threads(threads: int):
+    """torch intra/inter-op 스레드 수 고정. 0이면 torch 기본값 유지."""
+    if not threads:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(int(threads))
+    try:
+        torch.set_num_interop_threads(max(1, int(threads) // 2))
+    except RuntimeError:
+        pass  # 이미 병렬 작업이 시작된 뒤에는 바꿀 수 없음
+
+def fb_pool() -> ThreadPoolExecutor:
+    """
+    --fb-avg 정/역방향 2-워커 풀. torch 스레드 수 설정은 스레드마다 따로라서,
+    워커마다 현재 예산의 절반으로 맞춘다 (둘 다 전체 코어를 쓰면 과점유).
+    """
+    torch = sys.modules.get("torch")
+    if torch is None:   # stub 모델: torch를 쓰지 않음
+        return ThreadPoolExecutor(max_workers=2, thread_name_prefix="rife-fb")
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="rife-fb", initializer=torch.set_num_threads,
+                              initargs=(max(1, torch.get_num_threads() // 2),))
+
+# ----------------------------
+# 모델 백엔드
+# ----------------------------
+class BlendModel:
+    """
+    가중치가 필요 없는 대체 모델: f0*(1-t) + f1*t 선형 블렌드.
+    결과가 결정적이라 테스트/벤치마크에서 Practical-RIFE 대신 쓴다.
+    """
+    arbitrary_timestep = True
+
+    def infer(self, f0s: Sequence[np.ndarray], f1s: Sequence[np.ndarray],
+              ts: Sequence[float]) -> List[np.ndarray]:
+        a = np.stack(f0s).astype(np.float32)
+        b = np.stack(f1s).astype(np.float32)
+        t = np.asarray(ts, dtype=np.float32).reshape(-1, 1, 1, 1)
+        out = a + (b - a) * t
+        return list(np.clip(out + 0.5, 0, 255).astype(np.uint8))
+
+
+class RifeModel:
+    """
+    Practical-RIFE train_log 모델 래퍼. torch는 생성 시점에만 import.
+    grad 모드는 스레드마다 따로라서 (--fb-avg 워커 스레드) 전역 설정 대신 infer마다 inference_mode.
+    """
+
+    def __init__(self, rife_dir: Path, uhd: bool = False, scale: float = 1.0):
+        import torch
+        from torch.nn import functional as F
+        self.torch, self.F = torch, F
+
+        rife_dir = Path(rife_dir).resolve()
+        if str(rife_dir) not in sys.path:
+            sys.path.insert(0, str(rife_dir))  # train_log/, model/ 패키지 import용
+        from train_log.RIFE_HDv3 import Model
+
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        model = Model()
+        if not hasattr(model, "version"):
+            model.version = 0
+        model.load_model(str(rife_dir / "train_log"), -1)
+        model.eval()
+        model.device()
+        self.model = model
+        # 4.x(>=3.9)는 임의 timestep 지원, 구버전은 t=0.5만
+        self.arbitrary_timestep = model.version >= 3.9
+        # inference_video.py 와 같은 규칙: UHD면 scale 0.5
+        self.scale = 0.5 if (uhd and scale == 1.0) else scale
+
+    def _to_batch(self, frames: Sequence[np.ndarray]):
+        arr = np.ascontiguousarray(np.stack(frames).transpose(0, 3, 1, 2))
+        t = self.torch.from_numpy(arr).to(self.device, non_blocking=True).float() / 255.0
+        _, _, h, w = t.shape
+        tmp = max(128, int(128 / self.scale))
+        ph, pw = ((h - 1) // tmp + 1) * tmp, ((w - 1) // tmp + 1) * tmp
+        return self.F.pad(t, (0, pw - w, 0, ph - h))
+
+    def infer(self, f0s: Sequence[np.ndarray], f1s: Sequence[np.ndarray],
+              ts: Sequence[float]) -> List[np.ndarray]:
+        h, w = f0s[0].shape[:2]
+        with self.torch.inference_mode():
+            I0, I1 = self._to_batch(f0s), self._to_batch(f1s)
+            if self.arbitrary_timestep:
+                T = self.torch.tensor(list(ts), dtype=I0.dtype, device=self.device).view(-1, 1, 1, 1)
+                out = self.model.inference(I0, I1, T, self.scale)
+            else:
+                out = self.model.inference(I0, I1, self.scale)
+            out = (out[:, :, :h, :w] * 255.0).clamp(0, 255).byte().cpu().numpy()
+        return list(out.transpose(0, 2, 3, 1))
+
+# ----------------------------
+# 타일 추론 (메모리 예산)
+# ----------------------------
+# 추론 중 입력 픽셀 1개 × 배치 1장당 최대 메모리 추정값 (float32 피라미드/flow/특징맵 포함, 보수적으로 잡음)
+BYTES_PER_PIXEL = 1200
+TILE_ALIGN = 128   # RifeModel 패딩 단위와 맞춰 타일마다 패딩 낭비가 없게
+MIN_TILE = 256
+
+def parse_mem_budget(text) -> Optional[int]:
+    """'4G', '1500M', '2.5' (GB) → 바이트. 빈 값/0이면 None(타일 안 함)."""
+    if text in (None, "", 0, "0"):
+        return None
+    t = str(text).strip().upper().rstrip("B")
+    mult = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}.get(t[-1:], None)
+    value = float(t[:-1]) if mult else float(t)
+    return int(value * (mult or 1024 ** 3))
+
+def tile_size_for_budget(budget: int, batch: int, scale: float = 1.0) -> int:
+    """예산 안에 batch장이 들어가는 정사각 타일 한 변 (TILE_ALIGN 배수, 최소 MIN_TILE)."""
+    per_px = BYTES_PER_PIXEL * max(1, batch) * max(scale, 0.25) ** 2
+    side = int(math.sqrt(max(budget, 1) / per_px)) // TILE_ALIGN * TILE_ALIGN
+    return max(MIN_TILE, side)
+
+def tile_starts(length: int, tile: int, overlap: int) -> List[int]:
+    """한 축의 타일 시작 위치. 마지막 타일은 끝에 맞춘다."""
+    if length <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    starts = list(range(0, length - tile, stride))
+    return starts + [length - tile]
+
+def _ramp(n: int, lo: int, hi: int) -> np.ndarray:
+    """길이 n 가중치: 앞 lo, 뒤 hi 픽셀은 0→1, 1→0 선형, 나머지 1."""
+    w = np.ones(n, np.float32)
+    if lo:
+        w[:lo] = (np.arange(lo, dtype=np.float32) + 0.5) / lo
+    if hi:
+        w[n - hi:] = np.minimum(w[n - hi:], (np.arange(hi, 0, -1, dtype=np.float32) - 0.5) / hi)
+    return w
+
+
+class TiledModel:
+    """
+    큰 프레임을 겹치는 타일로 나눠 내부 모델로 추론하고, 겹친 영역은 선형 가중치로 섞는다.
+    타일 경계의 flow 왜곡이 보이지 않도록 overlap(기본 64px)만큼 서로 겹친다.
+    한 번에 추론하는 것은 타일 batch개이므로 메모리는 프레임 크기가 아니라 타일 크기를 따른다.
+    """
+
+    def __init__(self, inner, tile: int, overlap: int = 64, batch: int = 4):
+        self.inner = inner
+        self.tile = int(tile)
+        self.overlap = min(int(overlap), self.tile // 4)
+        self.batch = max(1, int(batch))
+        self.arbitrary_timestep = inner.arbitrary_timestep
+
+    def _layout(self, h: int, w: int):
+        """(y, x, th, tw, 가중치) 목록과 픽셀별 가중치 합."""
+        th, tw = min(self.tile, h), min(self.tile, w)
+        tiles, wsum = [], np.zeros((h, w, 1), np.float32)
+        for y in tile_starts(h, self.tile, self.overlap):
+            wy = _ramp(th, self.overlap if y > 0 else 0, self.overlap if y + th < h else 0)
+            for x in tile_starts(w, self.tile, self.overlap):
+                wx = _ramp(tw, self.overlap if x > 0 else 0, self.overlap if x + tw < w else 0)
+                weight = (wy[:, None] * wx[None, :])[..., None]
+                tiles.append((y, x, th, tw, weight))
+                wsum[y:y + th, x:x + tw] += weight
+        return tiles, wsum
+
+    def infer(self, f0s: Sequence[np.ndarray], f1s: Sequence[np.ndarray],
+              ts: Sequence[float]) -> List[np.ndarray]:
+        h, w = f0s[0].shape[:2]
+        if h <= self.tile and w <= self.tile:
+            return self.inner.infer(f0s, f1s, ts)
+        tiles, wsum = self._layout(h, w)
+        out = []
+        # 프레임 하나씩, 그 프레임의 타일을 batch개씩 묶어 추론 (누산 버퍼는 프레임 1장 분량만)
+        for f0, f1, t in zip(f0s, f1s, ts):
+            acc = np.zeros((h, w, 3), np.float32)
+            for i in range(0, len(tiles), self.batch):
+                chunk = tiles[i:i + self.batch]
+                res = self.inner.infer([f0[y:y + th, x:x + tw] for y, x, th, tw, _ in chunk],
+                                       [f1[y:y + th, x:x + tw] for y, x, th, tw, _ in chunk],
+                                       [t] * len(chunk))
+                for (y, x, th, tw, weight), r in zip(chunk, res):
+                    acc[y:y + th, x:x + tw] += r.astype(np.float32) * weight
+            out.append(np.clip(acc / wsum + 0.5, 0, 255).astype(np.uint8))
+        return out
+
+# ----------------------------
+# 엔진 (배치 + 스트림)
+# ----------------------------
+class RifeEngine:
+    def __init__(self, model, batch: int = 4):
+        self.model = model
+        self.batch = max(1, int(batch))
+        self.inferred = 0   # 실제 모델 추론한 프레임 수
+        self.hold_threshold: Optional[float] = None   # None이면 홀드 감지 안 함
+        self.fade_threshold: Optional[float] = None   # None이면 움직임 적응(--adaptive) 안 함
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def interpolate(self, jobs: Sequence[Job]) -> List[np.ndarray]:
+        """(f0, f1, t) 목록을 batch 단위로 추론해 같은 순서로 반환."""
+        out: List[np.ndarray] = []
+        for i in range(0, len(jobs), self.batch):
+            chunk = jobs[i:i + self.batch]
+            out += self.model.infer([j[0] for j in chunk], [j[1] for j in chunk], [j[2] for j in chunk])
+        with self._lock:
+            self.inferred += len(jobs)
+        return out
+
+    def midframes(self, f0: np.ndarray, f1: np.ndarray, n: int) -> List[np.ndarray]:
+        """f0, f1 사이 균등 간격 중간 프레임 n장 (t = 1/(n+1) ... n/(n+1))."""
+        if n <= 0:
+            return []
+        if self.model.arbitrary_timestep:
+            return self.interpolate([(f0, f1, (i + 1) / (n + 1)) for i in range(n)])
+        # 구버전 모델: 재귀 이분 (n = 2^k - 1 일 때 정확)
+        mid = self.interpolate([(f0, f1, 0.5)])[0]
+        half = n // 2
+        return self.midframes(f0, mid, half) + [mid] + self.midframes(mid, f1, n - 1 - half)
+
+    def gap_mode(self, f0: np.ndarray, f1: np.ndarray, n: int = 1, gap: Optional[int] = None) -> str:
+        """
+        간격 하나(f0→f1)의 보간 방식. fade_threshold가 있으면 움직임 추정으로 hold/fade/model,
+        아니면 hold_threshold로 홀드만 가린다. 통계와 결정 기록(decisions)도 여기서 남긴다.
+        """
+        gap = self.stats["pairs"] if gap is None else gap
+        if self.fade_threshold is not None:
+            hold_t = 1.0 if self.hold_threshold is None else self.hold_threshold
+            mode, mad, shift = classify(f0, f1, hold_t, self.fade_threshold)
+            self.decisions.append({"gap": gap, "mode": mode, "mad": round(mad, 2), "shift": round(shift, 1)})
+            if mode != HOLD:
+                print(f"   간격 {gap}→{gap + 1}: 차이 {mad:.1f} / 이동 {shift:.1f}px → {mode}")
+        elif self.hold_threshold is not None and is_hold(f0, f1, self.hold_threshold):
+            mode = HOLD
+        else:
+            mode = MODEL
+        self.stats["pairs"] += 1
+        if mode == HOLD:
+            self.stats["held_pairs"] += 1
+        elif mode == FADE:
+            self.stats["faded_pairs"] += 1
+        if mode != MODEL:
+            self.stats["skipped_frames"] += n
+        return mode
+
+    def _pair_stream(self, frames: Iterable[np.ndarray], exp: int, mids_fn) -> Iterator[np.ndarray]:
+        """
+        공통 스트림 루프: 프레임 쌍을 모아 mids_fn(pairs, n)으로 중간 프레임을 얻고 순서대로 내보냄.
+        gap_mode가 hold인 쌍은 f0 복사본, fade인 쌍은 크로스페이드로 채우고 모델에 넘기지 않는다.
+        """
+        n = 2 ** exp - 1
+        pending: List[Tuple[np.ndarray, np.ndarray, str]] = []
+        active = 0
+        prev = None
+        k = 0   # 이 스트림 안의 간격 번호
+
+        def flush():
+            todo = [(f0, f1) for f0, f1, m in pending if m == MODEL]
+            mids = iter(mids_fn(todo, n) if (todo and n > 0) else [])
+            for (f0, f1, m) in pending:
+                yield f0
+                if n <= 0:
+                    continue
+                if m == HOLD:
+                    yield from [f0] * n
+                elif m == FADE:
+                    yield from (crossfade(f0, f1, (i + 1) / (n + 1)) for i in range(n))
+                else:
+                    yield from next(mids)
+
+        for frame in frames:
+            if prev is not None:
+                m = self.gap_mode(prev, frame, n, gap=self.gap_offset + k)
+                k += 1
+                pending.append((prev, frame, m))
+                active += 1 if m == MODEL else 0
+                # 홀드/페이드 쌍은 추론 비용이 없지만 메모리를 위해 개수 상한을 둔다
+                if active * max(n, 1) >= self.batch or len(pending) >= 8 * self.batch:
+                    yield from flush()
+                    pending, active = [], 0
+            prev = frame
+        yield from flush()
+        if prev is not None:
+            yield prev
+
+    def stream(self, frames: Iterable[np.ndarray], exp: int) -> Iterator[np.ndarray]:
+        """
+        입력 프레임마다 2^exp배로 보간해 순서대로 내보냄(마지막 프레임 포함).
+        batch개 프레임 분량의 쌍이 모일 때까지 모아서 한 번에 추론한다.
+        """
+        return self._pair_stream(frames, exp, lambda pairs, n: self._direction(pairs, n, False))
+
+    def _direction(self, pairs, n: int, backward: bool) -> List[List[np.ndarray]]:
+        """
+        쌍마다 중간 프레임 n장. backward면 입력을 (f1, f0)로 뒤집어 t' = 1 - t 에서
+        추론한 뒤 시간 순서로 정렬 (= 역재생 클립을 보간해 다시 뒤집은 결과).
+        """
+        if not self.model.arbitrary_timestep:
+            if backward:
+                return [self.midframes(f1, f0, n)[::-1] for f0, f1 in pairs]
+            return [self.midframes(f0, f1, n) for f0, f1 in pairs]
+        ts = [(i + 1) / (n + 1) for i in range(n)]
+        if backward:
+            jobs = [(f1, f0, 1.0 - t) for f0, f1 in pairs for t in ts]
+        else:
+            jobs = [(f0, f1, t) for f0, f1 in pairs for t in ts]
+        mids = self.interpolate(jobs)
+        return [mids[k * n:(k + 1) * n] for k in range(len(pairs))]
+
+    def stream_fb_avg(self, frames: Iterable[np.ndarray], exp: int) -> Iterator[np.ndarray]:
+        """
+        정/역방향 보간을 두 스레드에서 동시에 돌리고 프레임별 평균을 내보냄.
+        역방향은 클립 전체를 뒤집지 않고 쌍 단위로 입력 순서만 바꿔 추론하므로
+        메모리는 batch 크기만큼만 쓴다. 원본 프레임은 그대로 통과.
+        """
+        pool = fb_pool()
+
+        def both(pairs, n):
+            k = len(pairs) * n
+            fwd = pool.submit(profiling.timed, "rife_fwd", self._direction, pairs, n, False, frames=k)
+            bwd = pool.submit(profiling.timed, "rife_bwd", self._direction, pairs, n, True, frames=k)
+            a_all, b_all = fwd.result(), bwd.result()
+            return profiling.timed("blend", lambda: [list(average_frames(np.stack(a), np.stack(b)))
+                                                     for a, b in zip(a_all, b_all)], frames=k)
+
+        try:
+            yield from self._pair_stream(frames, exp, both)
+        finally:
+            pool.shutdown(wait=True)
+
+    def stream_exact(self, frames: Iterable[np.ndarray], step: Fraction, first: int = 0,
+                     offset: int = 0, stop: Optional[int] = None,
+                     fb_avg: bool = False) -> Iterator[np.ndarray]:
+        """
+        출력 프레임 j (first ≤ j < stop)마다 입력 위치 p = j*step - offset 의 프레임을 만든다.
+        p가 정수면 입력 프레임 그대로, 아니면 (f[i], f[i+1], t=p-i) 한 장만 추론.
+        stop이 None이면 입력이 끝날 때까지. 입력 프레임은 현재 쌍만 들고 있는다.
+        임의 timestep을 지원하는 모델(4.x / stub)에서만 쓸 수 있다.
+        """
+        if not self.model.arbitrary_timestep:
+            raise ValueError("이 모델은 임의 timestep을 지원하지 않습니다 (--exact-fps 불가)")
+        it = iter(frames)
+        buf: Dict[int, np.ndarray] = {}
+        nxt = 0
+
+        def get(i: int) -> Optional[np.ndarray]:
+            nonlocal nxt
+            while nxt <= i:
+                f = next(it, None)
+                if f is None:
+                    return None
+                buf[nxt] = f
+                buf.pop(nxt - 2, None)
+                nxt += 1
+            return buf.get(i)
+
+        pool = fb_pool() if fb_avg else None
+
+        def synth(jobs: List[Job]) -> List[np.ndarray]:
+            if not fb_avg:
+                return self.interpolate(jobs)
+            # 두 방향 모두 풀 워커에서 (스레드 예산을 반씩 나눠 씀)
+            fwd = pool.submit(profiling.timed, "rife_fwd", self.interpolate, jobs, frames=len(jobs))
+            bwd = pool.submit(profiling.timed, "rife_bwd", self.interpolate,
+                              [(f1, f0, 1.0 - t) for f0, f1, t in jobs], frames=len(jobs))
+            return list(average_frames(np.stack(fwd.result()), np.stack(bwd.result())))
+
+        pending: List[Tuple[np.ndarray, Optional[np.ndarray], float]] = []
+        modes: Dict[int, str] = {}
+
+        def flush():
+            jobs = [(f0, f1, t) for f0, f1, t in pending if f1 is not None]
+            mids = iter(synth(jobs) if jobs else [])
+            for f0, f1, _ in pending:
+                yield f0 if f1 is None else next(mids)
+
+        try:
+            j = first
+            while stop is None or j < stop:
+                p = j * step - offset
+                i = math.floor(p)
+                t = p - i
+                f0 = get(i)
+                if f0 is None:
+                    break
+                if t == 0:
+                    pending.append((f0, None, 0.0))
+                else:
+                    f1 = get(i + 1)
+                    if f1 is None:
+                        break
+                    if i not in modes:
+                        modes.clear()   # 간격은 앞으로만 진행
+                        modes[i] = self.gap_mode(f0, f1, math.ceil(1 / step), gap=offset + i)
+                    if modes[i] == HOLD:
+                        pending.append((f0, None, 0.0))
+                    elif modes[i] == FADE:
+                        pending.append((crossfade(f0, f1, float(t)), None, 0.0))
+                    else:
+                        pending.append((f0, f1, float(t)))
+                        if sum(1 for q in pending if q[1] is not None) >= self.batch:
+                            yield from flush()
+                            pending = []
+                j += 1
+            yield from flush()
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def reset_stats(self):
+        self.inferred = 0
+        self.stats = {"pairs": 0, "held_pairs": 0, "faded_pairs": 0, "skipped_frames": 0}
+        self.decisions: List[dict] = []
+        self.gap_offset = 0   # 구간 단위로 보간할 때 전체 베이스 기준 간격 번호를 남기도록
+
+    def hold_report(self) -> str:
+        st = self.stats
+        if not st["pairs"]:
+            return "홀드 건너뜀: 처리한 쌍 없음"
+        pct = 100.0 * st["held_pairs"] / st["pairs"]
+        fade = f", 크로스페이드 {st['faded_pairs']} 쌍" if self.fade_threshold is not None else ""
+        return (f"홀드 건너뜀: {st['held_pairs']}/{st['pairs']} 쌍 ({pct:.1f}%){fade}, "
+                f"추론 생략 {st['skipped_frames']} 프레임 / 실제 추론 {self.inferred} 프레임")
+
+
+def write_decisions(path: Path, decisions: List[dict], fade_threshold: Optional[float],
+                    hold_threshold: Optional[float]) -> None:
+    """--adaptive 간격별 결정을 JSON으로 저장 (work/logs/adaptive_gaps.json)."""
+    import json
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = sorted(decisions, key=lambda d: d["gap"])
+    summary = {m: sum(1 for d in rows if d["mode"] == m) for m in (MODEL, FADE, HOLD)}
+    path.write_text(json.dumps({"summary": summary, "fade_threshold": fade_threshold,
+                                "hold_threshold": hold_threshold, "gaps": rows},
+                               ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def is_hold(f0: np.ndarray, f1: np.ndarray, threshold: float) -> bool:
+    """
+    두 프레임이 (거의) 같은지. 같은 버퍼면 바로 True, 아니면 4px 간격 샘플의
+    평균 절대 차이(0~255)가 threshold 이하인지 본다. 코덱 노이즈를 감안해 0보다 크게 둔다.
+    """
+    if f0 is f1:
+        return True
+    if f0.shape != f1.shape:
+        return False
+    a, b = f0[::4, ::4], f1[::4, ::4]
+    return float(np.abs(a.astype(np.int16) - b).mean()) <= threshold
+
+
+def average_frames(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """uint8 프레임(들)의 픽셀 평균 (반올림). 오버플로 없이 uint16에서 계산."""
+    return ((a.astype(np.uint16) + b + 1) >> 1).astype(np.uint8)
+
+
+_engines: Dict[tuple, RifeEngine] = {}
+
+def get_engine(rife_dir: Path, uhd: bool = False, scale: float = 1.0,
+               threads: int = 0, batch: int = 4,
+               hold_threshold: Optional[float] = None,
+               mem_budget: Optional[int] = None,
+               fade_threshold: Optional[float] = None) -> RifeEngine:
+    """
+    같은 설정의 엔진은 프로세스 안에서 한 번만 로드(warm)해 재사용.
+    호출마다 batch/hold_threshold/fade_threshold/타일 크기를 갱신하고 홀드 통계를 초기화한다.
+    mem_budget(바이트)을 주면 그 안에 들어가는 타일 크기로 나눠 추론한다.
+    """
+    set_threads(threads)
+    key = (str(Path(rife_dir).resolve()), bool(uhd), float(scale))
+    engine = _engines.get(key)
+    if engine is None:
+        model = BlendModel() if is_stub(rife_dir) else RifeModel(rife_dir, uhd=uhd, scale=scale)
+        engine = _engines[key] = RifeEngine(model, batch=batch)
+        engine.base_model = model
+    engine.batch = max(1, int(batch))
+    if mem_budget:
+        eff_scale = getattr(engine.base_model, "scale", 1.0)
+        tile = tile_size_for_budget(mem_budget, engine.batch, eff_scale)
+        engine.model = TiledModel(engine.base_model, tile, batch=engine.batch)
+        print(f"   타일 추론: {tile}px 타일, 겹침 {engine.model.overlap}px (예산 {mem_budget / 1024 ** 2:.0f}MB, batch {engine.batch})")
+    else:
+        engine.model = engine.base_model
+    engine.hold_threshold = hold_threshold
+    engine.fade_threshold = fade_threshold
+    engine.reset_stats()
+    return engine
+
+def interpolate_stream(engine: RifeEngine, frames: Iterable[np.ndarray], exp: int) -> Iterator[np.ndarray]:
+    return engine.stream(frames, exp)
+
+def exact_step(in_fps: float, out_fps: float, speed: float = 1.0) -> Fraction:
+    """출력 프레임 하나당 입력 프레임 위치 증가량. finalize의 setpts={speed}*PTS,fps={out_fps}와 같은 시간축."""
+    return (Fraction(in_fps).limit_denominator(1001000)
+            / (Fraction(out_fps).limit_denominator(1001000) * Fraction(speed).limit_denominator(1000)))
+
+def interpolate_file(engine: RifeEngine, src: Path, dst: Path, exp: int,
+                     codec_args: Optional[Sequence[str]] = None,
+                     fb_avg: bool = False, exact_fps: Optional[float] = None,
+                     speed: float = 1.0) -> Tuple[Path, float]:
+    """
+    비디오 파일 → 2^exp배 보간 → dst. (경로, 출력 fps) 반환. fb_avg면 정/역방향 평균.
+    exact_fps를 주면 exp 대신 그 fps(speed 반영)의 출력 시각 프레임만 합성한다.
+    """
+    from frameio import FrameReader, FrameWriter, probe_video
+    info = probe_video(src)
+    out_fps = exact_fps if exact_fps else info.fps * (2 ** exp)
+    if codec_args is None:
+        codec_args = ["-c:v", "libx264", "-crf", "16", "-preset", "veryfast", "-pix_fmt", "yuv420p"]
+    with FrameReader(["-i", str(src)], info.width, info.height) as reader, \
+         FrameWriter(dst, info.width, info.height, out_fps, codec_args=codec_args) as writer:
+        if exact_fps:
+            frames = engine.stream_exact(reader, exact_step(info.fps, exact_fps, speed), fb_avg=fb_avg)
+        else:
+            frames = engine.stream_fb_avg(reader, exp) if fb_avg else engine.stream(reader, exp)
+        for frame in frames:
+            writer.write(frame)
+    return Path(dst), out_fps
@@ -2,6 +2,8 @@
 import argparse
 from pathlib import Path
 from pipeline import rife_interpolate, compute_exp, ensure_dirs
+from intermediate import FORMATS, DEFAULT_FORMAT
+from rife_engine import parse_mem_budget
 
 def main():
     p = argparse.ArgumentParser()
@@ -11,8 +13,20 @@ def main():
     p.add_argument("--tta", type=int, default=0)
     p.add_argument("--uhd", type=int, default=0)
     p.add_argument("--scale", type=float, default=1.0)
+    p.add_argument("--mem-budget", default="")  # 예: 4G → 예산에 맞춘 타일 추론
+    p.add_argument("--threads", type=int, default=0)  # RIFE CPU 스레드 수 (0=torch 기본값)
+    p.add_argument("--batch", type=int, default=4)
+    p.add_argument("--workers", type=int, default=0)  # 구간 병렬 워커 수
+    p.add_argument("--checkpoint", type=int, default=0)  # 입력 N프레임 청크마다 커밋 → 중단 후 이어서
+    p.add_argument("--skip-holds", action="store_true")  # 반복 키프레임 구간은 복사
+    p.add_argument("--hold-threshold", type=float, default=1.0)
+    p.add_argument("--adaptive", action="store_true")  # 간격마다 RIFE / 크로스페이드 / 홀드 선택
+    p.add_argument("--fade-threshold", type=float, default=6.0)
+    p.add_argument("--intermediate", choices=list(FORMATS), default=DEFAULT_FORMAT)  # 출력 중간 포맷
     p.add_argument("--base-fps", type=int, default=8)  # auto 계산용 보조
     p.add_argument("--target-fps", type=int, default=24)
+    p.add_argument("--exact-fps", action="store_true")  # target-fps 시각 프레임만 합성 (exp 무시)
+    p.add_argument("--speed", type=float, default=1.0)  # --exact-fps일 때 finalize와 같은 setpts 배수
     args = p.parse_args()
 
     ws = Path.cwd()
@@ -20,7 +34,14 @@ def main():
     ensure_dirs(shot_dir)
 
     exp = compute_exp(args.base_fps, args.target_fps) if args.exp == "auto" else int(args.exp)
-    out, outfps = rife_interpolate(shot_dir, exp, ws / args.rife_dir, tta=bool(args.tta), uhd=bool(args.uhd), scale=args.scale)
+    out, outfps = rife_interpolate(shot_dir, exp, ws / args.rife_dir, tta=bool(args.tta), uhd=bool(args.uhd), scale=args.scale,
+                                   threads=args.threads, batch=args.batch,
+                                   hold_threshold=args.hold_threshold if args.skip_holds else None,
+                                   workers=args.workers, intermediate=args.intermediate,
+                                   exact_fps=args.target_fps if args.exact_fps else None, speed=args.speed,
+                                   mem_budget=parse_mem_budget(args.mem_budget),
+                                   fade_threshold=args.fade_threshold if args.adaptive else None,
+                                   checkpoint=args.checkpoint)
     print(f"RIFE 보간 완료: {out} ({outfps}fps)")
 
 if __name__ == "__main__":
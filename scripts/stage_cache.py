@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스테이지 캐시 (content-addressed).
+
+각 스테이지(base / rife / final)의 입력을 해시해 키를 만들고, 키가 같으면
+저장해 둔 산출물을 work/ 로 복사해 재사용한다. 캐시 폴더는 크기 상한을 넘으면
+가장 오래 사용되지 않은 항목부터 지운다(LRU).
+
+work/stages.json 에는 각 스테이지가 마지막으로 만든 산출물 경로를 기록한다.
+다음 스테이지는 "가장 최근 mtime" 대신 이 기록을 보고 입력을 고른다.
+"""
+import contextlib, hashlib, json, os, shutil, time, uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+from timeline import parse_scene
+
+try:
+    import fcntl   # POSIX 전용 (Windows에서는 stages.json을 잠금 없이 갱신)
+except ImportError:
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3   # 20 GiB
+STAGES_JSON = "stages.json"
+
+# ----------------------------
+# 해시
+# ----------------------------
+_digest_memo = {}
+
+def file_digest(path: Path) -> str:
+    """파일 내용 sha256. (경로, 크기, mtime)이 같으면 프로세스 안에서 재계산하지 않음."""
+    path = Path(path)
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    hit = _digest_memo.get(memo_key)
+    if hit:
+        return hit
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _digest_memo[memo_key] = digest
+    return digest
+
+def stage_key(stage: str, *parts) -> str:
+    """스테이지 이름 + 입력 값들 → 캐시 키."""
+    blob = json.dumps([stage, list(parts)], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def scene_inputs_digest(scene_txt: Path) -> str:
+    """scene.txt 내용 + 참조하는 키프레임들의 바이트 해시."""
+    h = hashlib.sha256()
+    h.update(Path(scene_txt).read_bytes())
+    for entry in parse_scene(scene_txt):
+        h.update(str(entry.path).encode("utf-8"))
+        h.update(file_digest(entry.path).encode() if entry.path.exists() else b"missing")
+    return h.hexdigest()
+
+def model_digest(rife_dir: Path) -> str:
+    """RIFE train_log 폴더의 모든 파일(코드+가중치) 해시. 없으면 'none'."""
+    model_dir = Path(rife_dir) / "train_log"
+    if not model_dir.is_dir():
+        return "none"
+    h = hashlib.sha256()
+    for p in sorted(model_dir.rglob("*")):
+        if p.is_file() and "__pycache__" not in p.parts:
+            h.update(str(p.relative_to(model_dir)).encode("utf-8"))
+            h.update(file_digest(p).encode())
+    return h.hexdigest()
+
+# ----------------------------
+# 캐시 저장소
+# ----------------------------
+class StageCache:
+    """
+    <root>/<key[:2]>/<key>/ 아래에 산출물 1개와 meta.json 을 둔다.
+    폴더 mtime 을 '마지막 사용 시각'으로 쓴다.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def fetch(self, key: str, dst_dir: Path) -> Optional[Tuple[Path, dict]]:
+        """키가 있으면 산출물을 dst_dir로 복사하고 (경로, meta) 반환. 없으면 None."""
+        entry = self.entry_dir(key)
+        meta_path = entry / "meta.json"
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        src = entry / meta["name"]
+        if not src.exists():
+            return None
+        dst_dir = Path(dst_dir)
+        dst_dir.mkdir(parents=True, exist_ok=True)
+        dst = dst_dir / meta["name"]
+        # 하드링크는 ffmpeg -y 덮어쓰기 때 캐시까지 망가뜨리므로 항상 복사
+        tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+        now = time.time()
+        os.utime(entry, (now, now))
+        return dst, meta.get("extra", {})
+
+    def store(self, key: str, src: Path, stage: str = "", **extra) -> Optional[Path]:
+        """
+        산출물을 캐시에 원자적으로 저장하고 필요하면 (방금 저장한 항목은 빼고) 축출.
+        max_bytes보다 큰 산출물은 저장하지 않는다 (저장하자마자 축출될 뿐이므로). 그때는 None.
+        """
+        src = Path(src)
+        entry = self.entry_dir(key)
+        if (entry / "meta.json").exists():
+            return entry / src.name
+        if src.stat().st_size > self.max_bytes:
+            print(f"[cache] 캐시 상한보다 커서 저장 안 함: {src.name} ({src.stat().st_size / 1024 ** 2:.1f} MiB)")
+            return None
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.parent / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp.mkdir()
+        try:
+            shutil.copyfile(src, tmp / src.name)
+            meta = {
+                "stage": stage,
+                "name": src.name,
+                "size": src.stat().st_size,
+                "created": time.time(),
+                "extra": extra,
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp, entry)
+        except OSError:
+            # 다른 프로세스가 먼저 저장한 경우 등
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=entry)
+        return entry / src.name
+
+    def entries(self):
+        """
+        (마지막 사용 시각, 크기, 폴더) 목록.
+        캐시를 같이 쓰는 다른 프로세스가 동시에 축출하면 도중에 사라지는 항목은 건너뛴다.
+        """
+        out = []
+        if not self.root.exists():
+            return out
+        for entry in self.root.glob("??/*"):
+            if entry.name.startswith("."):
+                continue
+            try:
+                if not entry.is_dir():
+                    continue
+                size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+                out.append((entry.stat().st_mtime, size, entry))
+            except OSError:
+                continue
+        return out
+
+    def evict(self, keep: Optional[Path] = None):
+        """총 크기가 max_bytes 이하가 될 때까지 LRU 순으로 삭제. keep(방금 저장한 항목)은 남긴다."""
+        entries = sorted(self.entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            print(f"[cache] 축출: {entry.name[:12]} ({size / 1024 ** 2:.1f} MiB)")
+
+# ----------------------------
+# work/stages.json (스테이지별 최근 산출물 기록)
+# ----------------------------
+@contextlib.contextmanager
+def _manifest_lock(work: Path):
+    """stages.json 읽기-수정-쓰기 구간 잠금 (옆의 .stages.json.lock 에 flock)."""
+    if fcntl is None:
+        yield
+        return
+    with open(Path(work) / f".{STAGES_JSON}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def record_artifact(work: Path, stage: str, path: Path, **extra):
+    manifest = Path(work) / STAGES_JSON
+    # 동시에 기록하는 프로세스(render_all 슬롯, 데몬)가 서로의 스테이지 기록을 지우지 않도록 잠근다
+    with _manifest_lock(work):
+        try:
+            data = json.loads(manifest.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        # work 기준 상대 경로 (final 은 ../out/ 아래)
+        data[stage] = {"path": os.path.relpath(Path(path), Path(work)), **extra}
+        tmp = manifest.with_name(f".{manifest.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, manifest)
+
+def last_artifact(work: Path, stage: str) -> Optional[Tuple[Path, dict]]:
+    """stages.json에 기록된 스테이지 산출물 (경로, extra). 없거나 파일이 사라졌으면 None."""
+    manifest = Path(work) / STAGES_JSON
+    try:
+        data = json.loads(manifest.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    rec = data.get(stage)
+    if not rec:
+        return None
+    path = Path(work) / rec["path"]
+    if not path.exists():
+        return None
+    return path, {k: v for k, v in rec.items() if k != "path"}
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+timing/scene.txt (ffmpeg concat demuxer 형식) 파서 + 프레임 단위 타임라인 컴파일러.
+
+compile_scene()은 scene.txt를 fps 기준의 정확한 계획으로 바꾼다:
+  keyframes  중복 없는 키프레임 경로 목록
+  holds      (키프레임 인덱스, 첫 출력 프레임, 길이) — 항목 i는 [round(t_i*fps), round(t_{i+1}*fps))
+마지막 항목에 duration이 없으면(concat 관례대로 마지막 파일을 한 번 더 적은 경우) 1 프레임.
+
+  python scripts/timeline.py project/shot_001/timing/scene.txt --fps 8 [--json]
+"""
+import argparse, bisect, json
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+
+@dataclass
+class SceneEntry:
+    path: Path                 # scene.txt 기준으로 해석한 절대 경로
+    duration: Optional[float]  # 마지막 항목은 보통 duration이 없음
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        value = value[1:-1]
+    # concat demuxer의 작은따옴표 이스케이프 ('\'')
+    return value.replace("'\\''", "'")
+
+
+def parse_scene(scene_txt: Path) -> List[SceneEntry]:
+    """scene.txt를 읽어 (파일, duration) 목록으로 반환. 상대 경로는 scene.txt 폴더 기준."""
+    scene_txt = Path(scene_txt)
+    base_dir = scene_txt.parent
+    entries: List[SceneEntry] = []
+    for raw in scene_txt.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, _, value = line.partition(" ")
+        if key == "file":
+            p = Path(_unquote(value))
+            if not p.is_absolute():
+                p = base_dir / p
+            entries.append(SceneEntry(path=p.resolve(), duration=None))
+        elif key == "duration" and entries:
+            entries[-1].duration = float(value)
+    return entries
+
+
+@dataclass
+class Hold:
+    key: int      # TimelinePlan.keyframes 인덱스
+    start: int    # 첫 출력 프레임 번호
+    length: int   # 프레임 수
+
+    @property
+    def end(self) -> int:
+        return self.start + self.length
+
+
+@dataclass
+class TimelinePlan:
+    fps: float
+    keyframes: List[Path]
+    holds: List[Hold]
+
+    @property
+    def total(self) -> int:
+        return self.holds[-1].end if self.holds else 0
+
+    @property
+    def starts(self) -> List[int]:
+        """키프레임이 바뀌는 출력 프레임 번호 (구간 시작)."""
+        return [h.start for h in self.holds]
+
+    def key_at(self, frame: int) -> int:
+        return self.holds[bisect.bisect_right(self.starts, frame) - 1].key
+
+    def frame_keys(self) -> List[int]:
+        return [h.key for h in self.holds for _ in range(h.length)]
+
+    def to_dict(self) -> dict:
+        return {"fps": self.fps, "total": self.total,
+                "keyframes": [str(p) for p in self.keyframes],
+                "holds": [asdict(h) for h in self.holds]}
+
+
+def compile_scene(scene_txt: Path, fps: float) -> TimelinePlan:
+    """scene.txt → 프레임 단위 계획. 연속으로 같은 키프레임은 한 홀드로 합치고, 0프레임 항목은 버린다."""
+    entries = parse_scene(scene_txt)
+    keyframes: List[Path] = []
+    index = {}
+    holds: List[Hold] = []
+    t, pos = 0.0, 0
+    for n, e in enumerate(entries):
+        if e.duration is None:
+            end = pos + 1 if n == len(entries) - 1 else pos
+        else:
+            t += e.duration
+            end = int(round(t * fps))
+        length = end - pos
+        if length <= 0:
+            continue
+        if e.path not in index:
+            index[e.path] = len(keyframes)
+            keyframes.append(e.path)
+        key = index[e.path]
+        if holds and holds[-1].key == key and holds[-1].end == pos:
+            holds[-1].length += length
+        else:
+            holds.append(Hold(key, pos, length))
+        pos = end
+    return TimelinePlan(fps, keyframes, holds)
+
+
+class KeyframeSequence:
+    """
+    계획대로 키프레임 버퍼를 출력 프레임 순서로 내보내는 프레임 소스 (FrameReader 대신 사용).
+    같은 키프레임의 프레임은 모두 같은 ndarray를 가리킨다 (복사 없음).
+    """
+
+    def __init__(self, plan: TimelinePlan, buffers: Sequence, width: int, height: int):
+        self.plan, self.buffers = plan, buffers
+        self.width, self.height = int(width), int(height)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def __len__(self) -> int:
+        return self.plan.total
+
+    def __iter__(self) -> Iterator:
+        for h in self.plan.holds:
+            buf = self.buffers[h.key]
+            for _ in range(h.length):
+                yield buf
+
+
+def decode_keyframes(paths: Sequence[Path], width: int, height: int, vf: Optional[str] = None,
+                     workers: int = 0) -> list:
+    """키프레임마다 한 번씩 디코드 + 리사이즈(vf). 스레드 풀로 ffmpeg를 동시에 돌린다."""
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from frameio import FrameReader
+
+    def one(path: Path):
+        with FrameReader(["-i", str(path)], width, height, vf=vf, max_frames=1) as reader:
+            for frame in reader:
+                return frame
+        raise RuntimeError(f"키프레임 디코드 실패: {path}")
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths) or 1))) as pool:
+        return list(pool.map(one, paths))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="scene.txt → 프레임 단위 타임라인 계획")
+    ap.add_argument("scene_txt")
+    ap.add_argument("--fps", type=float, required=True)
+    ap.add_argument("--json", action="store_true", help="계획 전체를 JSON으로 출력")
+    args = ap.parse_args()
+    plan = compile_scene(Path(args.scene_txt), args.fps)
+    if args.json:
+        print(json.dumps(plan.to_dict(), ensure_ascii=False, indent=2))
+        return
+    for h in plan.holds:
+        print(f"{h.start:>6} +{h.length:<5} {plan.keyframes[h.key].name}")
+    print(f"총 {plan.total} 프레임 @ {args.fps:g}fps (키프레임 {len(plan.keyframes)}장)")
+
+
+if __name__ == "__main__":
+    main()
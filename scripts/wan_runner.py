@@ -5,10 +5,21 @@ Replicate의 WAN I2V(Fast) 호출 → mp4 저장
 환경변수: REPLICATE_API_TOKEN
 """
 
-import argparse, sys, requests
+import argparse, sys
 from pathlib import Path
 from typing import cast
 
+MODEL_REF = "wan-video/wan-2.2-i2v-fast"
+
+def wan_input(image, prompt: str, num_frames: int = 121, resolution: str = "720p") -> dict:
+    """WAN I2V 예측 input. image는 파일 객체 또는 data URI/URL."""
+    return {
+        "prompt": prompt,
+        "image": image,
+        "num_frames": int(num_frames),
+        "resolution": resolution,
+    }
+
 def main():
     p = argparse.ArgumentParser(description="WAN 2.2 I2V (Replicate) runner")
     p.add_argument("--image", required=True, help="입력 이미지 경로 (png/jpg)")
@@ -25,19 +36,15 @@ def main():
         print("ERROR: `replicate` 패키지가 필요합니다. `pip install replicate requests`", file=sys.stderr)
         sys.exit(1)
 
-    model_ref = "wan-video/wan-2.2-i2v-fast"
+    model_ref = MODEL_REF
 
     # 실행
     try:
         with open(args.image, "rb") as f:
             url = cast(str, replicate.run(
                 model_ref,
-                input={
-                    "prompt": args.prompt,
-                    "image": f,
-                    "num_frames": int(args.num_frames),
-                    "resolution": args.resolution,
-                },
+                input=wan_input(f, args.prompt, num_frames=args.num_frames,
+                                resolution=args.resolution),
                 use_file_output=False,  # URL 문자열 반환
             ))
     except ReplicateError as e:
@@ -54,12 +61,8 @@ def main():
         raise
 
     # 다운로드
-    out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    r = requests.get(url, stream=True); r.raise_for_status()
-    with open(out_path, "wb") as fo:
-        for ch in r.iter_content(1024 * 1024):
-            if ch: fo.write(ch)
+    from downloader import download
+    out_path = download(url, Path(args.out))
     print("saved:", out_path)
 
 if __name__ == "__main__":